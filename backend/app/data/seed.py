@@ -39,6 +39,7 @@ async def clear_database():
     
     # Clear existing data
     await db.articles.delete_many({})
+    await db.article_bodies.delete_many({})
     await db.users.delete_many({})
     await db.user_articles.delete_many({})
     print("Database cleared successfully")
@@ -52,6 +53,7 @@ async def seed_database():
     
     # Clear only articles and user-article links
     await db.articles.delete_many({})
+    await db.article_bodies.delete_many({})
     await db.user_articles.delete_many({})
     
     # Get first user from the database
@@ -360,6 +362,12 @@ Understanding where framework development is headed and how it affects your tech
     ]
     
     # Insert articles
+    # Bodies are stored separately from the article documents
+    bodies = [
+        {"_id": article["_id"], "content": article.pop("content"), "content_encoding": None}
+        for article in articles
+    ]
+    await db.article_bodies.insert_many(bodies)
     article_result = await db.articles.insert_many(articles)
     print(f"Inserted {len(article_result.inserted_ids)} articles")
     
@@ -12,19 +12,39 @@ db = client.get_database(DATABASE_NAME)
 
 # Collections
 articles = db.get_collection("articles")
+article_bodies = db.get_collection("article_bodies")
+content_dictionaries = db.get_collection("content_dictionaries")
 user_articles = db.get_collection("user_articles")
 users = db.get_collection("users")
 events = db.get_collection("events")
+parse_jobs = db.get_collection("parse_jobs")
+parse_locks = db.get_collection("parse_locks")
+extraction_cache = db.get_collection("extraction_cache")
+reextraction_runs = db.get_collection("reextraction_runs")
 
 # Indexes setup
 async def create_indexes():
     # Create indexes for better query performance
     await articles.create_index("created_at")
+    await articles.create_index(
+        "metadata.canonical_url",
+        unique=True,
+        partialFilterExpression={"metadata.canonical_url": {"$exists": True}}
+    )
+    # Bookmarks waiting for a parse retry
+    await articles.create_index(
+        "retry.next_attempt_at",
+        partialFilterExpression={"type": "bookmark"}
+    )
     
     # Create indexes for user_articles collection
     await user_articles.create_index("user_id")
     await user_articles.create_index([("user_id", 1), ("article_id", 1)], unique=True)
     await user_articles.create_index("timestamps.saved_at")
+    # Readers of an article, for library version bumps
+    await user_articles.create_index("article_id")
+    # Library listing: a user's saves newest first, paginated by (saved_at, _id)
+    await user_articles.create_index([("user_id", 1), ("timestamps.saved_at", -1), ("_id", -1)])
     
     # Create indexes for users collection
     await users.create_index("telegram_id", unique=True)
@@ -33,4 +53,18 @@ async def create_indexes():
     # Create indexes for events collection
     await events.create_index("timestamp")
     await events.create_index("user_id")
-    await events.create_index("action")
\ No newline at end of file
+    await events.create_index("action")
+    
+    # Create indexes for parse_jobs collection
+    await parse_jobs.create_index([("status", 1), ("created_at", 1)])
+    await parse_jobs.create_index([("status", 1), ("lease_expires_at", 1)])
+    await parse_jobs.create_index("finished_at", expireAfterSeconds=7 * 24 * 3600)
+    
+    # Expire abandoned parse leases
+    await parse_locks.create_index("expires_at", expireAfterSeconds=0)
+    
+    # Expire cached extraction results
+    await extraction_cache.create_index(
+        "created_at",
+        expireAfterSeconds=int(os.getenv("EXTRACTION_CACHE_TTL_DAYS", 30)) * 24 * 3600
+    )
\ No newline at end of file
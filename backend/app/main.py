@@ -1,4 +1,6 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import sys
@@ -6,6 +8,7 @@ from logging.handlers import RotatingFileHandler
 import os
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
 from dotenv import load_dotenv
 from typing import List, Optional, Any
 
@@ -15,8 +18,12 @@ load_dotenv()
 from .models.article import UserArticle, UserArticleFlat, UserArticleFlatCollection
 from .models.auth import AuthResponse, TelegramAuthRequest
 from .models.event import Event
+from .models.parse_job import ParseJob
 from .services.article_service import (
+    LIBRARY_FAST_JSON,
+    MAX_PAGE_SIZE,
     get_user_articles_flat,
+    get_user_articles_json,
     get_user_article_flat,
     update_article_progress,
     archive_user_article,
@@ -26,11 +33,22 @@ from .services.article_service import (
     save_article_for_user,
     check_user_article_status
 )
-from .services.auth_service import authenticate_telegram_user
+from .services.auth_service import authenticate_telegram_user, require_admin_token
 from .database import create_indexes, events
 from .services.parser_service import ParserService
 from .services.user_service import get_user_by_telegram_id, get_user_by_id, get_or_create_by_telegram_id
 from .services.analytics_service import analytics
+from .services.library_version import library_versions
+from .services.http_client import http_client
+from .services.extraction_executor import extraction_executor
+from .services.parse_job_service import parse_job_service
+from .services.fetch_scheduler import fetch_scheduler
+from .services.parse_metrics import parse_metrics, start_memory_tracing
+from .services.reextraction_service import reextraction_service
+from .services.bookmark_retry_service import bookmark_retry_service
+from .services.content_codec import content_codec
+from .services.article_cache import article_cache
+from .services.article_content_cache import article_content_cache, negotiate_encoding
 from pydantic import BaseModel
 
 # Configure logging
@@ -91,6 +109,29 @@ app.add_middleware(
 async def startup_event():
     # Initialize database indexes
     await create_indexes()
+    # Compress new article bodies with the active trained dictionary, if any (zstd only)
+    await content_codec.load_active_dictionary()
+    # Trace allocations per parse stage when PARSE_TRACE_MEMORY is set
+    start_memory_tracing()
+    # Open the shared outbound HTTP connection pool
+    await http_client.start()
+    # Spawn warm extraction workers
+    extraction_executor.start()
+    # Start draining the parse job queue
+    parse_job_service.start()
+    # Start retrying bookmarks left by transient fetch failures
+    bookmark_retry_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop parse job workers, bookmark retries and any background re-extraction run
+    await parse_job_service.stop()
+    await bookmark_retry_service.stop()
+    await reextraction_service.shutdown()
+    # Close pooled outbound HTTP connections
+    await http_client.close()
+    # Stop extraction workers
+    extraction_executor.shutdown()
 
 @app.get("/")
 async def root():
@@ -100,27 +141,58 @@ async def root():
     }
 
 @app.get("/users/{user_id}/articles", response_model=UserArticleFlatCollection)
-async def get_articles_for_user(user_id: str, background_tasks: BackgroundTasks):
-    """Get all articles saved by a specific user in a flattened structure (without content)"""
-    articles = await get_user_articles_flat(user_id)
+async def get_articles_for_user(
+    user_id: str,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None
+):
+    """Get articles saved by a specific user in a flattened structure (without content), newest first
     
-    # Get user's telegram_id for analytics
+    Paginated when limit or after is given: pass next_cursor back as after to
+    get the next page. Without them every saved article is returned.
+    
+    The ETag is the user's library version; a request whose If-None-Match
+    names it is answered with 304 without reading the library.
+    """
+    # Read the version before the library, so the ETag is never newer than the body
     user = await get_user_by_id(user_id)
-    if user and user.telegram_id:
+    headers = {"ETag": library_versions.etag(user.library_version), "Cache-Control": "no-cache"}
+    
+    if library_versions.matches(user.library_version, request.headers.get("if-none-match")):
+        articles = Response(status_code=304, headers=headers)
+        count = None
+    elif LIBRARY_FAST_JSON:
+        # Returned as a Response, so it is not validated against the response model again
+        body, count = await get_user_articles_json(user_id, limit=limit, after=after)
+        articles = Response(content=body, media_type="application/json", headers=headers)
+    else:
+        articles = await get_user_articles_flat(user_id, limit=limit, after=after)
+        count = len(articles.articles)
+        response.headers.update(headers)
+    
+    # Track with user's telegram_id for analytics
+    if user.telegram_id:
         background_tasks.add_task(
             analytics.track_event,
             user_id=str(user.telegram_id),
             action="articles_list_viewed",
-            data={"count": len(articles.articles)},
+            data={"count": count} if count is not None else {"not_modified": True},
             source="backend"
         )
     
     return articles
 
 @app.get("/users/{user_id}/articles/{article_id}", response_model=UserArticleFlat)
-async def get_user_article(user_id: str, article_id: str, background_tasks: BackgroundTasks):
-    """Get a specific article saved by the user in a flattened structure (includes content)"""
-    article = await get_user_article_flat(user_id, article_id)
+async def get_user_article(user_id: str, article_id: str, background_tasks: BackgroundTasks, content: bool = True):
+    """Get a specific article saved by the user in a flattened structure
+    
+    Includes the content unless content=false; readers then fetch the body,
+    precompressed, from GET /articles/{article_id}/content.
+    """
+    article = await get_user_article_flat(user_id, article_id, include_content=content)
     
     # If article has no saved_at timestamp, it means it's being viewed through a share link
     is_shared_view = not article.timestamps.saved_at
@@ -141,6 +213,31 @@ async def get_user_article(user_id: str, article_id: str, background_tasks: Back
     
     return article
 
+@app.get("/articles/{article_id}/content")
+async def get_article_content(article_id: str, request: Request):
+    """Article body as markdown, sent as cached br or gzip bytes per Accept-Encoding
+    
+    The body is shared by every reader, so it carries no per-user fields and is
+    never re-encoded per request; clients revalidate with If-None-Match.
+    """
+    try:
+        article_object_id = ObjectId(article_id)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Article not found")
+    entry = await article_content_cache.get(article_object_id)
+    headers = {"ETag": entry.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if entry.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=await article_content_cache.variant(entry, encoding),
+        media_type="text/markdown",
+        headers=headers
+    )
+
 @app.post("/users/{user_id}/articles/{article_id}/save", response_model=UserArticle)
 async def save_article(user_id: str, article_id: str, background_tasks: BackgroundTasks):
     """Save or restore an article for a user"""
@@ -160,9 +257,14 @@ async def save_article(user_id: str, article_id: str, background_tasks: Backgrou
     return article
 
 @app.put("/users/{user_id}/articles/{article_id}/progress", response_model=UserArticle)
-async def update_progress(user_id: str, article_id: str, progress_percentage: float):
-    """Update reading progress for a user's article"""
-    return await update_article_progress(user_id, article_id, progress_percentage)
+async def update_progress(
+    user_id: str,
+    article_id: str,
+    progress_percentage: float,
+    position: Optional[int] = Query(default=None, ge=0)
+):
+    """Update reading progress for a user's article, optionally with the block index being read"""
+    return await update_article_progress(user_id, article_id, progress_percentage, position)
 
 @app.put("/users/{user_id}/articles/{article_id}/archive", response_model=UserArticle)
 async def archive_article(user_id: str, article_id: str):
@@ -210,8 +312,19 @@ class CreateEventRequest(BaseModel):
     source: str = '(not set)'
 
 @app.post("/users/{user_id}/articles/parse", response_model=dict)
-async def parse_article(user_id: str, request: ParseArticleRequest):
-    """Parse article and create user-article link"""
+async def parse_article(user_id: str, request: ParseArticleRequest, job: bool = False):
+    """Parse article and create user-article link
+    
+    With job=true the request is queued and answered with 202 and a parse job
+    that can be polled at /parse-jobs/{job_id}.
+    """
+    if job:
+        parse_job = await parse_job_service.enqueue(request.url, user_id)
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(parse_job),
+            headers={"Location": f"/parse-jobs/{parse_job.id}"}
+        )
     try:
         return await ParserService.handle_parse_request(request.url, user_id)
     except Exception as e:
@@ -220,6 +333,51 @@ async def parse_article(user_id: str, request: ParseArticleRequest):
             detail=f"Failed to parse article: {str(e)}"
         )
 
+@app.get("/parse-jobs/{job_id}", response_model=ParseJob)
+async def get_parse_job(job_id: str):
+    """Get the status and result of a parse job"""
+    return await parse_job_service.get_job(job_id)
+
+@app.get("/admin/fetch-domains", dependencies=[Depends(require_admin_token)])
+async def get_fetch_domains():
+    """Per-domain fetch scheduler state: pacing, Retry-After blocks and circuit breakers"""
+    return {"domains": fetch_scheduler.snapshot()}
+
+@app.get("/admin/parse-metrics", dependencies=[Depends(require_admin_token)])
+async def get_parse_metrics():
+    """Per-stage parse latency histograms (wall and CPU time in ms) and byte totals"""
+    return {"stages": parse_metrics.snapshot()}
+
+@app.get("/admin/caches", dependencies=[Depends(require_admin_token)])
+async def get_caches():
+    """Entries, bytes, hit/miss and eviction counters of the in-process article caches"""
+    return {
+        "articles": article_cache.stats(),
+        "article_content": article_content_cache.stats()
+    }
+
+@app.post("/admin/reextract", status_code=202, dependencies=[Depends(require_admin_token)])
+async def start_reextraction(bookmarks_only: bool = False, refetch: bool = False, limit: Optional[int] = None):
+    """Start or resume re-extracting articles produced by an older extraction pipeline.
+    
+    The run is throttled to leave extraction workers free for live parses. Poll
+    GET /admin/reextract for progress.
+    """
+    reextraction_service.start(bookmarks_only=bookmarks_only, refetch=refetch, limit=limit)
+    return {"running": True, "run_id": reextraction_service.run_id(bookmarks_only)}
+
+@app.get("/admin/reextract", dependencies=[Depends(require_admin_token)])
+async def get_reextraction(bookmarks_only: bool = False):
+    """Checkpoint and counters of the re-extraction run for the current extraction pipeline"""
+    run = await reextraction_service.get_run(bookmarks_only)
+    return {"running": reextraction_service.running, "run": run}
+
+@app.post("/admin/reextract/stop", dependencies=[Depends(require_admin_token)])
+async def stop_reextraction():
+    """Pause the background re-extraction run after its current batch"""
+    reextraction_service.stop()
+    return {"running": reextraction_service.running}
+
 @app.post("/users/{user_id}/articles/{article_id}/share")
 async def create_article_share(user_id: str, article_id: str, background_tasks: BackgroundTasks):
     """Create a prepared inline message for sharing an article via Telegram"""
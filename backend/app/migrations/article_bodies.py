@@ -0,0 +1,72 @@
+"""Move article bodies out of the articles collection into article_bodies.
+
+Safe to run while the app is serving: each batch first inserts the bodies,
+then unsets content on those article documents, and readers fall back to the
+inline content until then. A body already written by a re-extraction is
+never overwritten with the older inline content. Running it again continues
+with the articles that still carry content inline.
+
+Usage (from the backend directory):
+    python -m app.migrations.article_bodies [--batch-size 200] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+
+from ..database import article_bodies, articles
+from ..services.article_body_store import article_body_store
+
+logger = logging.getLogger(__name__)
+
+
+async def move_article_bodies(batch_size: int = 200, dry_run: bool = False) -> dict:
+    """Move inline article content to article_bodies in batches"""
+    stats = {"moved": 0, "bytes": 0}
+    last_id = None
+    while True:
+        query = {"content": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await articles.find(query, {"content": 1}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        stats["moved"] += len(batch)
+        stats["bytes"] += sum(len(article.get("content") or "") for article in batch)
+        if dry_run:
+            continue
+
+        await article_bodies.bulk_write(
+            [
+                article_body_store.update_operation(article["_id"], article.get("content"), replace=False)
+                for article in batch
+            ],
+            ordered=False
+        )
+        await articles.bulk_write(
+            [UpdateOne({"_id": article["_id"]}, {"$unset": {"content": ""}}) for article in batch],
+            ordered=False
+        )
+        logger.info(f"Moved {stats['moved']} article bodies so far (up to {last_id})")
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Move article bodies into the article_bodies collection")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would move without writing")
+    args = parser.parse_args()
+
+    stats = await move_article_bodies(batch_size=args.batch_size, dry_run=args.dry_run)
+    print(
+        f"{'[dry run] ' if args.dry_run else ''}"
+        f"{stats['moved']} article bodies moved ({stats['bytes']} characters)"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,152 @@
+"""Backfill metadata.canonical_url on articles and merge duplicate articles.
+
+Articles whose source URLs canonicalize to the same value are merged into a
+single survivor. Users' links to the duplicates are moved to the survivor (or
+dropped if the user already has it), then the duplicates and their bodies are
+deleted.
+
+Usage (from the backend directory):
+    python -m app.migrations.canonical_urls [--dry-run] [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from pymongo import DeleteOne, UpdateOne
+
+from ..database import article_bodies, articles, user_articles, create_indexes
+from ..services.article_body_store import article_body_store
+from ..services.library_version import library_versions
+from ..services.url_canonicalizer import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+def _survivor_rank(article: dict) -> tuple:
+    """Sort key: keep an already-canonicalized, fully parsed, oldest article"""
+    has_canonical = bool(article.get("metadata", {}).get("canonical_url"))
+    is_article = article.get("type", "article") == "article"
+    created_at = article.get("created_at") or datetime.min
+    return (not has_canonical, not is_article, created_at)
+
+
+async def _flush(collection, operations: list, dry_run: bool) -> int:
+    if not operations:
+        return 0
+    count = len(operations)
+    if not dry_run:
+        await collection.bulk_write(operations, ordered=True)
+    operations.clear()
+    return count
+
+
+async def _flush_merges(link_ops: list, article_ops: list, body_ops: list, dry_run: bool) -> int:
+    """Write pending links before the deletes of the articles they moved off
+
+    Stopping between batches then never leaves a link pointing at a deleted
+    article, and a re-run still finds any duplicates not yet deleted.
+    """
+    links_updated = await _flush(user_articles, link_ops, dry_run)
+    await _flush(articles, article_ops, dry_run)
+    await _flush(article_bodies, body_ops, dry_run)
+    return links_updated
+
+
+async def _merge_user_links(survivor_id, duplicate_ids: list, operations: list) -> None:
+    """Point every user's link to the duplicates at the survivor, keeping one link per user"""
+    links_by_user = defaultdict(list)
+    cursor = user_articles.find(
+        {"article_id": {"$in": [survivor_id] + duplicate_ids}},
+        {"user_id": 1, "article_id": 1, "timestamps": 1}
+    )
+    async for link in cursor:
+        links_by_user[link["user_id"]].append(link)
+
+    for links in links_by_user.values():
+        survivor_links = [link for link in links if link["article_id"] == survivor_id]
+        if survivor_links:
+            keep = survivor_links[0]
+        else:
+            # Prefer a link the user actually saved, then the earliest one
+            keep = min(
+                links,
+                key=lambda link: (
+                    link.get("timestamps", {}).get("saved_at") is None,
+                    link.get("timestamps", {}).get("saved_at") or datetime.max
+                )
+            )
+            operations.append(UpdateOne({"_id": keep["_id"]}, {"$set": {"article_id": survivor_id}}))
+        for link in links:
+            if link["_id"] != keep["_id"]:
+                operations.append(DeleteOne({"_id": link["_id"]}))
+
+
+async def backfill_canonical_urls(batch_size: int = 1000, dry_run: bool = False) -> dict:
+    """Compute canonical URLs for all articles and merge duplicates in bulk"""
+    groups = defaultdict(list)
+    cursor = articles.find(
+        {},
+        {"metadata.source_url": 1, "metadata.canonical_url": 1, "type": 1, "created_at": 1}
+    )
+    async for article in cursor:
+        source_url = article.get("metadata", {}).get("source_url")
+        if not source_url:
+            continue
+        groups[canonicalize_url(source_url)].append(article)
+
+    stats = {"canonical_urls": len(groups), "backfilled": 0, "merged": 0, "links_updated": 0}
+    article_ops, link_ops, body_ops = [], [], []
+
+    for canonical_url, group in groups.items():
+        group.sort(key=_survivor_rank)
+        survivor, duplicates = group[0], group[1:]
+
+        if duplicates:
+            duplicate_ids = [article["_id"] for article in duplicates]
+            logger.info(f"Merging {len(duplicate_ids)} duplicates into {survivor['_id']} ({canonical_url})")
+            await _merge_user_links(survivor["_id"], duplicate_ids, link_ops)
+            # Duplicates are deleted before the survivor takes the unique canonical_url
+            article_ops.extend(DeleteOne({"_id": article_id}) for article_id in duplicate_ids)
+            body_ops.extend(article_body_store.delete_operations(duplicate_ids))
+            stats["merged"] += len(duplicate_ids)
+
+        if survivor.get("metadata", {}).get("canonical_url") != canonical_url:
+            article_ops.append(UpdateOne(
+                {"_id": survivor["_id"]},
+                {"$set": {"metadata.canonical_url": canonical_url}}
+            ))
+            stats["backfilled"] += 1
+
+        if len(link_ops) >= batch_size or len(article_ops) >= batch_size:
+            stats["links_updated"] += await _flush_merges(link_ops, article_ops, body_ops, dry_run)
+
+    stats["links_updated"] += await _flush_merges(link_ops, article_ops, body_ops, dry_run)
+    if stats["merged"] and not dry_run:
+        # Merges rewrote links across libraries, so no cached listing is current
+        await library_versions.bump_all()
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill canonical URLs and merge duplicate articles")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    stats = await backfill_canonical_urls(batch_size=args.batch_size, dry_run=args.dry_run)
+    print(
+        f"{'[dry run] ' if args.dry_run else ''}"
+        f"{stats['canonical_urls']} canonical URLs, {stats['backfilled']} articles backfilled, "
+        f"{stats['merged']} duplicates merged, {stats['links_updated']} user links updated"
+    )
+
+    if not args.dry_run:
+        # Make sure the unique canonical_url index exists now that duplicates are gone
+        await create_indexes()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
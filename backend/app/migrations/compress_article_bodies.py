@@ -0,0 +1,101 @@
+"""Compress existing article bodies with the content codec.
+
+Re-encodes every body in article_bodies that is not yet stored with the
+target encoding (and, for zstd, the active dictionary), in batches. With
+--train a new zstd dictionary is first trained on a random sample of bodies
+and activated, so the running app picks it up on its next start. A body
+rewritten by the app while a batch is being encoded keeps the newer write.
+Run the article_bodies migration first so inline bodies are included.
+
+Usage (from the backend directory):
+    python -m app.migrations.compress_article_bodies [--train] [--samples 2000] [--encoding zstd] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+
+from ..database import article_bodies
+from ..services.article_body_store import article_body_store
+from ..services.content_codec import content_codec
+
+logger = logging.getLogger(__name__)
+
+
+def _stored_bytes(content) -> int:
+    if isinstance(content, str):
+        return len(content.encode("utf-8", errors="surrogatepass"))
+    return len(content or b"")
+
+
+async def train_dictionary(sample_size: int) -> int:
+    """Train and activate a zstd dictionary on a random sample of stored bodies"""
+    docs = await article_bodies.aggregate([{"$sample": {"size": sample_size}}]).to_list(sample_size)
+    samples = [await article_body_store.decode(doc) for doc in docs]
+    samples = [sample for sample in samples if sample]
+    dictionary = await asyncio.to_thread(content_codec.train, samples)
+    return await content_codec.activate(dictionary, len(samples))
+
+
+async def compress_article_bodies(encoding: str, batch_size: int = 200, dry_run: bool = False) -> dict:
+    """Re-encode bodies not yet stored with the target encoding and dictionary"""
+    dictionary_id = content_codec.active_dictionary_id if encoding == "zstd" else None
+    stats = {"scanned": 0, "encoded": 0, "bytes_before": 0, "bytes_after": 0}
+    last_id = None
+    while True:
+        query = {} if last_id is None else {"_id": {"$gt": last_id}}
+        batch = await article_bodies.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        stats["scanned"] += len(batch)
+
+        operations = []
+        for doc in batch:
+            if doc.get("content_encoding") == encoding and doc.get("dictionary_id") == dictionary_id:
+                continue
+            content = await article_body_store.decode(doc)
+            body = await asyncio.to_thread(article_body_store.encode, content, encoding)
+            if body["content_encoding"] == doc.get("content_encoding") and body["dictionary_id"] == doc.get("dictionary_id"):
+                # Too short to compress
+                continue
+            stats["encoded"] += 1
+            stats["bytes_before"] += _stored_bytes(doc["content"])
+            stats["bytes_after"] += _stored_bytes(body["content"])
+            operations.append(UpdateOne({"_id": doc["_id"], "updated_at": doc.get("updated_at")}, {"$set": body}))
+
+        if operations and not dry_run:
+            await article_bodies.bulk_write(operations, ordered=False)
+        logger.info(f"Scanned {stats['scanned']} article bodies, re-encoded {stats['encoded']} (up to {last_id})")
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compress stored article bodies")
+    parser.add_argument("--encoding", choices=["zstd", "zlib"], default="zstd")
+    parser.add_argument("--train", action="store_true", help="Train and activate a new zstd dictionary first")
+    parser.add_argument("--samples", type=int, default=2000, help="Bodies to train the dictionary on")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true", help="Report the size change without writing")
+    args = parser.parse_args()
+
+    content_codec.MODE = args.encoding
+    if content_codec.encoding != args.encoding:
+        parser.error("zstd needs the zstandard package")
+
+    await content_codec.load_active_dictionary()
+    if args.train and args.encoding == "zstd" and not args.dry_run:
+        await train_dictionary(args.samples)
+
+    stats = await compress_article_bodies(args.encoding, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(
+        f"{'[dry run] ' if args.dry_run else ''}"
+        f"{stats['encoded']} of {stats['scanned']} article bodies re-encoded with {args.encoding}: "
+        f"{stats['bytes_before']} -> {stats['bytes_after']} bytes"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
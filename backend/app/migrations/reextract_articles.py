@@ -0,0 +1,55 @@
+"""Re-extract stored articles with the current extraction pipeline.
+
+Visits every article produced by an older EXTRACTOR_VERSION, re-runs the
+pipeline on its archived HTML across the extraction process pool and writes
+the results back in batches. Bookmarks are upgraded to articles when their
+page can now be extracted. Progress is checkpointed, so an interrupted run
+continues where it stopped when started again.
+
+Usage (from the backend directory):
+    python -m app.migrations.reextract_articles [--bookmarks-only] [--refetch] [--limit N] [--batch-size 100]
+"""
+import argparse
+import asyncio
+import logging
+
+from ..services.extraction_executor import extraction_executor
+from ..services.http_client import http_client
+from ..services.reextraction_service import reextraction_service
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-extract articles produced by an older extraction pipeline")
+    parser.add_argument("--bookmarks-only", action="store_true", help="Only try to upgrade bookmarks to articles")
+    parser.add_argument("--refetch", action="store_true", help="Fetch pages that have no archived snapshot")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many articles (resumable)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument(
+        "--concurrency", type=int, default=None,
+        help="Extractions in flight at once (defaults to the number of extraction workers)"
+    )
+    args = parser.parse_args()
+
+    extraction_executor.start()
+    await http_client.start()
+    try:
+        run = await reextraction_service.run(
+            bookmarks_only=args.bookmarks_only,
+            refetch=args.refetch,
+            limit=args.limit,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency or max(1, extraction_executor.WORKERS)
+        )
+    finally:
+        await http_client.close()
+        extraction_executor.shutdown()
+
+    print(
+        f"Run {run.id} {run.status}: {run.processed} articles visited, {run.updated} updated, "
+        f"{run.upgraded} bookmarks upgraded, {run.skipped} skipped, {run.failed} failed"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
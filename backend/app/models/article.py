@@ -7,11 +7,31 @@ from bson import ObjectId
 
 PyObjectId = Annotated[str, BeforeValidator(str)]
 
+class ContentBlocks(BaseModel):
+    """Paragraph/heading table of an article body, as parallel arrays with one entry per block"""
+    # Start of each block in the markdown, in UTF-16 code units (JavaScript string
+    # indexes), which differ from Python str indexes after any astral-plane character
+    offsets: List[int] = Field(default_factory=list)
+    # Words before each block, to resolve reading positions and time left
+    words_before: List[int] = Field(default_factory=list)
+    # One character per block: "p" paragraph, "1"-"6" heading level, "l" list,
+    # "q" quote, "c" code, "i" image, "t" table, "r" rule
+    kinds: str = ""
+
+class ContentStats(BaseModel):
+    """Figures derived from an article body when it is extracted"""
+    word_count: int = 0
+    char_count: int = 0
+    plain_text_length: int = 0
+    blocks: Optional[ContentBlocks] = None
+
 class ArticleMetadata(BaseModel):
     source_url: str
+    canonical_url: Optional[str] = None
     author: Optional[str] = None
     publish_date: Optional[datetime] = None
     reading_time: Optional[int] = None
+    stats: Optional[ContentStats] = None
 
 class Article(BaseModel):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
@@ -21,6 +41,10 @@ class Article(BaseModel):
     metadata: ArticleMetadata = Field(...)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     type: Literal["article", "bookmark"] = "article"
+    # Content hash of the raw HTML in the snapshot store
+    snapshot_hash: Optional[str] = None
+    # Version of the extraction pipeline that produced the content
+    extractor_version: Optional[str] = None
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
@@ -76,4 +100,6 @@ class UserArticleFlat(BaseModel):
         return status
 
 class UserArticleFlatCollection(BaseModel):
-    articles: List[UserArticleFlat]
\ No newline at end of file
+    articles: List[UserArticleFlat]
+    # Cursor of the next page of a paginated listing, None on the last page
+    next_cursor: Optional[str] = None
\ No newline at end of file
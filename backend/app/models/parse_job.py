@@ -0,0 +1,30 @@
+from datetime import datetime
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from typing import Annotated, Optional, Dict, Any, Literal
+
+PyObjectId = Annotated[str, BeforeValidator(str)]
+
+ParseJobStatus = Literal["queued", "running", "done", "failed"]
+
+class ParseJob(BaseModel):
+    """
+    Model representing an asynchronous article parse job stored in the parse_jobs collection
+    """
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    url: str = Field(...)
+    user_id: PyObjectId = Field(...)
+    status: ParseJobStatus = "queued"
+    attempts: int = 0
+    max_attempts: int = 3
+    lease_expires_at: Optional[datetime] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    # Per-stage wall/CPU time and bytes of the last attempt
+    timings: Optional[Dict[str, Any]] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
@@ -0,0 +1,33 @@
+from datetime import datetime
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from typing import Annotated, Optional, Literal
+
+PyObjectId = Annotated[str, BeforeValidator(str)]
+
+ReextractionStatus = Literal["running", "paused", "done", "failed"]
+
+class ReextractionRun(BaseModel):
+    """
+    Checkpoint of a bulk re-extraction run stored in the reextraction_runs collection.
+    The ID is the extractor version plus the run scope, so each pipeline change gets one resumable run.
+    """
+    id: str = Field(alias="_id")
+    extractor_version: str
+    bookmarks_only: bool = False
+    refetch: bool = False
+    status: ReextractionStatus = "running"
+    # Articles are visited in _id order; everything up to last_id has been handled
+    last_id: Optional[PyObjectId] = None
+    processed: int = 0
+    updated: int = 0
+    upgraded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    error: Optional[str] = None
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
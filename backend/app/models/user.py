@@ -15,6 +15,7 @@ class User(BaseModel):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
     telegram_id: str = Field(...)  # Using string to handle large telegram IDs safely
     metadata: UserMetadata = Field(default_factory=UserMetadata)
+    library_version: int = 0  # Bumped on every change to the library listing, see LibraryVersions
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+
+from bson import ObjectId
+from pymongo import DeleteOne, UpdateOne
+
+from ..database import article_bodies, articles
+from .content_codec import content_codec
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleBodyStore:
+    """Markdown bodies of articles, kept out of the articles collection.
+
+    Article documents hold only the title, description and metadata, so
+    listing, sharing and lookups never page body bytes through the cache.
+    A body is stored under its article's _id, compressed by the content codec
+    when that is enabled (content_encoding and dictionary_id record how).
+    Articles stored before the split still carry their content inline; reads
+    fall back to it until the article_bodies migration has moved them.
+    """
+
+    @staticmethod
+    def encode(content: Optional[str], encoding: Optional[str] = None) -> dict:
+        """Body document fields for an article's markdown"""
+        content = content or ""
+        data, content_encoding, dictionary_id = content_codec.encode(content, encoding)
+        return {
+            "content": data,
+            "content_encoding": content_encoding,
+            "dictionary_id": dictionary_id,
+            "size": len(content),
+            "updated_at": datetime.utcnow()
+        }
+
+    @staticmethod
+    async def decode(doc: dict) -> Optional[str]:
+        """The markdown of a stored body document"""
+        if not doc.get("content_encoding"):
+            return doc.get("content")
+        await content_codec.ensure_dictionary(doc.get("dictionary_id"))
+        return await asyncio.to_thread(
+            content_codec.decode, doc["content"], doc["content_encoding"], doc.get("dictionary_id")
+        )
+
+    def update_operation(self, article_id: ObjectId, content: Optional[str], replace: bool = True) -> UpdateOne:
+        """Upsert of an article's body, for callers batching writes with bulk_write
+
+        With replace=False an existing body is left as it is.
+        """
+        operator = "$set" if replace else "$setOnInsert"
+        return UpdateOne({"_id": article_id}, {operator: self.encode(content)}, upsert=True)
+
+    async def save(self, article_id: ObjectId, content: Optional[str]) -> None:
+        """Store (or replace) an article's body"""
+        body = await asyncio.to_thread(self.encode, content) if content_codec.encoding else self.encode(content)
+        await article_bodies.update_one({"_id": article_id}, {"$set": body}, upsert=True)
+
+    async def load(self, article_id: ObjectId) -> Optional[str]:
+        """Return an article's body, or None if it has none"""
+        doc = await article_bodies.find_one({"_id": article_id})
+        if doc is None:
+            # Not migrated yet: the body is still inline in the article document
+            legacy = await articles.find_one({"_id": article_id}, {"content": 1})
+            return legacy.get("content") if legacy else None
+        return await self.decode(doc)
+
+    async def delete(self, article_id: ObjectId) -> None:
+        await article_bodies.delete_one({"_id": article_id})
+
+    @staticmethod
+    def delete_operations(article_ids: Iterable[ObjectId]) -> list[DeleteOne]:
+        return [DeleteOne({"_id": article_id}) for article_id in article_ids]
+
+
+# Create a global instance
+article_body_store = ArticleBodyStore()
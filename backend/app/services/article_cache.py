@@ -0,0 +1,57 @@
+import logging
+import os
+from typing import Optional
+
+import bson
+from bson import ObjectId
+
+from ..database import articles
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def _document_size(doc: dict) -> int:
+    return len(bson.encode(doc))
+
+
+class ArticleCache:
+    """Article documents by _id, without inline content, shared by every reader.
+
+    An article's title and metadata only change when it is re-extracted or a
+    bookmark is upgraded; those writers call invalidate. Entries also expire
+    after ARTICLE_CACHE_TTL seconds, which bounds how long other processes
+    (migrations, other workers) can serve a stale document. The cache is
+    bounded by entry count and by the BSON size of the documents.
+
+    Cached documents are shared: callers must not modify them.
+    """
+    MAX_ENTRIES = int(os.getenv("ARTICLE_CACHE_SIZE", 10000))
+    MAX_BYTES = int(os.getenv("ARTICLE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    TTL = int(os.getenv("ARTICLE_CACHE_TTL", 300))
+
+    def __init__(self):
+        self._entries = LRUCache(self.MAX_ENTRIES, max_bytes=self.MAX_BYTES, ttl=self.TTL, sizeof=_document_size)
+
+    async def get(self, article_id: ObjectId) -> Optional[dict]:
+        """An article document (projected without content), or None if there is none"""
+        doc = self._entries.get(article_id)
+        if doc is None:
+            doc = await articles.find_one({"_id": article_id}, {"content": 0})
+            if doc is not None:
+                self._entries.put(article_id, doc)
+        return doc
+
+    def invalidate(self, article_id: ObjectId) -> None:
+        """Drop an article after its document has been rewritten"""
+        self._entries.pop(article_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+# Create a global instance
+article_cache = ArticleCache()
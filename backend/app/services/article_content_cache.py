@@ -0,0 +1,162 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - br responses are optional
+    brotli = None
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from .article_body_store import article_body_store
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Response encodings in order of preference (smallest first)
+PREFERRED_ENCODINGS = ("br", "gzip", "identity")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Pick the response encoding for an Accept-Encoding header
+
+    Codings with q=0 are refused; among the accepted ones the smallest wins.
+    identity is acceptable unless refused explicitly or through "*;q=0".
+    """
+    qualities = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    wildcard = qualities.get("*")
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        quality = qualities.get(encoding, wildcard)
+        if encoding == "identity" and quality is None:
+            quality = 1.0
+        if quality:
+            return encoding
+    return "identity"
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Whether an If-None-Match header names an ETag (weak comparison)"""
+    tags = {tag.strip().removeprefix("W/") for tag in (if_none_match or "").split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+@dataclass
+class ArticleContent:
+    """An article body as response bytes, with each encoding compressed at most once"""
+    article_id: ObjectId
+    etag: str
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names this body"""
+        return etag_matches(self.etag, if_none_match)
+
+    def size(self) -> int:
+        return sum(len(data) for data in self.variants.values())
+
+
+class ArticleContentCache:
+    """Article bodies ready to be sent, precompressed per Content-Encoding.
+
+    A body is the same for every reader, so it is loaded and decoded once,
+    and gzip and br variants are compressed the first time a client asks for
+    them; later opens write the cached bytes straight to the response.
+    Entries expire after ARTICLE_CONTENT_CACHE_TTL seconds so bodies rewritten
+    by another process (re-extraction, bookmark upgrades) are picked up;
+    writers in this process invalidate the entry right away. The cache is
+    bounded by entry count and by the total size of every cached variant.
+    """
+    MAX_ENTRIES = int(os.getenv("ARTICLE_CONTENT_CACHE_SIZE", 256))
+    MAX_BYTES = int(os.getenv("ARTICLE_CONTENT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    TTL = int(os.getenv("ARTICLE_CONTENT_CACHE_TTL", 600))
+    GZIP_LEVEL = 9
+    # Moderate: the first reader of an article waits for its br variant
+    BROTLI_QUALITY = int(os.getenv("ARTICLE_CONTENT_BROTLI_QUALITY", 5))
+
+    def __init__(self):
+        self._entries = LRUCache(self.MAX_ENTRIES, max_bytes=self.MAX_BYTES, ttl=self.TTL, sizeof=ArticleContent.size)
+
+    async def _load(self, article_id: ObjectId) -> Optional[ArticleContent]:
+        entry = self._entries.get(article_id)
+        if entry is not None:
+            return entry
+        content = await article_body_store.load(article_id)
+        if content is None:
+            return None
+        body = content.encode("utf-8", errors="surrogatepass")
+        entry = ArticleContent(
+            article_id=article_id,
+            # Weak: the gzip and br variants are the same representation
+            etag=f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"',
+            variants={"identity": body}
+        )
+        self._entries.put(article_id, entry)
+        return entry
+
+    async def get(self, article_id: ObjectId) -> ArticleContent:
+        """The cached body of an article, loading it on a miss"""
+        entry = await self._load(article_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        return entry
+
+    async def load_text(self, article_id: ObjectId) -> Optional[str]:
+        """The cached body of an article as text, or None if it has none"""
+        entry = await self._load(article_id)
+        if entry is None:
+            return None
+        return entry.variants["identity"].decode("utf-8", errors="surrogatepass")
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.BROTLI_QUALITY)
+        if encoding == "gzip":
+            return gzip.compress(body, compresslevel=self.GZIP_LEVEL, mtime=0)
+        raise ValueError(f"Unsupported response encoding: {encoding}")
+
+    async def variant(self, entry: ArticleContent, encoding: str) -> bytes:
+        """The entry's body in an encoding, compressing it on first use"""
+        data = entry.variants.get(encoding)
+        if data is None:
+            data = await asyncio.to_thread(self._compress, entry.variants["identity"], encoding)
+            entry.variants[encoding] = data
+            # The entry grew; drop it or older entries if that breaks the byte budget
+            self._entries.resize(entry.article_id)
+        return data
+
+    def invalidate(self, article_id: ObjectId) -> None:
+        """Drop an article's cached body after it has been rewritten"""
+        self._entries.pop(article_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+# Create a global instance
+article_content_cache = ArticleContentCache()
@@ -2,71 +2,267 @@ from fastapi import HTTPException
 from bson import ObjectId
 from ..models.article import Article, FlattenedTimestamps, UserArticle, UserArticleFlat, UserArticleFlatCollection
 from ..database import articles, user_articles
+from .article_cache import article_cache
+from .article_content_cache import article_content_cache
+from .library_version import library_versions
 from datetime import datetime
+from typing import Optional
 import aiohttp
+import asyncio
+import base64
+import json
 import os
 import logging
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the listing falls back to the response models
+    orjson = None
 
-async def get_user_articles_flat(user_id: str) -> UserArticleFlatCollection:
-    """Get all articles saved by a user in a flattened structure (without content)"""
-    # Get user's article references
-    cursor = user_articles.find({
+
+# Page size of the library listing when a cursor is given without a limit, and the largest page served
+DEFAULT_PAGE_SIZE = int(os.getenv("LIBRARY_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = 200
+
+# How the library listing joins saves with articles: "find" (two queries joined
+# here) or "aggregate" (one $lookup pipeline, MongoDB 5.0+)
+LIBRARY_QUERY = os.getenv("LIBRARY_QUERY", "find")
+
+# Render the library listing with orjson instead of validating it through the response models
+LIBRARY_FAST_JSON = orjson is not None and os.getenv("LIBRARY_FAST_JSON", "true").lower() == "true"
+
+# Newest saves first; _id breaks ties between saves in the same millisecond
+LIBRARY_SORT = [("timestamps.saved_at", -1), ("_id", -1)]
+
+# Article fields the listing leaves out: the body (only articles stored before
+# the body split still have it inline) and the block table, which only the reader needs
+LIBRARY_ARTICLE_PROJECTION = {"content": 0, "metadata.stats.blocks": 0}
+
+
+def _encode_cursor(saved_at: datetime, user_article_id: ObjectId) -> str:
+    """Opaque cursor pointing after a user_articles row in library order"""
+    position = json.dumps({"saved_at": saved_at.isoformat(), "id": str(user_article_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(position["saved_at"]), ObjectId(position["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _library_rows_find(query: dict, limit: Optional[int]) -> list[dict]:
+    """Flat library rows from a user_articles query and an $in lookup of their articles"""
+    cursor = user_articles.find(query).sort(LIBRARY_SORT)
+    if limit is not None:
+        cursor = cursor.limit(limit)
+    saves = await cursor.to_list(length=None)
+    if not saves:
+        return []
+    
+    articles_cursor = articles.find({"_id": {"$in": [ua["article_id"] for ua in saves]}}, LIBRARY_ARTICLE_PROJECTION)
+    article_map = {doc["_id"]: doc async for doc in articles_cursor}
+    
+    rows = []
+    for ua in saves:
+        timestamps = ua.get("timestamps", {})
+        row = {
+            "user_article_id": ua["_id"],
+            "progress": ua.get("progress", {}),
+            "timestamps": {
+                "saved_at": timestamps.get("saved_at"),
+                "archived_at": timestamps.get("archived_at"),
+                "deleted_at": timestamps.get("deleted_at")
+            }
+        }
+        art = article_map.get(ua["article_id"])
+        if art:
+            row.update(
+                _id=art["_id"],
+                title=art.get("title"),
+                short_description=art.get("short_description"),
+                metadata=art["metadata"],
+                type=art.get("type", "article")
+            )
+            row["timestamps"]["created_at"] = art["created_at"]
+        rows.append(row)
+    return rows
+
+
+def _library_pipeline(query: dict, limit: Optional[int]) -> list[dict]:
+    """$match -> $sort -> $limit -> $lookup pipeline producing the same rows as _library_rows_find"""
+    pipeline = [
+        {"$match": query},
+        {"$sort": dict(LIBRARY_SORT)}
+    ]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    pipeline += [
+        {"$lookup": {
+            "from": articles.name,
+            "localField": "article_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": LIBRARY_ARTICLE_PROJECTION}],
+            "as": "article"
+        }},
+        # Keep saves whose article is gone, so the page size and cursor match the find path
+        {"$unwind": {"path": "$article", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "_id": "$article._id",
+            "user_article_id": "$_id",
+            "title": "$article.title",
+            "short_description": "$article.short_description",
+            "metadata": "$article.metadata",
+            "type": {"$ifNull": ["$article.type", "article"]},
+            "progress": {"$ifNull": ["$progress", {}]},
+            "timestamps": {
+                "saved_at": "$timestamps.saved_at",
+                "archived_at": "$timestamps.archived_at",
+                "deleted_at": "$timestamps.deleted_at",
+                "created_at": "$article.created_at"
+            }
+        }}
+    ]
+    return pipeline
+
+
+async def _library_rows_aggregate(query: dict, limit: Optional[int]) -> list[dict]:
+    """Flat library rows from one aggregation round trip"""
+    return await user_articles.aggregate(_library_pipeline(query, limit)).to_list(length=None)
+
+
+async def _library_page(user_id: str, limit: Optional[int], after: Optional[str]) -> tuple[list[dict], Optional[str]]:
+    """Flat rows of one page of a user's library (every save without limit or after) and the next cursor"""
+    query = {
         "user_id": ObjectId(user_id), 
         "timestamps.deleted_at": None,
         "timestamps.saved_at": {"$ne": None}  # Only return saved articles
-    })
-    user_article_list = [UserArticle(**doc) async for doc in cursor]
-    
-    if not user_article_list:
-        return UserArticleFlatCollection(articles=[])
-    
-    # Extract article IDs from user_article references
-    article_ids = [ObjectId(ua.article_id) for ua in user_article_list]
+    }
+    if after is not None:
+        saved_at, user_article_id = _decode_cursor(after)
+        query["$or"] = [
+            {"timestamps.saved_at": {"$lt": saved_at}},
+            {"timestamps.saved_at": saved_at, "_id": {"$lt": user_article_id}}
+        ]
+        limit = limit or DEFAULT_PAGE_SIZE
     
-    # Fetch actual articles without content field
-    articles_cursor = articles.find({"_id": {"$in": article_ids}}, {"content": 0})
-    article_list = [Article(**doc) async for doc in articles_cursor]
+    # Saves in library order, served by the (user_id, saved_at, _id) index.
+    # One extra row tells whether there is a next page
+    fetch_rows = _library_rows_aggregate if LIBRARY_QUERY == "aggregate" else _library_rows_find
+    rows = await fetch_rows(query, None if limit is None else limit + 1)
     
-    # Map articles by their id as string
-    article_map = {str(article.id): article for article in article_list}
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1]["timestamps"]["saved_at"], rows[-1]["user_article_id"])
     
-    flat_articles = []
-    for ua in user_article_list:
-        art = article_map.get(str(ua.article_id))
-        if art:
-            flat_articles.append(
-                UserArticleFlat(
-                    **{
-                        "_id": art.id,
-                        "title": art.title,
-                        "short_description": art.short_description,
-                        "metadata": art.metadata,
-                        "progress": ua.progress,
-                        "timestamps": {
-                            "saved_at": ua.timestamps.saved_at,
-                            "archived_at": ua.timestamps.archived_at,
-                            "deleted_at": ua.timestamps.deleted_at,
-                            "created_at": art.created_at
-                        },
-                        "type": getattr(art, "type", "article")
-                    }
-                )
-            )
+    # Saves whose article no longer exists have no _id
+    return [row for row in rows if "_id" in row], next_cursor
+
+
+async def get_user_articles_flat(
+    user_id: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None
+) -> UserArticleFlatCollection:
+    """Get articles saved by a user in a flattened structure (without content), newest first
     
-    # Sort articles by saved_at timestamp (newest first)
-    flat_articles.sort(key=lambda x: x.timestamps.saved_at or datetime.min, reverse=True)
+    With a limit (or an after cursor) one page is returned, with next_cursor set
+    when there are more; pass it back as after for the next page. Without
+    either, every saved article is returned (compatibility mode).
+    """
+    rows, next_cursor = await _library_page(user_id, limit, after)
+    return UserArticleFlatCollection(articles=[UserArticleFlat(**row) for row in rows], next_cursor=next_cursor)
+
+
+def _status(timestamps: dict) -> list[str]:
+    """UserArticleFlat.status of a row"""
+    status = []
+    if timestamps.get("saved_at"):
+        status.append("saved")
+    if timestamps.get("deleted_at"):
+        status.append("deleted")
+    return status or ["new"]
+
+
+def _flat_row_json(row: dict) -> dict:
+    """A library row in the exact shape UserArticleFlat serializes to, without validating it"""
+    metadata = row["metadata"]
+    stats = metadata.get("stats")
+    progress = row.get("progress") or {}
+    timestamps = row["timestamps"]
+    return {
+        "_id": str(row["_id"]),
+        "title": row.get("title"),
+        "content": None,
+        "short_description": row.get("short_description"),
+        "metadata": {
+            "source_url": metadata["source_url"],
+            "canonical_url": metadata.get("canonical_url"),
+            "author": metadata.get("author"),
+            "publish_date": metadata.get("publish_date"),
+            "reading_time": metadata.get("reading_time"),
+            "stats": None if stats is None else {
+                "word_count": stats.get("word_count", 0),
+                "char_count": stats.get("char_count", 0),
+                "plain_text_length": stats.get("plain_text_length", 0),
+                # Projected out of the listing
+                "blocks": None
+            }
+        },
+        "progress": {
+            "percentage": float(progress.get("percentage", 0)),
+            "last_position": progress.get("last_position", 0),
+            "updated_at": progress.get("updated_at")
+        },
+        "timestamps": {
+            "saved_at": timestamps.get("saved_at"),
+            "archived_at": timestamps.get("archived_at"),
+            "deleted_at": timestamps.get("deleted_at"),
+            "created_at": timestamps["created_at"]
+        },
+        "type": row.get("type") or "article",
+        "status": _status(timestamps)
+    }
+
+
+async def get_user_articles_json(
+    user_id: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None
+) -> tuple[bytes, int]:
+    """get_user_articles_flat rendered straight to JSON with orjson, skipping model validation
     
-    return UserArticleFlatCollection(articles=flat_articles)
+    The rows come from our own queries, so they are trusted to match the
+    UserArticleFlatCollection schema. Returns the JSON and the number of articles.
+    """
+    rows, next_cursor = await _library_page(user_id, limit, after)
+    body = orjson.dumps(
+        {"articles": [_flat_row_json(row) for row in rows], "next_cursor": next_cursor},
+        default=str
+    )
+    return body, len(rows)
 
-async def get_user_article_flat(user_id: str, article_id: str) -> UserArticleFlat:
-    """Get a specific article saved by the user in a flattened structure (always includes content)"""
-    # Fetch the article first
-    art = await articles.find_one({"_id": ObjectId(article_id)})
+async def get_user_article_flat(user_id: str, article_id: str, include_content: bool = True) -> UserArticleFlat:
+    """Get a specific article saved by the user in a flattened structure
+    
+    The content is included unless include_content is False, for clients that
+    fetch the body from GET /articles/{article_id}/content instead.
+    """
+    # Fetch the article and its body, which is stored separately (both are shared by every reader and cached)
+    if include_content:
+        art, content = await asyncio.gather(
+            article_cache.get(ObjectId(article_id)),
+            article_content_cache.load_text(ObjectId(article_id))
+        )
+    else:
+        art, content = await article_cache.get(ObjectId(article_id)), None
     if not art:
         raise HTTPException(status_code=404, detail="Article not found")
     
-    article = Article(**art)
+    article = Article(**art, content=content)
     
     # Fetch the user_article record (including deleted ones)
     ua = await user_articles.find_one({
@@ -127,27 +323,38 @@ async def get_user_article_flat(user_id: str, article_id: str) -> UserArticleFla
             type=getattr(article, "type", "article")
         )
 
-async def update_article_progress(user_id: str, article_id: str, progress_percentage: float) -> UserArticle:
-    """Update reading progress for a user's article"""
+async def update_article_progress(
+    user_id: str,
+    article_id: str,
+    progress_percentage: float,
+    position: Optional[int] = None
+) -> UserArticle:
+    """Update reading progress for a user's article
+    
+    position is the index of the block being read in the article's block
+    table (metadata.stats.blocks), stored as progress.last_position.
+    """
     try:
         # Update progress
+        update = {
+            "progress.percentage": progress_percentage,
+            "progress.updated_at": datetime.utcnow()
+        }
+        if position is not None:
+            update["progress.last_position"] = position
         result = await user_articles.find_one_and_update(
             {
                 "user_id": ObjectId(user_id),
                 "article_id": ObjectId(article_id)
             },
-            {
-                "$set": {
-                    "progress.percentage": progress_percentage,
-                    "progress.updated_at": datetime.utcnow()
-                }
-            },
+            {"$set": update},
             return_document=True
         )
         
         if not result:
             raise HTTPException(status_code=404, detail="User article not found")
-            
+        
+        await library_versions.bump(user_id)
         return UserArticle(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to update progress")
@@ -170,7 +377,8 @@ async def archive_user_article(user_id: str, article_id: str) -> UserArticle:
         
         if not result:
             raise HTTPException(status_code=404, detail="User article not found")
-            
+        
+        await library_versions.bump(user_id)
         return UserArticle(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to archive article")
@@ -194,7 +402,8 @@ async def unarchive_user_article(user_id: str, article_id: str) -> UserArticle:
         
         if not result:
             raise HTTPException(status_code=404, detail="User article not found")
-            
+        
+        await library_versions.bump(user_id)
         return UserArticle(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to unarchive article")
@@ -218,14 +427,15 @@ async def delete_user_article(user_id: str, article_id: str) -> UserArticle:
         
         if not result:
             raise HTTPException(status_code=404, detail="User article not found")
-            
+        
+        await library_versions.bump(user_id)
         return UserArticle(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to delete article")
 
 async def get_article(article_id: str) -> Article:
-    """Get article by ID without user context"""
-    article = await articles.find_one({"_id": ObjectId(article_id)})
+    """Get article by ID without user context (without content)"""
+    article = await article_cache.get(ObjectId(article_id))
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
     return Article(**article)
@@ -345,6 +555,7 @@ async def save_article_for_user(user_id: str, article_id: str) -> UserArticle:
             {"$set": update_fields},
             return_document=True
         )
+        await library_versions.bump(user_id)
         return UserArticle(**result)
     
     # Create new user article
@@ -364,6 +575,7 @@ async def save_article_for_user(user_id: str, article_id: str) -> UserArticle:
     
     result = await user_articles.insert_one(user_article)
     user_article["_id"] = result.inserted_id
+    await library_versions.bump(user_id)
     
     return UserArticle(**user_article)
 
@@ -5,11 +5,12 @@ import logging
 from typing import Optional
 from urllib.parse import unquote
 import json
-from fastapi import HTTPException
+from fastapi import Header, HTTPException
 from ..models.user import User
 from .user_service import get_or_create_by_telegram_id
 
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
 logger = logging.getLogger(__name__)
 
 def validate_init_data(init_data: str, bot_token: str) -> bool:
@@ -71,4 +72,14 @@ async def authenticate_telegram_user(
         return user
     except Exception as e:
         logger.error(f"Failed to get or create user: {e}")
-        raise HTTPException(status_code=500, detail="Failed to process user authentication") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to process user authentication") 
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """
+    FastAPI dependency guarding admin endpoints with the X-Admin-Token header
+    """
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        logger.warning("Rejected admin request with a missing or invalid token")
+        raise HTTPException(status_code=403, detail="Invalid admin token")
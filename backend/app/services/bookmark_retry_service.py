@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from ..database import articles
+from ..services.fetch_scheduler import fetch_scheduler
+from ..services.parse_metrics import parse_trace
+from ..services.parser_service import BOOKMARK_PROJECTION, ParserService
+from ..services.url_canonicalizer import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class BookmarkRetryService:
+    """Background retries of bookmarks left by transient parse failures.
+
+    A failed parse stores a bookmark with a retry entry (attempt count and the
+    time of the next attempt, see ParserService._retry_state). This scheduler
+    polls for bookmarks whose backoff has elapsed and parses them again one at
+    a time under the URL's parse lease, upgrading them to articles in place.
+    Bookmarks on a domain that is still backing off are left for a later poll
+    without using up an attempt.
+    """
+    # How often to look for bookmarks that are due
+    POLL_INTERVAL = float(os.getenv("BOOKMARK_RETRY_POLL_INTERVAL", 60))
+
+    # Bookmarks retried per poll
+    BATCH_SIZE = int(os.getenv("BOOKMARK_RETRY_BATCH_SIZE", 20))
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def due_bookmarks(self, limit: Optional[int] = None) -> list[dict]:
+        """Bookmarks whose next retry is due, longest overdue first"""
+        limit = limit or self.BATCH_SIZE
+        cursor = articles.find(
+            {"type": "bookmark", "retry.next_attempt_at": {"$lte": datetime.utcnow()}},
+            BOOKMARK_PROJECTION
+        )
+        return await cursor.sort("retry.next_attempt_at", 1).limit(limit).to_list(limit)
+
+    async def retry(self, bookmark: dict) -> str:
+        """Retry one bookmark
+
+        Returns:
+            "upgraded", "failed", "deferred" (domain backing off), "busy"
+            (lease held elsewhere) or "skipped" (no longer due)
+        """
+        url = bookmark["metadata"]["source_url"]
+        canonical_url = bookmark["metadata"].get("canonical_url") or canonicalize_url(url)
+        if fetch_scheduler.backoff_remaining(url) > 0:
+            return "deferred"
+
+        token = await ParserService._parse_lease.try_acquire(canonical_url)
+        if not token:
+            return "busy"
+        try:
+            # A request for the same URL may have retried it while we were polling
+            current = await articles.find_one({"_id": bookmark["_id"]}, BOOKMARK_PROJECTION)
+            if not current or not ParserService._retry_due(current):
+                return "skipped"
+            with parse_trace(url):
+                _, article_type = await ParserService._retry_bookmark(current, url, canonical_url)
+            return "upgraded" if article_type == "article" else "failed"
+        finally:
+            await ParserService._parse_lease.release(canonical_url, token)
+
+    async def run_once(self) -> dict[str, int]:
+        """Retry the bookmarks that are due now, returning a count per outcome"""
+        counts: dict[str, int] = {}
+        for bookmark in await self.due_bookmarks():
+            outcome = await self.retry(bookmark)
+            counts[outcome] = counts.get(outcome, 0) + 1
+        if counts:
+            logger.info(f"Bookmark retries: {counts}")
+        return counts
+
+    async def _loop(self) -> None:
+        logger.info("Bookmark retry scheduler started")
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Bookmark retry scheduler error: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+    def start(self) -> None:
+        """Start the scheduler (called from the application startup hook)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the scheduler; a retry interrupted mid-parse is picked up again once its lease expires"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Create a global instance
+bookmark_retry_service = BookmarkRetryService()
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import zlib
+from datetime import datetime
+from typing import Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstd support is optional
+    zstandard = None
+
+from ..database import content_dictionaries
+
+logger = logging.getLogger(__name__)
+
+# Bodies shorter than this are stored as text
+MIN_COMPRESS_CHARS = 256
+
+
+class ContentCodec:
+    """Compression of article bodies at rest.
+
+    Opt-in through ARTICLE_BODY_COMPRESSION ("zstd", "zlib" or "false").
+    zstd uses the active trained dictionary when there is one: long reads
+    share markdown structure and vocabulary, which a dictionary captures even
+    for bodies too short to compress well on their own. Without zstandard
+    installed, zstd falls back to zlib. Every encoded body records its
+    content_encoding and, for zstd, the id of its dictionary, so bodies
+    written with an older dictionary (or codec) stay readable.
+    """
+    MODE = os.getenv("ARTICLE_BODY_COMPRESSION", "false").lower()
+    ZSTD_LEVEL = int(os.getenv("ARTICLE_BODY_ZSTD_LEVEL", 9))
+    ZLIB_LEVEL = 6
+
+    # Size of a trained dictionary in bytes
+    DICTIONARY_SIZE = 64 * 1024
+
+    def __init__(self):
+        self._dictionaries: dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self._active_id: Optional[int] = None
+
+    @property
+    def encoding(self) -> Optional[str]:
+        """Encoding new bodies are written with, or None to store text"""
+        if self.MODE in ("zstd", "true") and zstandard is not None:
+            return "zstd"
+        if self.MODE in ("zstd", "true", "zlib"):
+            return "zlib"
+        return None
+
+    @property
+    def active_dictionary_id(self) -> Optional[int]:
+        return self._active_id
+
+    def _add_dictionary(self, dictionary_id: int, data: bytes) -> None:
+        dictionary = zstandard.ZstdCompressionDict(data)
+        dictionary.precompute_compress(level=self.ZSTD_LEVEL)
+        self._dictionaries[dictionary_id] = dictionary
+
+    def use_dictionary(self, dictionary: "zstandard.ZstdCompressionDict") -> int:
+        """Compress new bodies with a dictionary in this process only (see activate to store it)"""
+        self._add_dictionary(dictionary.dict_id(), dictionary.as_bytes())
+        self._active_id = dictionary.dict_id()
+        return self._active_id
+
+    def encode(self, content: str, encoding: Optional[str] = None) -> tuple[Union[str, bytes], Optional[str], Optional[int]]:
+        """Encode a body with the configured (or given) encoding
+
+        Returns:
+            Tuple of (stored content, content_encoding, dictionary_id)
+        """
+        encoding = encoding if encoding is not None else self.encoding
+        if encoding is None or len(content) < MIN_COMPRESS_CHARS:
+            return content, None, None
+        data = content.encode("utf-8", errors="surrogatepass")
+        if encoding == "zlib":
+            return zlib.compress(data, self.ZLIB_LEVEL), "zlib", None
+        dictionary = self._dictionaries.get(self._active_id) if self._active_id is not None else None
+        compressor = zstandard.ZstdCompressor(level=self.ZSTD_LEVEL, dict_data=dictionary)
+        return compressor.compress(data), "zstd", self._active_id if dictionary is not None else None
+
+    def decode(self, content: Union[str, bytes], encoding: Optional[str], dictionary_id: Optional[int] = None) -> str:
+        """Decode a stored body (the zstd dictionary must have been loaded with ensure_dictionary)"""
+        if encoding is None:
+            return content
+        if encoding == "zlib":
+            data = zlib.decompress(content)
+        elif encoding == "zstd":
+            dictionary = self._dictionaries[dictionary_id] if dictionary_id is not None else None
+            data = zstandard.ZstdDecompressor(dict_data=dictionary).decompress(content)
+        else:
+            raise ValueError(f"Unknown content encoding: {encoding}")
+        return data.decode("utf-8", errors="surrogatepass")
+
+    async def ensure_dictionary(self, dictionary_id: Optional[int]) -> None:
+        """Load a dictionary from the content_dictionaries collection unless it is loaded already"""
+        if dictionary_id is None or dictionary_id in self._dictionaries:
+            return
+        doc = await content_dictionaries.find_one({"_id": dictionary_id})
+        if doc is None:
+            raise ValueError(f"Content dictionary {dictionary_id} is missing")
+        self._add_dictionary(dictionary_id, doc["data"])
+
+    async def load_active_dictionary(self) -> Optional[int]:
+        """Use the active trained dictionary for new bodies (called from the application startup hook)
+
+        Skipped unless new bodies are written with zstd; stored bodies load
+        their dictionary by id when they are first decoded.
+        """
+        if self.encoding != "zstd":
+            return None
+        doc = await content_dictionaries.find_one({"active": True}, sort=[("created_at", -1)])
+        if doc is not None:
+            self._add_dictionary(doc["_id"], doc["data"])
+            self._active_id = doc["_id"]
+            logger.info(f"Compressing article bodies with content dictionary {doc['_id']}")
+        return self._active_id
+
+    def train(self, samples: list[str]) -> "zstandard.ZstdCompressionDict":
+        """Train a dictionary on sample bodies, one sample per paragraph"""
+        chunks = [
+            paragraph.encode("utf-8", errors="surrogatepass")
+            for sample in samples
+            for paragraph in sample.split("\n\n")
+            if paragraph.strip()
+        ]
+        return zstandard.train_dictionary(self.DICTIONARY_SIZE, chunks, level=self.ZSTD_LEVEL)
+
+    async def activate(self, dictionary: "zstandard.ZstdCompressionDict", sample_count: int) -> int:
+        """Store a trained dictionary and make it the one new bodies are compressed with"""
+        dictionary_id = dictionary.dict_id()
+        data = dictionary.as_bytes()
+        await content_dictionaries.update_many({"active": True}, {"$set": {"active": False}})
+        await content_dictionaries.update_one(
+            {"_id": dictionary_id},
+            {
+                "$set": {"active": True},
+                "$setOnInsert": {"data": data, "samples": sample_count, "created_at": datetime.utcnow()}
+            },
+            upsert=True
+        )
+        await asyncio.to_thread(self.use_dictionary, dictionary)
+        logger.info(f"Activated content dictionary {dictionary_id} trained on {sample_count} bodies")
+        return dictionary_id
+
+
+# Create a global instance
+content_codec = ContentCodec()
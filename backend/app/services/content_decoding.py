@@ -0,0 +1,289 @@
+import codecs
+import logging
+import re
+import zlib
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+
+
+# Content types accepted as HTML pages
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# How much of the document to scan for a <meta charset> declaration
+CHARSET_SNIFF_BYTES = 4096
+
+META_CHARSET_RE = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-:.]+)""",
+    re.IGNORECASE
+)
+
+# WHATWG treats these labels as windows-1252
+LATIN1_ALIASES = {"iso-8859-1", "iso8859-1", "latin1", "latin-1", "us-ascii", "ascii"}
+
+
+# Decoded bytes produced per step, so a compression bomb is caught within one chunk of the limit
+DECODE_CHUNK_BYTES = 64 * 1024
+
+# brotli before 1.2 cannot bound its output, so br is only accepted with a newer one
+BROTLI_BOUNDED = brotli is not None and hasattr(brotli.Decompressor, "can_accept_more_data")
+
+
+class DecodedSizeExceeded(ValueError):
+    """The decoded body would be larger than the decoder's max_bytes"""
+
+
+def supported_content_encodings() -> str:
+    """Value for the Accept-Encoding request header based on the installed decoders"""
+    encodings = ["gzip", "deflate"]
+    if BROTLI_BOUNDED:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+def is_html_content_type(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type header denotes an HTML page (a missing header is given the benefit of the doubt)"""
+    if not content_type:
+        return True
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in HTML_CONTENT_TYPES
+
+
+def charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """Extract the charset parameter from a Content-Type header"""
+    if not content_type:
+        return None
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return value.strip().strip("\"'")
+    return None
+
+
+class _Output:
+    """Collects decoded chunks, raising as soon as they pass the limit"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.limit:
+            raise DecodedSizeExceeded(f"Decoded body exceeds {self.limit} bytes")
+        self.chunks.append(data)
+        return len(data)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int):
+        self._decompressor = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        output = _Output(limit)
+        while data:
+            output.write(self._decompressor.decompress(data, DECODE_CHUNK_BYTES))
+            data = self._decompressor.unconsumed_tail
+        return output.getvalue()
+
+    def flush(self, limit: int) -> bytes:
+        # All input was consumed above, so little more than the stream trailer is left
+        output = _Output(limit)
+        output.write(self._decompressor.flush())
+        return output.getvalue()
+
+
+class _DeflateDecoder(_ZlibDecoder):
+    """Accepts both zlib-wrapped and raw deflate streams"""
+
+    def __init__(self):
+        super().__init__(zlib.MAX_WBITS)
+        self._first_chunk = True
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        if self._first_chunk:
+            self._first_chunk = False
+            try:
+                return super().decompress(data, limit)
+            except zlib.error:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return super().decompress(data, limit)
+
+
+class _GzipDecoder(_ZlibDecoder):
+    def __init__(self):
+        super().__init__(16 + zlib.MAX_WBITS)
+
+
+class _BrotliDecoder:
+    def __init__(self):
+        self._decompressor = brotli.Decompressor()
+
+    def _drain(self, output: "_Output") -> None:
+        while not self._decompressor.is_finished() and not self._decompressor.can_accept_more_data():
+            output.write(self._decompressor.process(b"", output_buffer_limit=DECODE_CHUNK_BYTES))
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        output = _Output(limit)
+        output.write(self._decompressor.process(data, output_buffer_limit=DECODE_CHUNK_BYTES))
+        self._drain(output)
+        return output.getvalue()
+
+    def flush(self, limit: int) -> bytes:
+        output = _Output(limit)
+        # Output held back by the buffer limit comes out on empty calls
+        while not self._decompressor.is_finished():
+            data = self._decompressor.process(b"", output_buffer_limit=DECODE_CHUNK_BYTES)
+            if not data:
+                break
+            output.write(data)
+        return output.getvalue()
+
+
+class _ZstdDecoder:
+    """Decodes through a stream writer, which emits output in DECODE_CHUNK_BYTES pieces"""
+
+    def __init__(self):
+        self._output = _Output(0)
+        self._writer = zstandard.ZstdDecompressor().stream_writer(
+            self, write_size=DECODE_CHUNK_BYTES, write_return_read=True
+        )
+
+    def write(self, data: bytes) -> int:
+        return self._output.write(data)
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        self._output = _Output(limit)
+        self._writer.write(data)
+        return self._output.getvalue()
+
+    def flush(self, limit: int) -> bytes:
+        return b""
+
+
+class StreamDecoder:
+    """Incrementally undoes the Content-Encoding of a response body.
+
+    Codings listed in the header are applied in order by the server, so they
+    are removed in reverse order here. Output is produced in bounded steps and
+    DecodedSizeExceeded is raised as soon as the decoded body passes
+    max_bytes, so a small compressed body cannot expand without limit.
+    """
+
+    def __init__(self, content_encoding: Optional[str], max_bytes: int):
+        self.max_bytes = max_bytes
+        self.decoded_bytes = 0
+        self._decoders = []
+        codings = [c.strip().lower() for c in (content_encoding or "").split(",") if c.strip()]
+        for coding in reversed(codings):
+            if coding == "identity":
+                continue
+            if coding in ("gzip", "x-gzip"):
+                self._decoders.append(_GzipDecoder())
+            elif coding == "deflate":
+                self._decoders.append(_DeflateDecoder())
+            elif coding == "br" and BROTLI_BOUNDED:
+                self._decoders.append(_BrotliDecoder())
+            elif coding == "zstd" and zstandard is not None:
+                self._decoders.append(_ZstdDecoder())
+            else:
+                raise ValueError(f"Unsupported content encoding: {coding}")
+
+    def _count(self, data: bytes) -> bytes:
+        self.decoded_bytes += len(data)
+        if self.decoded_bytes > self.max_bytes:
+            raise DecodedSizeExceeded(f"Decoded body exceeds {self.max_bytes} bytes")
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        # Every layer is held to what is left of the budget
+        remaining = self.max_bytes - self.decoded_bytes
+        for decoder in self._decoders:
+            data = decoder.decompress(data, remaining)
+        return self._count(data)
+
+    def flush(self) -> bytes:
+        remaining = self.max_bytes - self.decoded_bytes
+        data = b""
+        for decoder in self._decoders:
+            data = decoder.decompress(data, remaining) + decoder.flush(remaining)
+        return self._count(data)
+
+
+def _normalize_charset(charset: Optional[str]) -> Optional[str]:
+    if not charset:
+        return None
+    charset = charset.strip().lower()
+    if charset in LATIN1_ALIASES:
+        return "cp1252"
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        logger.warning(f"Unknown charset declared: {charset}")
+        return None
+
+
+def sniff_meta_charset(body: bytes) -> Optional[str]:
+    """Find a <meta charset> or http-equiv charset declaration at the start of the document"""
+    match = META_CHARSET_RE.search(body[:CHARSET_SNIFF_BYTES])
+    if match:
+        return match.group(1).decode("ascii", errors="ignore")
+    return None
+
+
+def decode_html(body: bytes, declared_charset: Optional[str] = None) -> str:
+    """Decode an HTML body to text.
+
+    Tries, in order: a byte order mark, the charset declared in the
+    Content-Type header, a <meta charset> declaration, statistical detection,
+    and finally UTF-8 with replacement characters.
+    """
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be")):
+        if body.startswith(bom):
+            return body[len(bom):].decode(encoding, errors="replace")
+
+    candidates = []
+    for charset in (declared_charset, sniff_meta_charset(body)):
+        normalized = _normalize_charset(charset)
+        if normalized and normalized not in candidates:
+            candidates.append(normalized)
+
+    for charset in candidates:
+        try:
+            return body.decode(charset)
+        except (UnicodeDecodeError, LookupError):
+            logger.warning(f"Body does not decode as declared charset {charset}")
+
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(body).best()
+        if best is not None:
+            logger.info(f"Detected charset {best.encoding}")
+            return str(best)
+
+    return body.decode("utf-8", errors="replace")
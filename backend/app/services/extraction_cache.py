@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from ..database import extraction_cache as extraction_cache_collection
+from ..models.article import ArticleMetadata
+from .extraction_executor import ExtractionResult
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields that belong to the URL rather than to the page content
+URL_METADATA_FIELDS = {"source_url", "canonical_url"}
+
+
+def extraction_cache_key(preprocessed_html: str, extractor_version: str) -> str:
+    """Cache key for a page: the extractor version and a hash of its preprocessed HTML"""
+    digest = hashlib.sha256(preprocessed_html.encode("utf-8", errors="surrogatepass")).hexdigest()
+    return f"{extractor_version}:{digest}"
+
+
+class ExtractionCache:
+    """Two-tier cache of extraction results keyed by page content.
+
+    Byte-identical pages reached through different URLs (AMP mirrors,
+    redirects, tracking links) or re-fetched after a failure reuse the stored
+    markdown, title, description and metadata instead of running trafilatura
+    again. The first tier is an in-process LRU, the second a Mongo collection
+    whose documents expire after TTL_DAYS.
+    """
+    MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_SIZE", 256))
+    TTL_DAYS = int(os.getenv("EXTRACTION_CACHE_TTL_DAYS", 30))
+
+    def __init__(self):
+        self._memory = LRUCache(self.MAX_ENTRIES)
+
+    @staticmethod
+    def _with_source(result: ExtractionResult, source_url: str) -> ExtractionResult:
+        metadata = result.metadata.model_copy(update={"source_url": source_url, "canonical_url": None})
+        return ExtractionResult(
+            title=result.title,
+            content=result.content,
+            description=result.description,
+            metadata=metadata
+        )
+
+    async def get(self, key: str, source_url: str) -> Optional[ExtractionResult]:
+        """Return the cached result for a page, with its metadata pointed at source_url"""
+        result = self._memory.get(key)
+        if result is None:
+            try:
+                doc = await extraction_cache_collection.find_one({"_id": key})
+            except Exception as e:
+                logger.warning(f"Extraction cache lookup failed: {str(e)}")
+                return None
+            if not doc:
+                return None
+            result = ExtractionResult(
+                title=doc["title"],
+                content=doc["content"],
+                description=doc["description"],
+                metadata=ArticleMetadata(source_url=source_url, **doc.get("metadata", {}))
+            )
+            self._memory.put(key, result)
+        logger.info(f"Extraction cache hit for {source_url}")
+        return self._with_source(result, source_url)
+
+    async def put(self, key: str, result: ExtractionResult) -> None:
+        """Store an extraction result in both tiers"""
+        self._memory.put(key, self._with_source(result, result.metadata.source_url))
+        doc = {
+            "title": result.title,
+            "content": result.content,
+            "description": result.description,
+            "metadata": result.metadata.model_dump(exclude=URL_METADATA_FIELDS),
+            "created_at": datetime.utcnow()
+        }
+        try:
+            await extraction_cache_collection.replace_one({"_id": key}, doc, upsert=True)
+        except Exception as e:
+            logger.warning(f"Failed to store extraction result in cache: {str(e)}")
+
+    def clear(self) -> None:
+        """Drop the in-process tier"""
+        self._memory.clear()
+
+
+# Create a global instance
+extraction_cache = ExtractionCache()
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+from ..models.article import ArticleMetadata
+from .parse_metrics import start_memory_tracing
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExtractionResult:
+    """Plain result of the HTML -> markdown + metadata pipeline, safe to pass between processes"""
+    title: str
+    content: str
+    description: str
+    metadata: ArticleMetadata
+    # Stage timings measured where the pipeline ran (parse_metrics.Span)
+    spans: list = field(default_factory=list)
+
+
+def _warm_worker() -> None:
+    """Process pool initializer: import trafilatura and the parser once per worker"""
+    import trafilatura
+    from . import parser_service  # noqa: F401
+
+    start_memory_tracing()
+
+    # Run a tiny extraction so lazily-built lxml/trafilatura state is ready
+    trafilatura.extract("<html><body><article><p>warm up</p></article></body></html>")
+
+
+def _noop() -> None:
+    """Used to force the pool to spawn its workers at startup"""
+    return None
+
+
+class ExtractionExecutor:
+    """Runs CPU-heavy extraction work off the event loop.
+
+    When started, work is dispatched to a ProcessPoolExecutor of warm workers.
+    Before start() (scripts, tests) it falls back to a worker thread so callers
+    never block the loop either way.
+    """
+    # Number of worker processes; 0 keeps extraction in a thread of the main process
+    WORKERS = int(os.getenv("EXTRACTION_WORKERS", min(4, os.cpu_count() or 1)))
+
+    # Maximum number of extraction tasks queued or running at once
+    MAX_QUEUE_DEPTH = int(os.getenv("EXTRACTION_MAX_QUEUE_DEPTH", 32))
+
+    # Per-task timeout in seconds (replaces trafilatura's EXTRACTION_TIMEOUT).
+    # A task that times out cannot be stopped inside its worker, so it keeps
+    # counting towards MAX_QUEUE_DEPTH until it actually finishes.
+    TASK_TIMEOUT = float(os.getenv("EXTRACTION_TASK_TIMEOUT", 30))
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of tasks currently queued or running, including timed-out ones still running"""
+        return self._in_flight
+
+    def _task_done(self, future: asyncio.Future) -> None:
+        self._in_flight -= 1
+        if not future.cancelled():
+            # Retrieve the exception of tasks nobody awaits any more (timed out)
+            future.exception()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker
+        )
+
+    def start(self) -> None:
+        """Start the worker pool and spawn all workers ahead of the first request"""
+        if self._pool is not None or self.WORKERS <= 0:
+            return
+        logger.info(f"Starting extraction process pool with {self.WORKERS} workers")
+        self._pool = self._create_pool()
+        for _ in range(self.WORKERS):
+            self._pool.submit(_noop)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, cancelling queued work"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) off the event loop and return its result.
+
+        Raises:
+            HTTPException: 503 if the queue is full, 504 if the task times out
+        """
+        if self._in_flight >= self.MAX_QUEUE_DEPTH:
+            logger.warning(f"Extraction queue is full ({self._in_flight} tasks in flight)")
+            raise HTTPException(
+                status_code=503,
+                detail="Too many articles are being processed right now. Please try again later."
+            )
+
+        if self._pool is None:
+            task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+        else:
+            task = asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        # Released when the work itself finishes, not when the caller stops waiting
+        self._in_flight += 1
+        task.add_done_callback(self._task_done)
+        try:
+            # Shielded: the timeout abandons the task without pretending it stopped
+            return await asyncio.wait_for(asyncio.shield(task), timeout=self.TASK_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Extraction task exceeded timeout of {self.TASK_TIMEOUT}s")
+            raise HTTPException(
+                status_code=504,
+                detail="Content extraction took too long for this page."
+            )
+        except BrokenProcessPool:
+            logger.error("Extraction process pool is broken, restarting it", exc_info=True)
+            self.shutdown()
+            self.start()
+            raise HTTPException(
+                status_code=500,
+                detail="Content extraction worker crashed while processing this page."
+            )
+
+
+# Create a global instance
+extraction_executor = ExtractionExecutor()
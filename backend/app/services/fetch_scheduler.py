@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Hosting platforms whose subdomains share one backend, so they share one politeness budget
+SHARED_HOST_SUFFIXES = ("substack.com", "medium.com", "wordpress.com", "blogspot.com", "github.io")
+
+# Upstream responses that count against a domain's circuit breaker
+FAILURE_STATUS_CODES = {403, 429}
+
+
+def domain_key(url: str) -> str:
+    """Politeness key for a URL: its host without www., or the shared platform domain"""
+    host = (urlsplit(url).hostname or "").lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    for suffix in SHARED_HOST_SUFFIXES:
+        if host == suffix or host.endswith("." + suffix):
+            return suffix
+    return host
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is not None:
+        retry_at = retry_at.replace(tzinfo=None) - (retry_at.utcoffset() or timedelta())
+    return max(0.0, (retry_at - datetime.utcnow()).total_seconds())
+
+
+@dataclass
+class DomainState:
+    semaphore: asyncio.Semaphore
+    tokens: float
+    refilled_at: float
+    # Fetches pacing or queued for the semaphore, and fetches holding it
+    waiting: int = 0
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    half_open_trial: bool = False
+    requests: int = 0
+    failures: int = 0
+    last_status: Optional[int] = None
+    last_error: Optional[str] = field(default=None)
+
+
+class FetchScheduler:
+    """Per-domain politeness for outbound page fetches.
+
+    Each domain gets a concurrency limit, a token bucket that paces request
+    starts, a Retry-After block and a circuit breaker. After FAILURE_THRESHOLD
+    consecutive upstream errors the circuit opens and fetches fail fast for
+    COOLDOWN seconds; then a single trial request decides whether it closes.
+
+    State is kept only for domains that still need it: every PRUNE_INTERVAL
+    seconds, when a new domain is seen, idle domains (nothing waiting or in
+    flight, a full token bucket, no Retry-After block, circuit closed with no
+    recent failures) are forgotten.
+    """
+    # Politeness configuration
+    DOMAIN_CONCURRENCY = int(os.getenv("FETCH_DOMAIN_CONCURRENCY", 2))
+    DOMAIN_RATE = float(os.getenv("FETCH_DOMAIN_RATE", 1.0))
+    DOMAIN_BURST = float(os.getenv("FETCH_DOMAIN_BURST", 3))
+
+    # Longest a fetch may queue for its domain (pacing or Retry-After) before failing fast
+    MAX_WAIT = float(os.getenv("FETCH_MAX_WAIT", 20))
+
+    # Circuit breaker configuration
+    FAILURE_THRESHOLD = int(os.getenv("FETCH_CIRCUIT_FAILURE_THRESHOLD", 5))
+    COOLDOWN = float(os.getenv("FETCH_CIRCUIT_COOLDOWN", 60))
+    MAX_COOLDOWN = float(os.getenv("FETCH_CIRCUIT_MAX_COOLDOWN", 1800))
+
+    # Seconds between sweeps of idle domain state
+    PRUNE_INTERVAL = float(os.getenv("FETCH_PRUNE_INTERVAL", 60))
+
+    def __init__(self):
+        self._domains: dict[str, DomainState] = {}
+        self._pruned_at = time.monotonic()
+
+    def _state(self, domain: str) -> DomainState:
+        state = self._domains.get(domain)
+        if state is None:
+            now = time.monotonic()
+            if now - self._pruned_at >= self.PRUNE_INTERVAL:
+                self.prune(now)
+            state = DomainState(
+                semaphore=asyncio.Semaphore(self.DOMAIN_CONCURRENCY),
+                tokens=self.DOMAIN_BURST,
+                refilled_at=now
+            )
+            self._domains[domain] = state
+        return state
+
+    def _is_idle(self, state: DomainState, now: float) -> bool:
+        """Whether forgetting the state would change nothing for the next fetch"""
+        tokens = state.tokens + (now - state.refilled_at) * self.DOMAIN_RATE
+        return (
+            state.waiting == 0
+            and state.in_flight == 0
+            and tokens >= self.DOMAIN_BURST
+            and state.blocked_until <= now
+            and state.consecutive_failures == 0
+        )
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Forget idle domains; returns how many were dropped"""
+        now = time.monotonic() if now is None else now
+        idle = [domain for domain, state in self._domains.items() if self._is_idle(state, now)]
+        for domain in idle:
+            del self._domains[domain]
+        self._pruned_at = now
+        return len(idle)
+
+    def _check_circuit(self, domain: str, state: DomainState, now: float) -> None:
+        if state.open_until > now:
+            raise HTTPException(
+                status_code=503,
+                detail=f"{domain} is failing repeatedly; fetches are paused for {int(state.open_until - now) + 1}s."
+            )
+        if state.open_until and state.consecutive_failures >= self.FAILURE_THRESHOLD:
+            # Cooling-off window is over: let exactly one trial request through
+            if state.half_open_trial:
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"{domain} is recovering from repeated failures; please try again shortly."
+                )
+            state.half_open_trial = True
+
+    def _reserve(self, state: DomainState, now: float) -> float:
+        """Take a token (possibly going into debt) and return how long to wait before starting"""
+        state.tokens = min(self.DOMAIN_BURST, state.tokens + (now - state.refilled_at) * self.DOMAIN_RATE)
+        state.refilled_at = now
+        state.tokens -= 1
+        pacing_wait = max(0.0, -state.tokens / self.DOMAIN_RATE) if self.DOMAIN_RATE > 0 else 0.0
+        return max(pacing_wait, state.blocked_until - now)
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Wait for the domain's turn and hold one of its concurrency slots.
+
+        Transport errors and timeouts raised inside the block count as upstream
+        failures; response statuses are reported through record_status.
+
+        Raises:
+            HTTPException: 503 if the circuit is open or the wait would exceed MAX_WAIT
+        """
+        domain = domain_key(url)
+        state = self._state(domain)
+        now = time.monotonic()
+        self._check_circuit(domain, state, now)
+
+        wait = self._reserve(state, now)
+        if wait > self.MAX_WAIT:
+            state.tokens += 1
+            state.half_open_trial = False
+            logger.warning(f"Not fetching {url}: {domain} would need a {wait:.1f}s wait")
+            raise HTTPException(
+                status_code=503,
+                detail=f"Too many requests to {domain} right now. Please try again later."
+            )
+        # Counted from here so the state is not pruned while this fetch waits for its turn
+        state.waiting += 1
+        try:
+            if wait > 0:
+                logger.debug(f"Pacing fetch of {url} by {wait:.2f}s")
+                await asyncio.sleep(wait)
+            await state.semaphore.acquire()
+        except BaseException:
+            state.half_open_trial = False
+            raise
+        finally:
+            state.waiting -= 1
+
+        state.in_flight += 1
+        state.requests += 1
+        try:
+            yield
+        except (httpx.TransportError, httpx.TimeoutException, TimeoutError) as e:
+            self._record_failure(domain, state, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            state.in_flight -= 1
+            state.half_open_trial = False
+            state.semaphore.release()
+
+    def record_status(self, url: str, status_code: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """Record an upstream response status for the URL's domain.
+
+        Returns:
+            The Retry-After delay in seconds if the upstream sent one with a 429/503
+        """
+        domain = domain_key(url)
+        state = self._state(domain)
+        state.last_status = status_code
+
+        delay = None
+        if status_code in (429, 503):
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                logger.info(f"{domain} asked us to retry after {delay:.0f}s")
+
+        if status_code in FAILURE_STATUS_CODES or status_code >= 500:
+            self._record_failure(domain, state, f"HTTP {status_code}")
+        else:
+            if state.consecutive_failures >= self.FAILURE_THRESHOLD:
+                logger.info(f"Circuit for {domain} closed")
+            state.consecutive_failures = 0
+            state.open_until = 0.0
+        return delay
+
+    def _record_failure(self, domain: str, state: DomainState, error: str) -> None:
+        state.failures += 1
+        state.consecutive_failures += 1
+        state.last_error = error
+        if state.consecutive_failures >= self.FAILURE_THRESHOLD:
+            cooldown = min(self.MAX_COOLDOWN, self.COOLDOWN * 2 ** (state.consecutive_failures - self.FAILURE_THRESHOLD))
+            state.open_until = time.monotonic() + cooldown
+            logger.warning(
+                f"Circuit for {domain} opened for {cooldown:.0f}s "
+                f"after {state.consecutive_failures} consecutive failures ({error})"
+            )
+
+    def backoff_remaining(self, url: str) -> float:
+        """Seconds until the URL's domain accepts fetches again (open circuit or Retry-After block)"""
+        state = self._domains.get(domain_key(url))
+        if state is None:
+            return 0.0
+        return max(0.0, max(state.open_until, state.blocked_until) - time.monotonic())
+
+    def snapshot(self) -> list[dict]:
+        """Current per-domain state for the admin API"""
+        now = time.monotonic()
+        domains = []
+        for domain, state in sorted(self._domains.items()):
+            if state.open_until > now:
+                circuit = "open"
+            elif state.consecutive_failures >= self.FAILURE_THRESHOLD:
+                circuit = "half_open"
+            else:
+                circuit = "closed"
+            tokens = min(self.DOMAIN_BURST, state.tokens + (now - state.refilled_at) * self.DOMAIN_RATE)
+            domains.append({
+                "domain": domain,
+                "circuit": circuit,
+                "circuit_open_for": round(max(0.0, state.open_until - now), 1),
+                "blocked_for": round(max(0.0, state.blocked_until - now), 1),
+                "tokens": round(tokens, 2),
+                "in_flight": state.in_flight,
+                "consecutive_failures": state.consecutive_failures,
+                "requests": state.requests,
+                "failures": state.failures,
+                "last_status": state.last_status,
+                "last_error": state.last_error
+            })
+        return domains
+
+    def reset(self) -> None:
+        """Forget all per-domain state"""
+        self._domains = {}
+        self._pruned_at = time.monotonic()
+
+
+# Create a global instance
+fetch_scheduler = FetchScheduler()
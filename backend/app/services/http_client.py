@@ -0,0 +1,87 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClientService:
+    """Process-wide pooled async HTTP client used for outbound page fetches.
+
+    The underlying httpx.AsyncClient is opened on application startup and closed
+    on shutdown, so keep-alive connections are reused across parse requests.
+    """
+    # Pool configuration
+    MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+    KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+
+    # Timeouts in seconds
+    CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+    READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 15))
+    TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", 30))
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.MAX_CONNECTIONS,
+            max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=self.KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(
+            connect=self.CONNECT_TIMEOUT,
+            read=self.READ_TIMEOUT,
+            write=self.READ_TIMEOUT,
+            pool=self.CONNECT_TIMEOUT
+        )
+        logger.info(f"Creating pooled HTTP client (http2={HTTP2_AVAILABLE}, max_connections={self.MAX_CONNECTIONS})")
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True
+        )
+
+    async def start(self) -> None:
+        """Open the shared client (called from the application startup hook)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+
+    async def close(self) -> None:
+        """Close the shared client and drop all pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared client, creating it lazily outside the app lifespan (scripts, tests)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: Optional[dict] = None) -> AsyncIterator[httpx.Response]:
+        """Open a streaming GET request through the shared pool.
+
+        The response headers are available before the body is read, so callers
+        can reject a response early. Callers bound the total time and the
+        per-domain concurrency themselves (FetchScheduler.slot).
+        """
+        async with self.client.stream("GET", url, headers=headers) as response:
+            yield response
+
+
+# Create a global instance
+http_client = HttpClientService()
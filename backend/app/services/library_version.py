@@ -0,0 +1,50 @@
+from typing import Iterable, Union
+
+from bson import ObjectId
+
+from ..database import user_articles, users
+from .article_content_cache import etag_matches
+
+
+class LibraryVersions:
+    """Per-user counter of changes to what the library listing returns.
+
+    users.library_version is bumped with $inc after every write to a user's
+    saves (save, archive, unarchive, delete, progress, parse) and, for every
+    user holding it, after an article itself changes (re-extraction, bookmark
+    upgrade). GET /users/{user_id}/articles derives its ETag from the
+    version, so an unchanged library is answered with 304 from the users
+    document alone. Writers bump after writing and the listing reads the
+    version before querying, so an ETag is never newer than its body.
+    """
+
+    @staticmethod
+    async def bump(user_id: Union[str, ObjectId]) -> None:
+        await users.update_one({"_id": ObjectId(user_id)}, {"$inc": {"library_version": 1}})
+
+    @staticmethod
+    async def bump_readers(article_ids: Iterable[ObjectId]) -> None:
+        """Bump every user with a link to one of these articles"""
+        article_ids = list(article_ids)
+        if not article_ids:
+            return
+        user_ids = await user_articles.distinct("user_id", {"article_id": {"$in": article_ids}})
+        if user_ids:
+            await users.update_many({"_id": {"$in": user_ids}}, {"$inc": {"library_version": 1}})
+
+    @staticmethod
+    async def bump_all() -> None:
+        """Bump every user, after a migration rewrote links across libraries"""
+        await users.update_many({}, {"$inc": {"library_version": 1}})
+
+    @staticmethod
+    def etag(version: int) -> str:
+        return f'W/"library-{version}"'
+
+    @staticmethod
+    def matches(version: int, if_none_match: str) -> bool:
+        return etag_matches(LibraryVersions.etag(version), if_none_match)
+
+
+# Create a global instance
+library_versions = LibraryVersions()
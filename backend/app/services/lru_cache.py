@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded in-process mapping that evicts the least recently used entry.
+
+    Bounded by entry count and, when max_bytes is given, by the total size of
+    the values as measured by sizeof; a value larger than the whole budget is
+    not cached. With a ttl, entries older than ttl seconds read as misses.
+
+    Not thread-safe; meant to be used from the event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        # key -> (value, size in bytes, expiry on the monotonic clock or None)
+        self._entries: OrderedDict[Hashable, tuple[Any, int, Optional[float]]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        try:
+            value, _, expires_at = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        size = self.sizeof(value) if self.max_bytes is not None and self.sizeof is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.pop(key)
+            return
+        self.pop(key)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, size, expires_at)
+        self.bytes += size
+        self._evict()
+
+    def resize(self, key: Hashable) -> None:
+        """Re-measure a value that grew in place, evicting to stay within max_bytes"""
+        entry = self._entries.get(key)
+        if entry is None or self.max_bytes is None or self.sizeof is None:
+            return
+        value, size, expires_at = entry
+        new_size = self.sizeof(value)
+        if new_size > self.max_bytes:
+            self.pop(key)
+            return
+        self._entries[key] = (value, new_size, expires_at)
+        self.bytes += new_size - size
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[1]
+        return entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        """Counters for the admin endpoints"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
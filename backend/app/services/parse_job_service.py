@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from ..database import parse_jobs
+from ..models.parse_job import ParseJob
+from ..services.parse_metrics import parse_trace
+from ..services.parser_service import ParserService
+
+logger = logging.getLogger(__name__)
+
+
+class ParseJobService:
+    # Number of concurrent job workers per process
+    WORKERS = int(os.getenv("PARSE_JOB_WORKERS", 4))
+
+    # How long a claimed job stays leased before another worker may pick it up;
+    # the worker running it renews the lease every third of this
+    LEASE_SECONDS = int(os.getenv("PARSE_JOB_LEASE_SECONDS", 120))
+
+    # Attempts before a job is marked as failed
+    MAX_ATTEMPTS = int(os.getenv("PARSE_JOB_MAX_ATTEMPTS", 3))
+
+    # Idle polling interval in seconds when the queue is empty
+    POLL_INTERVAL = float(os.getenv("PARSE_JOB_POLL_INTERVAL", 1.0))
+
+    def __init__(self):
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def enqueue(self, url: str, user_id: str) -> ParseJob:
+        """Create a queued parse job for a Telegram user
+
+        The user is resolved and the daily limit is checked up front, so those
+        errors are returned immediately instead of through the job status.
+        """
+        actual_user_id = await ParserService.prepare_parse_request(user_id)
+
+        now = datetime.utcnow()
+        job = {
+            "url": url,
+            "user_id": ObjectId(actual_user_id),
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": self.MAX_ATTEMPTS,
+            "lease_expires_at": None,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None
+        }
+        result = await parse_jobs.insert_one(job)
+        job["_id"] = result.inserted_id
+        logger.info(f"Enqueued parse job {result.inserted_id} for URL: {url}")
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        return ParseJob(**job)
+
+    async def get_job(self, job_id: str) -> ParseJob:
+        """Get a parse job by ID"""
+        try:
+            job = await parse_jobs.find_one({"_id": ObjectId(job_id)})
+        except InvalidId:
+            raise HTTPException(status_code=404, detail="Parse job not found")
+        if not job:
+            raise HTTPException(status_code=404, detail="Parse job not found")
+        return ParseJob(**job)
+
+    async def claim_next(self) -> Optional[dict]:
+        """Atomically lease the oldest runnable job (queued, or running with an expired lease)"""
+        now = datetime.utcnow()
+        return await parse_jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued"},
+                    {"status": "running", "lease_expires_at": {"$lt": now}}
+                ],
+                "$expr": {"$lt": ["$attempts", "$max_attempts"]}
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_expires_at": now + timedelta(seconds=self.LEASE_SECONDS),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def fail_abandoned(self) -> None:
+        """Mark jobs whose lease expired on their final attempt as failed"""
+        now = datetime.utcnow()
+        result = await parse_jobs.update_many(
+            {
+                "status": "running",
+                "lease_expires_at": {"$lt": now},
+                "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+            },
+            {
+                "$set": {
+                    "status": "failed",
+                    "error": "Parse job did not finish before its lease expired",
+                    "lease_expires_at": None,
+                    "updated_at": now,
+                    "finished_at": now
+                }
+            }
+        )
+        if result.modified_count:
+            logger.warning(f"Marked {result.modified_count} abandoned parse jobs as failed")
+
+    @staticmethod
+    def _lease_filter(job: dict) -> dict:
+        """Matches the job only while this attempt still holds it
+
+        claim_next increments attempts, so once another worker has taken over
+        an expired lease, writes from the stale attempt match nothing.
+        """
+        return {"_id": job["_id"], "attempts": job["attempts"]}
+
+    async def _heartbeat(self, job: dict) -> None:
+        """Keep extending the job's lease while it is being processed"""
+        while True:
+            await asyncio.sleep(self.LEASE_SECONDS / 3)
+            now = datetime.utcnow()
+            renewed = await parse_jobs.update_one(
+                dict(self._lease_filter(job), status="running"),
+                {"$set": {"lease_expires_at": now + timedelta(seconds=self.LEASE_SECONDS), "updated_at": now}}
+            )
+            if not renewed.matched_count:
+                logger.warning(f"Parse job {job['_id']} lost its lease (attempt {job['attempts']})")
+                return
+
+    async def _record(self, job: dict, fields: dict) -> bool:
+        """Write the job's outcome unless a newer attempt has taken it over"""
+        result = await parse_jobs.update_one(self._lease_filter(job), {"$set": fields})
+        if not result.matched_count:
+            logger.warning(f"Discarding outcome of parse job {job['_id']}: attempt {job['attempts']} lost its lease")
+            return False
+        return True
+
+    async def process(self, job: dict) -> None:
+        """Run a claimed job and record its outcome"""
+        job_id = job["_id"]
+        logger.info(f"Processing parse job {job_id} (attempt {job['attempts']}) for URL: {job['url']}")
+        try:
+            with parse_trace(job["url"]) as trace:
+                heartbeat = asyncio.create_task(self._heartbeat(job))
+                try:
+                    result = await ParserService.parse_for_user(job["url"], str(job["user_id"]))
+                finally:
+                    # Stopped before the outcome is written, which also ends the lease
+                    heartbeat.cancel()
+                    await asyncio.gather(heartbeat, return_exceptions=True)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            exhausted = job["attempts"] >= job.get("max_attempts", self.MAX_ATTEMPTS)
+            logger.error(f"Parse job {job_id} failed (attempt {job['attempts']}): {detail}")
+            now = datetime.utcnow()
+            await self._record(job, {
+                "status": "failed" if exhausted else "queued",
+                "error": detail,
+                "timings": trace.breakdown(),
+                "lease_expires_at": None,
+                "updated_at": now,
+                "finished_at": now if exhausted else None
+            })
+            return
+
+        now = datetime.utcnow()
+        recorded = await self._record(job, {
+            "status": "done",
+            "result": result,
+            "timings": trace.breakdown(),
+            "error": None,
+            "lease_expires_at": None,
+            "updated_at": now,
+            "finished_at": now
+        })
+        if recorded:
+            logger.info(f"Parse job {job_id} finished: {result['type']} {result['article_id']}")
+
+    async def _worker_loop(self, worker_number: int) -> None:
+        logger.info(f"Parse job worker {worker_number} started")
+        while True:
+            try:
+                job = await self.claim_next()
+                if job is not None:
+                    await self.process(job)
+                    continue
+
+                await self.fail_abandoned()
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Parse job worker {worker_number} error: {str(e)}", exc_info=True)
+                await asyncio.sleep(self.POLL_INTERVAL)
+
+    def start(self) -> None:
+        """Start the in-process worker pool (called from the application startup hook)"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(number))
+            for number in range(self.WORKERS)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the worker pool; leased jobs are picked up again once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+
+
+# Create a global instance
+parse_job_service = ParseJobService()
@@ -0,0 +1,187 @@
+import bisect
+import contextvars
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets in milliseconds (the last bucket is unbounded)
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Record tracemalloc peaks per span (adds noticeable overhead, meant for investigations)
+TRACE_MEMORY = os.getenv("PARSE_TRACE_MEMORY", "").lower() in ("1", "true", "yes")
+
+_current_trace: contextvars.ContextVar[Optional["ParseTrace"]] = contextvars.ContextVar("parse_trace", default=None)
+
+
+@dataclass
+class Span:
+    """Timing of one parse stage. Spans awaited on the event loop also count CPU spent by other tasks."""
+    stage: str
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    bytes_in: Optional[int] = None
+    bytes_out: Optional[int] = None
+    peak_kb: Optional[float] = None
+
+
+class Histogram:
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {"count": self.count, "sum": round(self.sum, 3), "buckets": buckets}
+
+
+class StageHistograms:
+    """Process-wide wall/CPU time histograms and byte totals per parse stage"""
+
+    def __init__(self):
+        self._stages: dict[str, dict] = {}
+
+    def observe(self, span: Span) -> None:
+        stage = self._stages.get(span.stage)
+        if stage is None:
+            stage = {"wall_ms": Histogram(), "cpu_ms": Histogram(), "bytes_in": 0, "bytes_out": 0}
+            self._stages[span.stage] = stage
+        stage["wall_ms"].observe(span.wall_ms)
+        stage["cpu_ms"].observe(span.cpu_ms)
+        stage["bytes_in"] += span.bytes_in or 0
+        stage["bytes_out"] += span.bytes_out or 0
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "wall_ms": stage["wall_ms"].to_dict(),
+                "cpu_ms": stage["cpu_ms"].to_dict(),
+                "bytes_in": stage["bytes_in"],
+                "bytes_out": stage["bytes_out"]
+            }
+            for name, stage in sorted(self._stages.items())
+        }
+
+    def reset(self) -> None:
+        self._stages = {}
+
+
+# Create a global instance
+parse_metrics = StageHistograms()
+
+
+class ParseTrace:
+    """Per-request list of stage spans"""
+
+    def __init__(self, record_metrics: bool = True):
+        self.spans: list[Span] = []
+        self.record_metrics = record_metrics
+
+    def add(self, span: Span) -> None:
+        self.spans.append(span)
+        if self.record_metrics:
+            parse_metrics.observe(span)
+
+    def breakdown(self) -> dict:
+        """Per-stage totals, in the order stages first ran"""
+        stages: dict[str, dict] = {}
+        for span in self.spans:
+            totals = stages.setdefault(span.stage, {"wall_ms": 0.0, "cpu_ms": 0.0})
+            totals["wall_ms"] = round(totals["wall_ms"] + span.wall_ms, 3)
+            totals["cpu_ms"] = round(totals["cpu_ms"] + span.cpu_ms, 3)
+            for field in ("bytes_in", "bytes_out", "peak_kb"):
+                value = getattr(span, field)
+                if value is not None:
+                    totals[field] = max(totals.get(field, 0), value) if field == "peak_kb" else totals.get(field, 0) + value
+        return stages
+
+    def format(self) -> str:
+        return " ".join(f"{stage}={totals['wall_ms']:.1f}ms" for stage, totals in self.breakdown().items())
+
+
+def current_trace() -> Optional[ParseTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def parse_trace(label: str) -> Iterator[ParseTrace]:
+    """Collect spans for one parse request and log the breakdown when it ends.
+
+    Nested calls join the outer trace, so only the outermost one logs.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+
+    trace = ParseTrace()
+    token = _current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Parse timings for {label}: total={total_ms:.1f}ms {trace.format()}")
+
+
+@contextmanager
+def span(stage: str, bytes_in: Optional[int] = None) -> Iterator[Span]:
+    """Time a parse stage. Set bytes_out on the yielded span when the output size is known.
+
+    The span is added to the current trace (if any) and to the process-wide histograms.
+    """
+    record = Span(stage=stage, bytes_in=bytes_in)
+    trace_memory = TRACE_MEMORY and tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield record
+    finally:
+        record.wall_ms = round((time.perf_counter() - wall_start) * 1000, 3)
+        record.cpu_ms = round((time.thread_time() - cpu_start) * 1000, 3)
+        if trace_memory:
+            record.peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        add_span(record)
+
+
+def add_span(record: Span) -> None:
+    """Record a span measured elsewhere (e.g. in an extraction worker process)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(record)
+    else:
+        parse_metrics.observe(record)
+
+
+@contextmanager
+def collect_spans() -> Iterator[list]:
+    """Collect spans into a plain list instead of reporting them (used inside worker processes)"""
+    trace = ParseTrace(record_metrics=False)
+    token = _current_trace.set(trace)
+    try:
+        yield trace.spans
+    finally:
+        _current_trace.reset(token)
+
+
+def start_memory_tracing() -> None:
+    """Start tracemalloc if memory tracing is enabled"""
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
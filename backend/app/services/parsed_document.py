@@ -0,0 +1,48 @@
+import logging
+from typing import Any, Optional
+
+import trafilatura
+
+logger = logging.getLogger(__name__)
+
+# Name recorded on documents whose content came from trafilatura rather than a site extractor
+GENERIC_EXTRACTOR = "trafilatura"
+
+
+class ParsedDocument:
+    """Per-request parsing context shared by every stage of the extraction pipeline.
+
+    The HTML is parsed into an lxml tree exactly once. Open Graph tags are read
+    eagerly because trafilatura's extraction cleans the tree in place; the
+    trafilatura metadata result is filled in by the content extraction step,
+    which computes it as part of the same pass, and the step also records
+    which extractor produced the content.
+    """
+
+    def __init__(self, html: str, tree: Any = None, url: Optional[str] = None):
+        self.html = html
+        self.url = url
+        self.tree = tree if tree is not None else trafilatura.load_html(html)
+        self.og_tags = self._read_og_tags(self.tree)
+        self.metadata: Optional[Any] = None
+        self.extractor = GENERIC_EXTRACTOR
+
+    @staticmethod
+    def _read_og_tags(tree) -> dict[str, str]:
+        """Collect og:* meta properties from the tree (first value wins)"""
+        og_tags = {}
+        if tree is None:
+            return og_tags
+        try:
+            for element in tree.xpath('//meta[starts-with(@property, "og:")]'):
+                prop = element.get("property")
+                value = element.get("content")
+                if prop and value and prop not in og_tags:
+                    og_tags[prop] = value
+        except Exception as e:
+            logger.warning(f"Failed to read Open Graph tags: {str(e)}")
+        return og_tags
+
+    def og(self, name: str) -> Optional[str]:
+        """Return the value of an Open Graph property, e.g. og("title")"""
+        return self.og_tags.get(f"og:{name}")
@@ -1,5 +1,8 @@
-from typing import Optional, Any
+from typing import Optional, Any, Union
+import asyncio
 import trafilatura
+from trafilatura.core import determine_returnstring
+from trafilatura.metadata import extract_metadata
 from trafilatura.settings import use_config
 import httpx
 from datetime import datetime, timedelta
@@ -7,15 +10,64 @@ import os
 from bson import ObjectId
 import logging
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
 import random
 import pathlib
+import time
 
-from ..models.article import Article, ArticleMetadata
-from ..database import articles, user_articles
+from ..models.article import Article, ArticleMetadata, ContentBlocks, ContentStats
+from ..database import articles, user_articles, parse_locks
 from ..services.user_service import get_or_create_by_telegram_id
+from ..services.http_client import http_client
+from ..services.fetch_scheduler import fetch_scheduler
+from ..services.content_decoding import (
+    DecodedSizeExceeded,
+    StreamDecoder,
+    charset_from_content_type,
+    decode_html,
+    is_html_content_type,
+    supported_content_encodings,
+)
+from ..services.extraction_executor import ExtractionResult, extraction_executor
+from ..services.extraction_cache import extraction_cache, extraction_cache_key
+from ..services.parsed_document import GENERIC_EXTRACTOR, ParsedDocument
+from ..services.parse_metrics import Span, add_span, collect_spans, parse_trace, span
+from ..services.single_flight import MongoLease, SingleFlight
+from ..services.site_extractors import site_extractors
+from ..services.snapshot_store import snapshot_store
+from ..services.article_body_store import article_body_store
+from ..services.article_cache import article_cache
+from ..services.article_content_cache import article_content_cache
+from ..services.library_version import library_versions
+from ..services.text_normalizer import (
+    NormalizedText,
+    ensure_paragraph_separation,
+    normalize_article,
+    remove_duplicate_title,
+    strip_markdown,
+    utf16_offsets,
+)
+from ..services.url_canonicalizer import canonicalize_url
 
 logger = logging.getLogger(__name__)
 
+# Bump when the extraction pipeline changes its output, so cached extractions are not reused
+PIPELINE_VERSION = 4
+EXTRACTOR_VERSION = f"trafilatura-{trafilatura.__version__}/pipeline-{PIPELINE_VERSION}"
+
+# Configure trafilatura once per process (the timeout is enforced per task by the extraction executor)
+TRAFILATURA_CONFIG = use_config()
+TRAFILATURA_CONFIG.set("DEFAULT", "EXTRACTION_TIMEOUT", "0")
+TRAFILATURA_CONFIG.set("DEFAULT", "MIN_EXTRACTED_SIZE", "100")
+TRAFILATURA_CONFIG.set("DEFAULT", "FAVOR_PRECISION", "True")
+
+# Parse failures that may succeed later (upstream errors, rate limits, timeouts, busy workers);
+# bookmarks left by anything else are kept as they are
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+# Bookmark fields needed to decide whether, and how, to retry its parse
+BOOKMARK_PROJECTION = {"_id": 1, "type": 1, "metadata": 1, "retry": 1}
+
 class ParserService:
     # Common modern mobile user agents
     USER_AGENTS = [
@@ -33,6 +85,26 @@ class ParserService:
     
     # Configurable daily article limit
     DAILY_ARTICLE_LIMIT = int(os.getenv("DAILY_ARTICLE_LIMIT", 10))
+    
+    # Maximum decompressed size of a fetched page in bytes
+    FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", 5 * 1024 * 1024))
+    
+    # How many times to retry a fetch when the server sends a short Retry-After
+    FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", 1))
+    
+    # How long a URL's parse lease outlives its holder (renewed every third of this while
+    # the parse runs), and how often others check on it
+    PARSE_LEASE_SECONDS = int(os.getenv("PARSE_LEASE_SECONDS", 90))
+    PARSE_LEASE_POLL_INTERVAL = float(os.getenv("PARSE_LEASE_POLL_INTERVAL", 0.5))
+    
+    # Retries of bookmarks left by transient failures, with exponential backoff between them
+    BOOKMARK_RETRY_MAX_ATTEMPTS = int(os.getenv("BOOKMARK_RETRY_MAX_ATTEMPTS", 5))
+    BOOKMARK_RETRY_BASE_DELAY = float(os.getenv("BOOKMARK_RETRY_BASE_DELAY", 300))
+    BOOKMARK_RETRY_MAX_DELAY = float(os.getenv("BOOKMARK_RETRY_MAX_DELAY", 12 * 3600))
+    
+    # In-flight registries for deduplicating concurrent parses of the same URL
+    _single_flight = SingleFlight()
+    _parse_lease = MongoLease(parse_locks, PARSE_LEASE_SECONDS)
 
     @staticmethod
     def _get_random_user_agent() -> str:
@@ -57,53 +129,24 @@ class ParserService:
             return None
 
     @staticmethod
-    def _extract_title(downloaded, html_content: str = None) -> str:
-        """Extract article title from downloaded content
+    def _extract_title(document: ParsedDocument) -> str:
+        """Extract article title from the parsed document
         
         Args:
-            downloaded: The downloaded HTML content parsed by trafilatura
-            html_content: Optional raw HTML string for direct extraction of Open Graph metadata
+            document: The parsed document context (Open Graph tags and trafilatura metadata)
             
         Returns:
             The extracted title
         """
-        # First try to extract Open Graph title from raw HTML if provided
-        if html_content:
-            try:
-                import re
-                og_title_match = re.search(r'<meta\s+property=["\']og:title["\']\s+content=["\'](.*?)["\']', html_content, re.IGNORECASE)
-                if og_title_match:
-                    og_title = og_title_match.group(1)
-                    logger.info(f"Using Open Graph title: {og_title}")
-                    return og_title
-            except Exception as e:
-                logger.warning(f"Failed to extract og:title from HTML: {str(e)}")
-        
-        # Then try to extract Open Graph title from downloaded tree
-        try:
-            # If downloaded is a string, parse it
-            if isinstance(downloaded, str):
-                from lxml import html
-                tree = html.fromstring(downloaded)
-                logger.debug(f"Downloaded is a string, parsed to HTML tree")
-            else:
-                tree = downloaded
-                logger.debug(f"Downloaded is already a tree object")
-                
-            # Look for og:title meta tag
-            og_title_elements = tree.xpath('//meta[@property="og:title"]/@content')
-            logger.debug(f"OG title elements: {og_title_elements}")
-            
-            if og_title_elements and og_title_elements[0]:
-                logger.info(f"Using Open Graph title: {og_title_elements[0]}")
-                return og_title_elements[0]
-        except Exception as e:
-            logger.warning(f"Failed to extract og:title from tree: {str(e)}")
+        # First try the Open Graph title
+        og_title = document.og("title")
+        if og_title:
+            logger.info(f"Using Open Graph title: {og_title}")
+            return og_title
         
         # Fall back to trafilatura's metadata extraction
-        logger.debug("Falling back to trafilatura metadata extraction")
-        metadata = trafilatura.metadata.extract_metadata(downloaded)
-        # Get title
+        logger.debug("Falling back to trafilatura metadata title")
+        metadata = document.metadata
         title = (metadata.title if metadata else None) or "Untitled Article"
         logger.info(f"Using trafilatura title: {title}")
         return title
@@ -118,56 +161,29 @@ class ParserService:
         Returns:
             Plain text without markdown formatting, links, or images
         """
-        import re
-        
-        if not text:
-            return ""
-            
-        # Remove images: ![alt text](url)
-        text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
-        
-        # Remove links but keep the text: [text](url) -> text
-        text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-        
-        # Remove headers: # Header -> Header
-        text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
-        
-        # Remove bold and italic: **bold** -> bold, *italic* -> italic
-        text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-        text = re.sub(r'\*(.*?)\*', r'\1', text)
-        
-        # Remove code blocks and inline code
-        text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)
-        text = re.sub(r'`(.*?)`', r'\1', text)
-        
-        # Remove blockquotes: > quote -> quote
-        text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
-        
-        # Remove horizontal rules: ---, ***, ___
-        text = re.sub(r'^(---|\*\*\*|___)$', '', text, flags=re.MULTILINE)
-        
-        # Remove HTML tags
-        text = re.sub(r'<[^>]*>', '', text)
-        
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return strip_markdown(text)
         
     @staticmethod
-    def _extract_metadata(downloaded, content: str, title: str, source_url: str) -> tuple[str, ArticleMetadata]:
+    def _extract_metadata(
+        document: ParsedDocument,
+        content: Union[str, NormalizedText],
+        title: str,
+        source_url: str
+    ) -> tuple[str, ArticleMetadata]:
         """Extract and process article metadata
         
         Args:
-            downloaded: The downloaded HTML content
-            content: The extracted markdown content
+            document: The parsed document context holding the trafilatura metadata
+            content: The post-processed markdown content, or its NormalizedText
             title: The already extracted title
             source_url: The source URL
             
         Returns:
             Tuple of (description, ArticleMetadata)
         """
-        metadata = trafilatura.metadata.extract_metadata(downloaded)
+        if isinstance(content, str):
+            content = NormalizedText(content)
+        metadata = document.metadata
         
         # Get description
         if metadata and metadata.description:
@@ -175,23 +191,45 @@ class ParserService:
             description = ParserService._strip_markdown(metadata.description)
         else:
             # Otherwise use the first part of the content, stripped of markdown
-            plain_content = ParserService._strip_markdown(content)
+            plain_content = content.plain_text
             description = plain_content[:90] + "..." if plain_content else "No description available"
         
         # Calculate reading time (300 words per minute)
-        word_count = len(content.split())
-        reading_time = word_count // 300 + 1
+        stats = ParserService._content_stats(content)
+        reading_time = stats.word_count // 300 + 1
         
         # Create metadata object
         article_metadata = ArticleMetadata(
             source_url=source_url,
             author=metadata.author if metadata else None,
             publish_date=ParserService._parse_date(metadata.date) if metadata and metadata.date else None,
-            reading_time=reading_time
+            reading_time=reading_time,
+            stats=stats
         )
         
         return description, article_metadata
 
+    @staticmethod
+    def _content_stats(content: NormalizedText) -> ContentStats:
+        """Word and character counts and the block table of the content, from one pass over its blocks"""
+        offsets, words_before, kinds = [], [], []
+        word_count = 0
+        for block in content.blocks:
+            offsets.append(block.offset)
+            words_before.append(word_count)
+            kinds.append(block.kind)
+            word_count += block.words
+        return ContentStats(
+            word_count=word_count,
+            char_count=len(content.markdown),
+            plain_text_length=len(content.plain_text),
+            blocks=ContentBlocks(
+                offsets=utf16_offsets(content.markdown, offsets),
+                words_before=words_before,
+                kinds="".join(kinds)
+            )
+        )
+
     @staticmethod
     def _remove_duplicate_title(text: str, title: str, is_content: bool = True) -> str:
         """Remove duplicate title or H1 heading from text if it matches the title.
@@ -206,77 +244,14 @@ class ParserService:
         Returns:
             Processed text with duplicate title/heading removed if present
         """
-        import re
-        import string
-        
-        # Normalize the title for comparison
-        def normalize_text(t):
-            # Convert to lowercase and remove punctuation
-            t = t.lower()
-            t = ''.join(c for c in t if c not in string.punctuation)
-            # Remove extra whitespace
-            t = ' '.join(t.split())
-            return t
-        
-        normalized_title = normalize_text(title)
-        normalized_text = normalize_text(text)
-        
-        logger.debug(f"Original {'content' if is_content else 'description'}: '{text[:100]}...'")
-        logger.debug(f"Title: '{title}'")
-        
-        # First check if text starts with an H1 heading that matches the title
-        h1_pattern = r'^# (.+?)(?:\n\n|\n|\r\n|\r|$)'
-        match = re.match(h1_pattern, text)
-        if match:
-            h1_text = match.group(1)
-            normalized_h1 = normalize_text(h1_text)
-            
-            logger.debug(f"Found H1 heading: '{h1_text}'")
-            logger.debug(f"Normalized H1: '{normalized_h1}'")
-            logger.debug(f"Normalized title: '{normalized_title}'")
-            
-            # If the normalized H1 matches the normalized title, remove it
-            if normalized_h1 == normalized_title:
-                text = text[match.end():].lstrip()
-                logger.info(f"Removed H1 heading from {'content' if is_content else 'description'}")
-                logger.debug(f"After H1 removal: '{text[:100]}...'")
-                return text
-        
-        # For descriptions only, also check if it starts with the title text
-        if not is_content:
-            # Check if description starts with the title (case-insensitive)
-            if text.startswith(title) or normalized_text.startswith(normalized_title):
-                # For exact match, remove the exact title
-                if text.startswith(title):
-                    text = text[len(title):].lstrip()
-                # For normalized match, find where the normalized title ends in the normalized text
-                else:
-                    # Find the length of the title in the original text
-                    title_end_pos = len(normalized_title)
-                    # Find the corresponding position in the original text
-                    char_count = 0
-                    pos = 0
-                    for i, char in enumerate(text):
-                        if char_count >= title_end_pos:
-                            pos = i
-                            break
-                        # Only count characters that would be in the normalized text
-                        if char.lower() not in string.punctuation and not (char.isspace() and char_count > 0 and text[i-1].isspace()):
-                            char_count += 1
-                    
-                    text = text[pos:].lstrip()
-                
-                # If description starts with common separators, remove them
-                text = re.sub(r'^[:\-–—\s]+', '', text)
-                logger.info(f"Removed title from beginning of description")
-                logger.debug(f"After title removal: '{text[:100]}...'")
-        
-        return text
-
+        return remove_duplicate_title(text, title, is_content)
 
     @staticmethod
-    def _fetch_html_content(url: str) -> str:
-        """Fetch HTML content from a URL.
+    async def _fetch_html_content(url: str) -> str:
+        """Stream HTML content from a URL using the shared pooled async client.
+        
+        The Content-Type is checked before any of the body is read, and the
+        download is aborted once the decompressed body exceeds FETCH_MAX_BYTES.
         
         Args:
             url: The URL to fetch content from
@@ -285,7 +260,8 @@ class ParserService:
             The HTML content as a string
             
         Raises:
-            HTTPException: If there's an error fetching the content
+            HTTPException: If there's an error fetching the content, the URL is
+                not an HTML page (415) or the page is too large (413)
         """
         logger.info(f"Fetching content from URL: {url}")
         try:
@@ -294,9 +270,8 @@ class ParserService:
                 "User-Agent": ParserService._get_random_user_agent(),
                 "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
                 "Accept-Language": "en-US,en;q=0.5",
-                "Accept-Encoding": "gzip, deflate, br",
+                "Accept-Encoding": supported_content_encodings(),
                 "DNT": "1",
-                "Connection": "keep-alive",
                 "Upgrade-Insecure-Requests": "1",
                 "Sec-Fetch-Dest": "document",
                 "Sec-Fetch-Mode": "navigate",
@@ -308,49 +283,37 @@ class ParserService:
                 "Save-Data": "on"
             }
             
-            # Make the HTTP request with explicit decompression
-            with httpx.Client() as client:
-                response = client.get(url, headers=headers, follow_redirects=True)
-                response.raise_for_status()
-                
-                # Ensure content is properly decoded
-                html_content = response.text
-                
-                # Check if we got valid HTML content
-                if not html_content or html_content.strip().startswith('\x1f\x8b'):
-                    logger.warning(f"Received potentially invalid or binary HTML from {url}")
-                    # Try to force decoding if needed
-                    try:
-                        import gzip
-                        import io
-                        if 'content-encoding' in response.headers and response.headers['content-encoding'] == 'gzip':
-                            logger.info("Attempting manual gzip decompression")
-                            decompressed = gzip.decompress(response.content)
-                            html_content = decompressed.decode('utf-8')
-                    except Exception as e:
-                        logger.error(f"Failed to manually decompress content: {str(e)}")
-                
-                # Handle Brotli compression (used by Substack and other sites)
-                if not html_content or (
-                    'content-encoding' in response.headers and 
-                    response.headers['content-encoding'] == 'br' and
-                    trafilatura.load_html(html_content) is None
-                ):
-                    logger.info("Detected Brotli compression, attempting manual decompression")
-                    try:
-                        import brotli
-                        decompressed = brotli.decompress(response.content)
-                        html_content = decompressed.decode('utf-8')
-                        logger.info("Successfully decompressed Brotli content")
-                    except ImportError:
-                        logger.warning("Brotli module not installed. Install with: pip install brotli")
-                    except Exception as e:
-                        logger.error(f"Failed to decompress Brotli content: {str(e)}")
-                
-                logger.info(f"Successfully fetched URL: {url}")
-                
+            with span("fetch") as fetch_span:
+                for attempt in range(ParserService.FETCH_RETRIES + 1):
+                    # Wait for the domain's turn, then stream the response through the shared pool
+                    async with fetch_scheduler.slot(url):
+                        async with asyncio.timeout(http_client.TOTAL_TIMEOUT):
+                            async with http_client.stream(url, headers=headers) as response:
+                                retry_after = fetch_scheduler.record_status(
+                                    url, response.status_code, response.headers.get("retry-after")
+                                )
+                                if (
+                                    retry_after is not None
+                                    and retry_after <= fetch_scheduler.MAX_WAIT
+                                    and attempt < ParserService.FETCH_RETRIES
+                                ):
+                                    logger.info(f"Retrying {url} after {retry_after:.0f}s as asked by the server")
+                                    continue
+                                response.raise_for_status()
+                                body, content_type = await ParserService._read_html_body(url, response)
+                    break
+                fetch_span.bytes_out = len(body)
+            
+            with span("decode", bytes_in=len(body)) as decode_span:
+                html_content = decode_html(body, charset_from_content_type(content_type))
+                decode_span.bytes_out = len(html_content)
+            
+            logger.info(f"Successfully fetched URL: {url} ({len(body)} bytes)")
+            
             return html_content
             
+        except HTTPException:
+            raise
         except httpx.HTTPStatusError as e:
             # Handle specific HTTP status errors
             if e.response.status_code == 403:
@@ -359,11 +322,18 @@ class ParserService:
                     status_code=403,
                     detail=f"Website is blocking content downloading. The site may have anti-scraping measures in place."
                 )
-            elif e.response.status_code == 500:
-                logger.error(f"Server error (500) while fetching URL: {url}")
+            elif e.response.status_code == 429:
+                logger.error(f"Rate limited (429) while fetching URL: {url}")
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"The website is rate limiting our requests. Please try again later."
+                )
+            elif e.response.status_code >= 500:
+                status_code = e.response.status_code
+                logger.error(f"Server error ({status_code}) while fetching URL: {url}")
                 raise HTTPException(
                     status_code=502,  # Using 502 Bad Gateway to indicate upstream server error
-                    detail=f"The website server returned an error (500). Please try again later."
+                    detail=f"The website server returned an error ({status_code}). Please try again later."
                 )
             else:
                 logger.error(f"HTTP error while fetching URL: {str(e)}")
@@ -371,6 +341,12 @@ class ParserService:
                     status_code=400,
                     detail=f"Failed to fetch URL: {str(e)}"
                 )
+        except (httpx.TimeoutException, TimeoutError) as e:
+            logger.error(f"Timed out while fetching URL {url}: {str(e)}")
+            raise HTTPException(
+                status_code=504,
+                detail=f"The website took too long to respond. Please try again later."
+            )
         except httpx.HTTPError as e:
             logger.error(f"HTTP error while fetching URL: {str(e)}")
             raise HTTPException(
@@ -384,6 +360,52 @@ class ParserService:
                 detail=f"Failed to fetch URL: {str(e)}"
             )
 
+    @staticmethod
+    async def _read_html_body(url: str, response: httpx.Response) -> tuple[bytes, Optional[str]]:
+        """Read a streamed HTML response body within the FETCH_MAX_BYTES budget
+        
+        Returns:
+            Tuple of (decompressed body, Content-Type header)
+        """
+        content_type = response.headers.get("content-type")
+        if not is_html_content_type(content_type):
+            logger.warning(f"Refusing non-HTML content ({content_type}) from {url}")
+            raise HTTPException(
+                status_code=415,
+                detail=f"The link does not point to a web page ({content_type.split(';')[0]})."
+            )
+        
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > ParserService.FETCH_MAX_BYTES:
+            logger.warning(f"Refusing {content_length} byte page from {url}")
+            raise ParserService._page_too_large()
+        
+        # Decompress incrementally so the budget applies to the decoded size
+        decoder = StreamDecoder(response.headers.get("content-encoding"), ParserService.FETCH_MAX_BYTES)
+        body = bytearray()
+        decompress_span = Span(stage="decompress", bytes_in=0)
+        try:
+            async for chunk in response.aiter_raw():
+                decompress_span.bytes_in += len(chunk)
+                wall_start, cpu_start = time.perf_counter(), time.thread_time()
+                body += decoder.decompress(chunk)
+                decompress_span.wall_ms += (time.perf_counter() - wall_start) * 1000
+                decompress_span.cpu_ms += (time.thread_time() - cpu_start) * 1000
+            body += decoder.flush()
+        except DecodedSizeExceeded:
+            logger.warning(f"Aborting download from {url} after {decompress_span.bytes_in} bytes received")
+            raise ParserService._page_too_large()
+        decompress_span.bytes_out = len(body)
+        add_span(decompress_span)
+        return bytes(body), content_type
+
+    @staticmethod
+    def _page_too_large() -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"The page is too large to save (limit is {ParserService.FETCH_MAX_BYTES // (1024 * 1024)} MB)."
+        )
+
     @staticmethod
     def _create_base_filename(article: Article, article_id: str) -> tuple[pathlib.Path, str]:
         """Create storage directory and base filename for local files
@@ -483,43 +505,7 @@ class ParserService:
         Returns:
             Processed content with proper paragraph separation
         """
-        import re
-        
-        # First, normalize all newlines to \n
-        content = content.replace('\r\n', '\n').replace('\r', '\n')
-        
-        # Replace single newlines with double newlines, but preserve existing double newlines
-        # and don't affect list items, code blocks, or other markdown formatting
-        
-        # Step 1: Temporarily mark existing double newlines
-        content = content.replace('\n\n', '§DOUBLE_NEWLINE§')
-        
-        # Step 2: Mark newlines that should be preserved as is (lists, code blocks, etc.)
-        # Lists
-        content = re.sub(r'\n([\*\-\+\d]+\. )', '§PRESERVE_NEWLINE§\\1', content)
-        # Code blocks
-        content = re.sub(r'\n(```|    )', '§PRESERVE_NEWLINE§\\1', content)
-        # Headers
-        content = re.sub(r'\n(#{1,6} )', '§PRESERVE_NEWLINE§\\1', content)
-        # Inline formatting (emphasis, bold, etc.)
-        content = re.sub(r'\n(\*[^\n]+?\*)', '§PRESERVE_NEWLINE§\\1', content)
-        content = re.sub(r'\n(\*\*[^\n]+?\*\*)', '§PRESERVE_NEWLINE§\\1', content)
-        # Links
-        content = re.sub(r'\n(\[[^\]]+\]\([^)]+\))', '§PRESERVE_NEWLINE§\\1', content)
-        
-        # Step 3: Replace remaining single newlines with double newlines
-        content = content.replace('\n', '\n\n')
-        
-        # Step 4: Restore preserved newlines
-        content = content.replace('§PRESERVE_NEWLINE§', '\n')
-        
-        # Step 5: Restore original double newlines
-        content = content.replace('§DOUBLE_NEWLINE§', '\n\n')
-        
-        # Step 6: Clean up any excessive newlines (more than 2)
-        content = re.sub(r'\n{3,}', '\n\n', content)
-        
-        return content
+        return ensure_paragraph_separation(content)
 
     @staticmethod
     def _preprocess_html_content(html_content: str) -> str:
@@ -549,35 +535,74 @@ class ParserService:
         
 
     @staticmethod
-    def _extract_content(html_content: str) -> tuple[Any, str]:
-        """Extract content from HTML using trafilatura.
+    def _extract_content(document: ParsedDocument) -> str:
+        """Extract content from the parsed document.
+        
+        Pages from platforms with a site extractor (matched by domain or HTML
+        fingerprint) are read from their known article container; everything
+        else, and any page a site extractor cannot handle, goes through trafilatura.
         
         Args:
-            html_content: The HTML content to parse
+            document: The parsed document context
             
         Returns:
-            Tuple of (downloaded_tree, extracted_content)
+            The extracted markdown content
             
         Raises:
             HTTPException: If content extraction fails
         """
-        # Configure trafilatura
-        config = use_config()
-        config.set("DEFAULT", "EXTRACTION_TIMEOUT", "30")
-        config.set("DEFAULT", "MIN_EXTRACTED_SIZE", "100")
-        config.set("DEFAULT", "FAVOR_PRECISION", "True")
-        
-        # Extract content
-        downloaded = trafilatura.load_html(html_content)
-        content = trafilatura.extract(
-            downloaded,
-            output_format='markdown',
-            include_images=True,
-            include_links=True,
-            include_formatting=True,
-            favor_precision=True,
-            config=config
-        )
+        site_content = site_extractors.extract(document, document.url)
+        if site_content is not None:
+            document.extractor, content = site_content
+            document.metadata = ParserService._extract_site_metadata(document)
+            logger.info(f"Extracted content with the {document.extractor} extractor")
+            return content
+        return ParserService._extract_generic_content(document)
+
+    @staticmethod
+    def _extract_site_metadata(document: ParsedDocument) -> Optional[Any]:
+        """Read trafilatura metadata for content that came from a site extractor.
+        
+        Platform pages carry their author and date in meta tags, so htmldate's
+        extensive search (most of the cost on pages without them) is skipped.
+        """
+        try:
+            return extract_metadata(document.tree, fastmode=True)
+        except Exception as e:
+            logger.warning(f"Failed to extract metadata: {str(e)}")
+            return None
+
+    @staticmethod
+    def _extract_generic_content(document: ParsedDocument) -> str:
+        """Extract content from the parsed document using trafilatura.
+        
+        Metadata is extracted in the same pass and stored on the document.
+        Note that trafilatura cleans the document tree in place.
+        
+        Args:
+            document: The parsed document context
+            
+        Returns:
+            The extracted markdown content
+            
+        Raises:
+            HTTPException: If content extraction fails
+        """
+        content = None
+        if document.tree is not None:
+            extracted = trafilatura.bare_extraction(
+                document.tree,
+                output_format='markdown',
+                include_images=True,
+                include_links=True,
+                include_formatting=True,
+                favor_precision=True,
+                as_dict=False,
+                config=TRAFILATURA_CONFIG
+            )
+            if extracted is not None:
+                document.metadata = extracted
+                content = determine_returnstring(extracted, 'markdown', True, False)
         
         if not content:
             logger.error("Failed to extract content from HTML")
@@ -586,7 +611,21 @@ class ParserService:
                 detail="Could not extract content from this website. The page structure may not be supported or may require JavaScript to load content."
             )
             
-        return downloaded, content
+        return content
+
+    @staticmethod
+    def _normalize_content(content: str, title: str, separate_paragraphs: bool = True) -> NormalizedText:
+        """Post-process the extracted content in a single pass.
+        
+        Args:
+            content: The extracted markdown content
+            title: The article title
+            separate_paragraphs: False for content from a site extractor, which is already separated
+            
+        Returns:
+            NormalizedText with the post-processed markdown and its plain text
+        """
+        return normalize_article(content, title, separate_paragraphs)
 
     @staticmethod
     def _post_process_content(content: str, title: str) -> str:
@@ -599,18 +638,353 @@ class ParserService:
         Returns:
             The post-processed content
         """
-        # Ensure paragraphs have double newlines
-        content = ParserService._ensure_paragraph_separation(content)
+        return normalize_article(content, title).markdown
+
+    @staticmethod
+    def _run_extraction_pipeline(html_content: str, url: str, preprocessed: bool = False) -> ExtractionResult:
+        """Run the full HTML -> markdown + metadata pipeline.
         
-        # Remove duplicate H1 heading if it matches the title
-        content = ParserService._remove_duplicate_title(content, title, is_content=True)
+        This is CPU-bound and is executed in the extraction executor, off the event loop.
         
-        return content
+        Args:
+            html_content: The fetched HTML content
+            url: The source URL
+            preprocessed: Whether html_content already went through _preprocess_html_content
+            
+        Returns:
+            ExtractionResult with title, content, description and metadata
+            
+        Raises:
+            HTTPException: If content extraction fails
+        """
+        with collect_spans() as spans:
+            if not preprocessed:
+                with span("preprocess", bytes_in=len(html_content)):
+                    html_content = ParserService._preprocess_html_content(html_content)
+            
+            # Build the lxml tree once and share it across all stages
+            with span("parse_tree", bytes_in=len(html_content)):
+                document = ParsedDocument(html_content, url=url)
+            with span("extract_content") as extract_span:
+                content = ParserService._extract_content(document)
+                extract_span.bytes_out = len(content)
+            
+            with span("extract_title"):
+                title = ParserService._extract_title(document)
+            with span("post_process", bytes_in=len(content)) as post_process_span:
+                normalized = ParserService._normalize_content(
+                    content, title, separate_paragraphs=document.extractor == GENERIC_EXTRACTOR
+                )
+                post_process_span.bytes_out = len(normalized.markdown)
+            with span("extract_metadata"):
+                description, article_metadata = ParserService._extract_metadata(document, normalized, title, url)
+        
+        return ExtractionResult(
+            title=title,
+            content=normalized.markdown,
+            description=description,
+            metadata=article_metadata,
+            spans=spans
+        )
+
+    @staticmethod
+    def _prepare_extraction(html_content: str) -> tuple[str, str]:
+        """Preprocess fetched HTML and compute its extraction cache key
+        
+        Returns:
+            Tuple of (preprocessed HTML, cache key)
+        """
+        html_content = ParserService._preprocess_html_content(html_content)
+        return html_content, extraction_cache_key(html_content, EXTRACTOR_VERSION)
+
+    @staticmethod
+    async def _extract_article(html_content: str, url: str) -> ExtractionResult:
+        """Extract a fetched page, reusing a cached result for byte-identical content"""
+        with span("preprocess", bytes_in=len(html_content)):
+            html_content, cache_key = await asyncio.to_thread(ParserService._prepare_extraction, html_content)
+        
+        with span("cache_lookup"):
+            extraction = await extraction_cache.get(cache_key, url)
+        if extraction is not None:
+            return extraction
+        
+        with span("extraction", bytes_in=len(html_content)) as extraction_span:
+            extraction = await extraction_executor.run(
+                ParserService._run_extraction_pipeline, html_content, url, True
+            )
+            extraction_span.bytes_out = len(extraction.content)
+        # Stage timings measured inside the extraction worker
+        for worker_span in extraction.spans:
+            add_span(worker_span)
+        
+        with span("cache_store"):
+            await extraction_cache.put(cache_key, extraction)
+        return extraction
+
+    @staticmethod
+    async def _get_or_create_article(url: str) -> tuple[ObjectId, str]:
+        """Return (article_id, type) for a URL, parsing and storing it if needed
+        
+        Articles are matched by canonical URL. Concurrent calls for the same
+        canonical URL are coalesced in-process, and a Mongo lease keyed by it
+        makes other processes wait for the same result, so every caller
+        receives the same article_id.
+        """
+        canonical_url = canonicalize_url(url)
+        return await ParserService._single_flight.do(
+            canonical_url, lambda: ParserService._get_or_create_article_leased(url, canonical_url)
+        )
+
+    @staticmethod
+    async def _find_article_by_canonical_url(canonical_url: str) -> Optional[dict]:
+        with span("find_article"):
+            existing_article = await articles.find_one(
+                {"metadata.canonical_url": canonical_url},
+                BOOKMARK_PROJECTION
+            )
+        if not existing_article:
+            return None
+        logger.info(f"Found existing article for URL: {canonical_url}")
+        return existing_article
+
+    @staticmethod
+    def _article_ref(article: dict) -> tuple[ObjectId, str]:
+        return article["_id"], article.get("type", "article")
+
+    @staticmethod
+    def _retry_due(article: dict) -> bool:
+        """Whether a stored bookmark's backoff has elapsed, so its page should be fetched again"""
+        if article.get("type") != "bookmark":
+            return False
+        next_attempt_at = (article.get("retry") or {}).get("next_attempt_at")
+        return next_attempt_at is not None and next_attempt_at <= datetime.utcnow()
+
+    @staticmethod
+    def _retry_state(url: str, error: Exception, attempts: int) -> dict:
+        """Negative cache entry stored on a bookmark after a failed parse
+        
+        Transient failures get a next attempt after an exponential backoff
+        with jitter, pushed back further while the domain itself is backing
+        off. Permanent failures and exhausted retries get none.
+        """
+        status_code = error.status_code if isinstance(error, HTTPException) else None
+        now = datetime.utcnow()
+        next_attempt_at = None
+        if status_code in RETRYABLE_STATUS_CODES and attempts < ParserService.BOOKMARK_RETRY_MAX_ATTEMPTS:
+            delay = min(
+                ParserService.BOOKMARK_RETRY_MAX_DELAY,
+                ParserService.BOOKMARK_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+            ) * random.uniform(1.0, 1.25)
+            delay = max(delay, fetch_scheduler.backoff_remaining(url))
+            next_attempt_at = now + timedelta(seconds=delay)
+        return {
+            "attempts": attempts,
+            "status_code": status_code,
+            "error": error.detail if isinstance(error, HTTPException) else str(error),
+            "failed_at": now,
+            "next_attempt_at": next_attempt_at
+        }
+
+    @staticmethod
+    async def _get_or_create_article_leased(url: str, canonical_url: str) -> tuple[ObjectId, str]:
+        """Find the article for a URL or create it while holding the URL's parse lease
+        
+        A bookmark whose retry backoff has elapsed is parsed again in place;
+        until then it is returned as is, without fetching the page.
+        """
+        while True:
+            existing = await ParserService._find_article_by_canonical_url(canonical_url)
+            if existing and not ParserService._retry_due(existing):
+                return ParserService._article_ref(existing)
+            
+            token = await ParserService._parse_lease.try_acquire(canonical_url)
+            if token:
+                try:
+                    # Renewed while the parse runs, which can outlast the lease TTL (fetch retries, extraction)
+                    async with ParserService._parse_lease.keep_alive(canonical_url, token):
+                        # Another process may have stored (or retried) the article just before we took the lease
+                        existing = await ParserService._find_article_by_canonical_url(canonical_url)
+                        if existing and not ParserService._retry_due(existing):
+                            return ParserService._article_ref(existing)
+                        if existing:
+                            return await ParserService._retry_bookmark(existing, url, canonical_url)
+                        return await ParserService._create_article(url, canonical_url)
+                finally:
+                    await ParserService._parse_lease.release(canonical_url, token)
+            
+            logger.info(f"URL is being parsed by another worker, waiting: {url}")
+            await asyncio.sleep(ParserService.PARSE_LEASE_POLL_INTERVAL)
+
+    @staticmethod
+    async def _parse_article_document(
+        url: str, canonical_url: str, attempts: int = 1
+    ) -> tuple[dict, Optional[Article], Optional[str]]:
+        """Fetch and extract a page into an article document, or a bookmark document on failure
+        
+        Returns:
+            Tuple of (document to store, Article if parsing succeeded, fetched HTML if any)
+        """
+        article = None
+        html_content = None
+        snapshot_hash = None
+        try:
+            # Fetch article and run extraction off the event loop, archiving the raw page meanwhile
+            html_content = await ParserService._fetch_html_content(url)
+            snapshot = asyncio.ensure_future(ParserService._save_snapshot(html_content))
+            try:
+                extraction = await ParserService._extract_article(html_content, url)
+            finally:
+                snapshot_hash = await snapshot
+            extraction.metadata.canonical_url = canonical_url
+            
+            article = Article(
+                title=extraction.title,
+                content=extraction.content,
+                short_description=extraction.description,
+                metadata=extraction.metadata,
+                type="article",
+                snapshot_hash=snapshot_hash,
+                extractor_version=EXTRACTOR_VERSION
+            )
+            # The body is stored separately, under the article's _id
+            article_dict = article.model_dump(by_alias=True, exclude={"id", "content"})
+            article_dict["_id"] = ObjectId()
+            return article_dict, article, html_content
+            
+        except Exception as e:
+            logger.error(f"Parser failed for URL: {url}, storing minimal article. Error: {str(e)}")
+            # Store only source_url and created_at, and set type to 'bookmark'
+            return {
+                "metadata": {"source_url": url, "canonical_url": canonical_url},
+                "created_at": datetime.utcnow(),
+                "type": "bookmark",
+                # Keep the page if it was fetched, so the bookmark can be re-extracted later
+                "snapshot_hash": snapshot_hash,
+                "retry": ParserService._retry_state(url, e, attempts)
+            }, None, html_content
+
+    @staticmethod
+    async def _create_article(url: str, canonical_url: str) -> tuple[ObjectId, str]:
+        """Fetch, extract and store a new article, falling back to a bookmark on failure"""
+        logger.info(f"No existing article found for URL: {url}, proceeding with parsing")
+        article_dict, article, html_content = await ParserService._parse_article_document(url, canonical_url)
+        article_type = article_dict["type"]
+        
+        # Store the body first, so the article is never visible without it
+        if article is not None:
+            with span("save_body", bytes_in=len(article.content or "")):
+                await article_body_store.save(article_dict["_id"], article.content)
+        
+        try:
+            with span("insert_article"):
+                result = await articles.insert_one(article_dict)
+        except DuplicateKeyError:
+            # The unique canonical_url index caught a concurrent insert of the same page
+            if article is not None:
+                await article_body_store.delete(article_dict["_id"])
+            existing = await ParserService._find_article_by_canonical_url(canonical_url)
+            if not existing:
+                raise
+            return ParserService._article_ref(existing)
+        article_id = result.inserted_id
+        
+        # Save local files if in development environment and parsing succeeded
+        if ParserService.IS_DEV_ENVIRONMENT and article is not None:
+            await asyncio.to_thread(ParserService._save_html_file, html_content, article, str(article_id))
+            await asyncio.to_thread(ParserService._save_markdown_file, article, str(article_id))
+        
+        return article_id, article_type
+
+    @staticmethod
+    async def _retry_bookmark(bookmark: dict, url: str, canonical_url: str) -> tuple[ObjectId, str]:
+        """Parse a bookmark's page again, upgrading it to an article in place on success
+        
+        The bookmark keeps its _id, so every user's link to it now points at
+        the article. Must be called while holding the URL's parse lease.
+        """
+        attempts = (bookmark.get("retry") or {}).get("attempts", 0) + 1
+        logger.info(f"Retrying parse of bookmark {bookmark['_id']} (attempt {attempts}): {url}")
+        article_dict, article, html_content = await ParserService._parse_article_document(
+            url, canonical_url, attempts
+        )
+        
+        if article is None:
+            update = {"retry": article_dict["retry"]}
+            if article_dict["snapshot_hash"]:
+                update["snapshot_hash"] = article_dict["snapshot_hash"]
+            await articles.update_one({"_id": bookmark["_id"]}, {"$set": update})
+            article_cache.invalidate(bookmark["_id"])
+            return bookmark["_id"], "bookmark"
+        
+        # Keep the original _id and save time
+        del article_dict["_id"], article_dict["created_at"]
+        with span("save_body", bytes_in=len(article.content or "")):
+            await article_body_store.save(bookmark["_id"], article.content)
+        with span("upgrade_bookmark"):
+            await articles.update_one(
+                {"_id": bookmark["_id"]},
+                {"$set": dict(article_dict, upgraded_at=datetime.utcnow()), "$unset": {"retry": ""}}
+            )
+        article_cache.invalidate(bookmark["_id"])
+        article_content_cache.invalidate(bookmark["_id"])
+        # Everyone who saved the bookmark now lists it with its title
+        await library_versions.bump_readers([bookmark["_id"]])
+        logger.info(f"Upgraded bookmark {bookmark['_id']} to an article: {url}")
+        
+        if ParserService.IS_DEV_ENVIRONMENT:
+            await asyncio.to_thread(ParserService._save_html_file, html_content, article, str(bookmark["_id"]))
+            await asyncio.to_thread(ParserService._save_markdown_file, article, str(bookmark["_id"]))
+        
+        return bookmark["_id"], "article"
+
+    @staticmethod
+    async def _save_snapshot(html_content: str) -> Optional[str]:
+        """Archive the raw page in the snapshot store, returning its hash"""
+        with span("snapshot", bytes_in=len(html_content)):
+            return await snapshot_store.save(html_content)
+
+    @staticmethod
+    async def _link_user_article(user_id: str, article_id: ObjectId) -> ObjectId:
+        """Return the user's link to an article, creating it if needed"""
+        # Check if user article relationship exists
+        existing_user_article = await user_articles.find_one({
+            "user_id": ObjectId(user_id),
+            "article_id": article_id
+        })
+        
+        if existing_user_article:
+            logger.info(f"Found existing user-article relationship for user {user_id}")
+            return existing_user_article["_id"]
+        
+        logger.info(f"Creating new user-article relationship for user {user_id}")
+        # Create user article relationship
+        user_article_data = {
+            "user_id": ObjectId(user_id),
+            "article_id": article_id,
+            "progress": {"percentage": 0, "last_position": 0},
+            "timestamps": {"saved_at": datetime.utcnow()}
+        }
+        try:
+            result = await user_articles.insert_one(user_article_data)
+            await library_versions.bump(user_id)
+            return result.inserted_id
+        except DuplicateKeyError:
+            # A concurrent request of the same user linked the article first
+            existing_user_article = await user_articles.find_one({
+                "user_id": ObjectId(user_id),
+                "article_id": article_id
+            })
+            if not existing_user_article:
+                raise
+            return existing_user_article["_id"]
 
     @staticmethod
     async def parse_url(url: str, user_id: str) -> dict:
         """Parse URL and return the article and user article IDs
         
+        Stage timings are collected into the current parse trace and logged
+        when the outermost trace ends.
+        
         Args:
             url: The URL to parse
             user_id: User ID to create/get user article relationship (required)
@@ -621,93 +995,28 @@ class ParserService:
         Raises:
             HTTPException: If there's an error fetching or parsing the content
         """
-        article_type = "article"
-        try:
-            # First check if article already exists
-            existing_article = await articles.find_one({"metadata.source_url": url})
-            article_id = None
-            
-            if existing_article:
-                logger.info(f"Found existing article for URL: {url}")
-                article_id = existing_article["_id"]
-                article_type = existing_article.get("type", "article")
-            else:
-                logger.info(f"No existing article found for URL: {url}, proceeding with parsing")
-                try:
-                    # Fetch and parse article
-                    html_content = ParserService._fetch_html_content(url)
-                    html_content = ParserService._preprocess_html_content(html_content)
-                    downloaded, content = ParserService._extract_content(html_content)
-                    
-                    # Extract and process article data
-                    title = ParserService._extract_title(downloaded, html_content)
-                    content = ParserService._post_process_content(content, title)
-                    description, article_metadata = ParserService._extract_metadata(downloaded, content, title, url)
-                    
-                    # Create and save article
-                    article_type = "article"
-                    article = Article(
-                        title=title,
-                        content=content,
-                        short_description=description,
-                        metadata=article_metadata,
-                        type=article_type
-                    )
-                    article_dict = article.model_dump(by_alias=True, exclude={"id"})
-                    
-                except Exception as e:
-                    logger.error(f"Parser failed for URL: {url}, storing minimal article. Error: {str(e)}")
-                    # Store only source_url and created_at, and set type to 'bookmark'
-                    article_type = "bookmark"
-                    article_dict = {
-                        "metadata": {"source_url": url},
-                        "created_at": datetime.utcnow(),
-                        "type": article_type
-                    }
-                    
-                result = await articles.insert_one(article_dict)
-                article_id = result.inserted_id
+        with parse_trace(url):
+            try:
+                # Concurrent parses of the same URL share one fetch and extraction
+                article_id, article_type = await ParserService._get_or_create_article(url)
                 
-                # Save local files if in development environment and parsing succeeded
-                if ParserService.IS_DEV_ENVIRONMENT and 'article' in locals():
-                    ParserService._save_html_file(html_content, article, str(article_id))
-                    ParserService._save_markdown_file(article, str(article_id))
-            
-            # Check if user article relationship exists
-            existing_user_article = await user_articles.find_one({
-                "user_id": ObjectId(user_id),
-                "article_id": article_id
-            })
-            
-            if existing_user_article:
-                logger.info(f"Found existing user-article relationship for user {user_id}")
-                user_article_id = existing_user_article["_id"]
-            else:
-                logger.info(f"Creating new user-article relationship for user {user_id}")
-                # Create user article relationship
-                user_article_data = {
-                    "user_id": ObjectId(user_id),
-                    "article_id": article_id,
-                    "progress": {"percentage": 0, "last_position": 0},
-                    "timestamps": {"saved_at": datetime.utcnow()}
+                with span("link_user_article"):
+                    user_article_id = await ParserService._link_user_article(user_id, article_id)
+                
+                return {
+                    "article_id": str(article_id),
+                    "user_article_id": str(user_article_id),
+                    "type": article_type,
                 }
-                result = await user_articles.insert_one(user_article_data)
-                user_article_id = result.inserted_id
             
-            return {
-                "article_id": str(article_id),
-                "user_article_id": str(user_article_id),
-                "type": article_type,
-            }
-        
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error parsing URL {url}: {str(e)}", exc_info=True)
-            raise HTTPException(
-                status_code=400,
-                detail=str(e)
-            )
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error parsing URL {url}: {str(e)}", exc_info=True)
+                raise HTTPException(
+                    status_code=400,
+                    detail=str(e)
+                )
 
     @staticmethod
     async def _check_daily_article_limit(user_id: str) -> None:
@@ -741,32 +1050,56 @@ class ParserService:
             )
 
     @staticmethod
-    async def handle_parse_request(url: str, user_id: str) -> dict:
-        """Handle complete article parsing flow including user creation and error handling"""
-        logger.info(f"Handling parse request for URL: {url} from user: {user_id}")
-        try:
+    async def prepare_parse_request(user_id: str) -> str:
+        """Resolve the Telegram user for a parse request and enforce the daily limit
+        
+        Args:
+            user_id: The Telegram user ID sent by the client
+            
+        Returns:
+            The internal user ID
+            
+        Raises:
+            HTTPException: If the daily limit is exceeded
+        """
+        with span("prepare_user"):
             # Get or create user
             user = await get_or_create_by_telegram_id(user_id)
             actual_user_id = str(user.id)
             
             # Check daily article limit
             await ParserService._check_daily_article_limit(actual_user_id)
+        
+        return actual_user_id
 
-            # Parse URL and get article and user article IDs
-            result = await ParserService.parse_url(url, actual_user_id)
-            
-            return {
-                "article_id": result["article_id"],
-                "user_article_id": result["user_article_id"],
-                "url": url,
-                "type": result["type"]
-            }
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Failed to process parse request for URL: {url}", exc_info=True)
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to parse article: {str(e)}"
-            ) 
\ No newline at end of file
+    @staticmethod
+    async def parse_for_user(url: str, actual_user_id: str) -> dict:
+        """Parse URL for an already resolved internal user and build the parse response"""
+        result = await ParserService.parse_url(url, actual_user_id)
+        
+        return {
+            "article_id": result["article_id"],
+            "user_article_id": result["user_article_id"],
+            "url": url,
+            "type": result["type"]
+        }
+
+    @staticmethod
+    async def handle_parse_request(url: str, user_id: str) -> dict:
+        """Handle complete article parsing flow including user creation and error handling"""
+        logger.info(f"Handling parse request for URL: {url} from user: {user_id}")
+        with parse_trace(url):
+            try:
+                actual_user_id = await ParserService.prepare_parse_request(user_id)
+                
+                # Parse URL and get article and user article IDs
+                return await ParserService.parse_for_user(url, actual_user_id)
+                
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to process parse request for URL: {url}", exc_info=True)
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to parse article: {str(e)}"
+                ) 
\ No newline at end of file
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+
+from ..database import article_bodies, articles, parse_locks, reextraction_runs
+from ..models.reextraction_run import ReextractionRun
+from ..services.article_body_store import article_body_store
+from ..services.article_cache import article_cache
+from ..services.article_content_cache import article_content_cache
+from ..services.library_version import library_versions
+from ..services.extraction_executor import extraction_executor
+from ..services.parser_service import EXTRACTOR_VERSION, ParserService
+from ..services.single_flight import MongoLease
+from ..services.snapshot_store import snapshot_store
+
+logger = logging.getLogger(__name__)
+
+# Article fields a re-extraction needs (the stored content itself is never read)
+ARTICLE_PROJECTION = {"metadata": 1, "type": 1, "snapshot_hash": 1, "extractor_version": 1}
+
+
+class ReextractionService:
+    """Re-runs extraction over stored articles after the pipeline changes.
+
+    Articles produced by an older EXTRACTOR_VERSION are visited in _id order,
+    in batches, from their archived HTML snapshot (or, with refetch, from a
+    fresh fetch when there is no snapshot). Bookmarks left by failed parses are
+    upgraded to articles when extraction now succeeds. Results are written back
+    with one bulk_write per batch and the position is checkpointed in the
+    reextraction_runs collection, so a stopped or crashed run resumes where
+    it left off. A Mongo lease keeps two processes from running the same run.
+    """
+    # Articles read and written per batch
+    BATCH_SIZE = int(os.getenv("REEXTRACT_BATCH_SIZE", 100))
+
+    # Extractions in flight at once for the background run (the CLI passes the pool size)
+    CONCURRENCY = int(os.getenv("REEXTRACT_CONCURRENCY", 2))
+
+    # Pause between batches in seconds, to leave room for live traffic
+    BATCH_PAUSE = float(os.getenv("REEXTRACT_BATCH_PAUSE", 1.0))
+
+    # How often to check whether the extraction workers have a free slot
+    THROTTLE_INTERVAL = 0.2
+
+    LEASE_SECONDS = 300
+
+    def __init__(self):
+        self._lease = MongoLease(parse_locks, self.LEASE_SECONDS)
+        self._task: Optional[asyncio.Task] = None
+        self._stop_requested = False
+
+    @staticmethod
+    def run_id(bookmarks_only: bool = False) -> str:
+        return f"{EXTRACTOR_VERSION}:{'bookmarks' if bookmarks_only else 'all'}"
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def get_run(self, bookmarks_only: bool = False) -> Optional[ReextractionRun]:
+        """Checkpoint of the run for the current extractor version"""
+        run = await reextraction_runs.find_one({"_id": self.run_id(bookmarks_only)})
+        return ReextractionRun(**run) if run else None
+
+    async def _wait_for_capacity(self) -> None:
+        """Only submit work while an extraction worker is free, so live parses never queue behind a batch"""
+        while extraction_executor.in_flight >= max(1, extraction_executor.WORKERS):
+            await asyncio.sleep(self.THROTTLE_INTERVAL)
+
+    async def _load_html(self, article: dict, refetch: bool) -> tuple[Optional[str], Optional[str]]:
+        """Return (html, snapshot hash) for an article, fetching the page if allowed and not archived"""
+        snapshot_hash = article.get("snapshot_hash")
+        if snapshot_hash:
+            html = await snapshot_store.load(snapshot_hash)
+            if html is not None:
+                return html, snapshot_hash
+            logger.warning(f"Snapshot {snapshot_hash} of article {article['_id']} is missing")
+        if not refetch:
+            return None, snapshot_hash
+        html = await ParserService._fetch_html_content(article["metadata"]["source_url"])
+        return html, await snapshot_store.save(html)
+
+    async def reextract_article(
+        self, article: dict, refetch: bool = False
+    ) -> tuple[str, Optional[UpdateOne], Optional[UpdateOne]]:
+        """Re-extract one article.
+
+        Returns:
+            Tuple of (outcome, article update, body update) where outcome is
+            "updated", "upgraded", "skipped" or "failed" and the updates are
+            the writes to apply, if any
+        """
+        metadata = article.get("metadata", {})
+        source_url = metadata.get("source_url")
+        if not source_url:
+            return "skipped", None, None
+        try:
+            html, snapshot_hash = await self._load_html(article, refetch)
+            if html is None:
+                return "skipped", None, None
+            await self._wait_for_capacity()
+            extraction = await extraction_executor.run(ParserService._run_extraction_pipeline, html, source_url)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.info(f"Re-extraction failed for article {article['_id']}: {detail}")
+            return "failed", None, None
+
+        extraction.metadata.canonical_url = metadata.get("canonical_url")
+        update = UpdateOne(
+            {"_id": article["_id"]},
+            {
+                "$set": {
+                    "title": extraction.title,
+                    "short_description": extraction.description,
+                    "metadata": extraction.metadata.model_dump(),
+                    "type": "article",
+                    "snapshot_hash": snapshot_hash,
+                    "extractor_version": EXTRACTOR_VERSION,
+                    "reextracted_at": datetime.utcnow()
+                },
+                # A pending parse retry is moot once the article has content, and the
+                # body now lives in article_bodies even if it was stored inline before
+                "$unset": {"retry": "", "content": ""}
+            }
+        )
+        outcome = "upgraded" if article.get("type") == "bookmark" else "updated"
+        return outcome, update, article_body_store.update_operation(article["_id"], extraction.content)
+
+    async def run(
+        self,
+        bookmarks_only: bool = False,
+        refetch: bool = False,
+        limit: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ) -> ReextractionRun:
+        """Run (or resume) re-extraction for the current extractor version.
+
+        Args:
+            bookmarks_only: Only visit bookmarks, to upgrade them to articles
+            refetch: Fetch pages that have no archived snapshot
+            limit: Stop (as paused) after this many articles
+            batch_size: Articles per batch, defaults to BATCH_SIZE
+            concurrency: Extractions in flight at once, defaults to CONCURRENCY
+
+        Raises:
+            HTTPException: 409 if the run is already in progress elsewhere
+        """
+        run_id = self.run_id(bookmarks_only)
+        token = await self._lease.try_acquire(f"reextract:{run_id}")
+        if not token:
+            raise HTTPException(status_code=409, detail="Re-extraction is already running")
+
+        batch_size = batch_size or self.BATCH_SIZE
+        semaphore = asyncio.Semaphore(concurrency or self.CONCURRENCY)
+        self._stop_requested = False
+        try:
+            now = datetime.utcnow()
+            run = await reextraction_runs.find_one_and_update(
+                {"_id": run_id},
+                {
+                    "$set": {"status": "running", "refetch": refetch, "error": None, "updated_at": now},
+                    "$setOnInsert": {
+                        "extractor_version": EXTRACTOR_VERSION,
+                        "bookmarks_only": bookmarks_only,
+                        "started_at": now
+                    }
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            last_id = run.get("last_id")
+            logger.info(f"Starting re-extraction run {run_id} after {last_id}")
+
+            query = {"extractor_version": {"$ne": EXTRACTOR_VERSION}}
+            if bookmarks_only:
+                query["type"] = "bookmark"
+            if not refetch:
+                query["snapshot_hash"] = {"$type": "string"}
+
+            async def reextract(article: dict) -> tuple[str, Optional[UpdateOne], Optional[UpdateOne]]:
+                async with semaphore:
+                    return await self.reextract_article(article, refetch)
+
+            visited = 0
+            status = "done"
+            while True:
+                if last_id is not None:
+                    query["_id"] = {"$gt": ObjectId(last_id)}
+                size = batch_size if limit is None else min(batch_size, limit - visited)
+                batch = await articles.find(query, ARTICLE_PROJECTION).sort("_id", 1).limit(size).to_list(size)
+                if not batch:
+                    break
+
+                results = await asyncio.gather(*(reextract(article) for article in batch))
+                operations = [update for _, update, _ in results if update is not None]
+                if operations:
+                    # Bodies first, so no article is marked re-extracted before its new body is stored
+                    await article_bodies.bulk_write([body for _, _, body in results if body is not None], ordered=False)
+                    await articles.bulk_write(operations, ordered=False)
+                    for article, (_, update, body) in zip(batch, results):
+                        if update is not None:
+                            article_cache.invalidate(article["_id"])
+                        if body is not None:
+                            article_content_cache.invalidate(article["_id"])
+                    await library_versions.bump_readers(
+                        article["_id"] for article, (_, update, _) in zip(batch, results) if update is not None
+                    )
+
+                counts = {"processed": len(batch)}
+                for outcome, _, _ in results:
+                    counts[outcome] = counts.get(outcome, 0) + 1
+                last_id = batch[-1]["_id"]
+                visited += len(batch)
+                await reextraction_runs.update_one(
+                    {"_id": run_id},
+                    {"$set": {"last_id": last_id, "updated_at": datetime.utcnow()}, "$inc": counts}
+                )
+                logger.info(f"Re-extraction run {run_id}: batch of {len(batch)} done, up to {last_id}")
+
+                if not await self._lease.renew(f"reextract:{run_id}", token):
+                    raise RuntimeError("Lost the re-extraction lease")
+                if self._stop_requested or (limit is not None and visited >= limit):
+                    status = "paused"
+                    break
+                await asyncio.sleep(self.BATCH_PAUSE)
+
+            now = datetime.utcnow()
+            await reextraction_runs.update_one(
+                {"_id": run_id},
+                {"$set": {"status": status, "updated_at": now, "finished_at": now if status == "done" else None}}
+            )
+            logger.info(f"Re-extraction run {run_id} {status} after {visited} articles")
+        except asyncio.CancelledError:
+            await reextraction_runs.update_one(
+                {"_id": run_id},
+                {"$set": {"status": "paused", "updated_at": datetime.utcnow()}}
+            )
+            raise
+        except Exception as e:
+            logger.error(f"Re-extraction run {run_id} failed: {str(e)}", exc_info=True)
+            await reextraction_runs.update_one(
+                {"_id": run_id},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}
+            )
+            raise
+        finally:
+            await self._lease.release(f"reextract:{run_id}", token)
+
+        return await self.get_run(bookmarks_only)
+
+    def start(self, **options) -> None:
+        """Start a run in the background of this process
+
+        Raises:
+            HTTPException: 409 if a run is already in progress in this process
+        """
+        if self.running:
+            raise HTTPException(status_code=409, detail="Re-extraction is already running")
+        self._task = asyncio.create_task(self._run_in_background(**options))
+
+    async def _run_in_background(self, **options) -> None:
+        try:
+            await self.run(**options)
+        except HTTPException as e:
+            logger.warning(f"Re-extraction did not start: {e.detail}")
+        except Exception:
+            # Already logged and recorded on the run
+            pass
+
+    def stop(self) -> None:
+        """Ask the running batch loop to pause after the current batch"""
+        self._stop_requested = True
+
+    async def shutdown(self) -> None:
+        """Cancel a background run (called from the application shutdown hook); it resumes from its checkpoint"""
+        if self.running:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+# Create a global instance
+reextraction_service = ReextractionService()
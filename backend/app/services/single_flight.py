@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key within this process.
+
+    The first caller starts the work as a separate task; every concurrent caller
+    for the same key awaits that task and receives the same result or exception.
+    Cancelling one waiter does not cancel the shared work.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+        else:
+            logger.info(f"Joining in-flight call for key: {key}")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+class MongoLease:
+    """Cross-process mutual exclusion through a unique _id in a Mongo collection.
+
+    A lease is a document {_id: key, owner, expires_at}. Expired leases can be
+    taken over, so a crashed holder never blocks a key for longer than the TTL.
+    """
+
+    def __init__(self, collection, ttl_seconds: float):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def try_acquire(self, key: str) -> Optional[str]:
+        """Try to take the lease for key; returns an owner token, or None if held elsewhere"""
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        try:
+            await self.collection.insert_one({"_id": key, "owner": token, "expires_at": expires_at})
+            return token
+        except DuplicateKeyError:
+            taken = await self.collection.find_one_and_update(
+                {"_id": key, "expires_at": {"$lt": now}},
+                {"$set": {"owner": token, "expires_at": expires_at}}
+            )
+            if taken:
+                logger.warning(f"Took over expired lease for key: {key}")
+                return token
+            return None
+
+    async def release(self, key: str, token: str) -> None:
+        """Release the lease if it is still owned by token"""
+        await self.collection.delete_one({"_id": key, "owner": token})
+
+    async def renew(self, key: str, token: str) -> bool:
+        """Extend a lease still owned by token; returns False if it was lost"""
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+        renewed = await self.collection.find_one_and_update(
+            {"_id": key, "owner": token},
+            {"$set": {"expires_at": expires_at}}
+        )
+        return renewed is not None
+
+    async def _heartbeat(self, key: str, token: str) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            if not await self.renew(key, token):
+                logger.warning(f"Lost lease for key: {key}")
+                return
+
+    @asynccontextmanager
+    async def keep_alive(self, key: str, token: str) -> AsyncIterator[None]:
+        """Renew a held lease every third of its TTL until the block exits"""
+        heartbeat = asyncio.create_task(self._heartbeat(key, token))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
@@ -0,0 +1,368 @@
+import abc
+import json
+import logging
+from typing import Any, Optional
+
+from lxml import etree
+
+from .fetch_scheduler import domain_key
+from .parsed_document import ParsedDocument
+
+logger = logging.getLogger(__name__)
+
+# Fast-path output shorter than this is treated as a miss and the page goes to trafilatura
+MIN_CONTENT_CHARS = 250
+
+# Elements never rendered into the article text
+SKIP_TAGS = frozenset({
+    "script", "style", "noscript", "template", "button", "form", "input", "select",
+    "textarea", "svg", "iframe", "nav", "aside", "footer",
+})
+
+# Elements whose children are rendered as separate blocks
+CONTAINER_TAGS = frozenset({
+    "div", "section", "article", "main", "header", "figure", "picture", "center", "details", "body",
+})
+
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+# Characters _preprocess_html_content escapes, restored before parsing embedded JSON
+PREPROCESS_ESCAPES = (("\\&", "&"), ("\\{", "{"), ("\\}", "}"))
+
+# Escapes applied to plain text taken from embedded JSON, so it matches text read from the tree
+PLAIN_TEXT_ESCAPES = str.maketrans({"&": "\\&", "<": "\\<", ">": "\\>", "{": "\\{", "}": "\\}"})
+
+
+def has_class(name: str) -> str:
+    """XPath predicate matching elements with the given CSS class"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _wrap(inner: str, prefix: str, suffix: str) -> str:
+    """Wrap text in inline markup, keeping surrounding whitespace outside the markers"""
+    text = inner.strip()
+    if not text:
+        return inner
+    lead = " " if inner[:1].isspace() else ""
+    trail = " " if inner[-1:].isspace() else ""
+    return f"{lead}{prefix}{text}{suffix}{trail}"
+
+
+class MarkdownRenderer:
+    """Renders an lxml subtree as markdown, one blank line between blocks.
+
+    Covers the markup article platforms actually emit: paragraphs, headings,
+    lists, code blocks, quotes, tables, images, links and inline emphasis.
+    Elements in skip are left out together with their children.
+    """
+
+    def __init__(self, skip: frozenset = frozenset()):
+        self.skip = skip
+
+    def render(self, element) -> str:
+        blocks: list[str] = []
+        self._render_blocks(element, blocks)
+        return "\n\n".join(blocks)
+
+    def _render_blocks(self, element, blocks: list[str]) -> None:
+        pending = [element.text or ""]
+        for child in element:
+            tag = child.tag if isinstance(child.tag, str) else None
+            if tag is None or tag in SKIP_TAGS or child in self.skip:
+                pass
+            elif tag in HEADING_LEVELS:
+                self._flush(pending, blocks)
+                text = _collapse(self._render_inline(child))
+                if text:
+                    blocks.append(f"{'#' * HEADING_LEVELS[tag]} {text}")
+            elif tag in ("p", "figcaption", "dt", "dd"):
+                self._flush(pending, blocks)
+                self._flush([self._render_inline(child)], blocks)
+            elif tag in ("ul", "ol"):
+                self._flush(pending, blocks)
+                self._render_list(child, blocks, ordered=tag == "ol")
+            elif tag == "pre":
+                self._flush(pending, blocks)
+                code = child.text_content().strip("\n")
+                if code.strip():
+                    blocks.append(f"```\n{code}\n```")
+            elif tag == "blockquote":
+                self._flush(pending, blocks)
+                quoted: list[str] = []
+                self._render_blocks(child, quoted)
+                if quoted:
+                    lines = "\n\n".join(quoted).split("\n")
+                    blocks.append("\n".join(f"> {line}" if line else ">" for line in lines))
+            elif tag == "table":
+                self._flush(pending, blocks)
+                self._render_table(child, blocks)
+            elif tag == "hr":
+                self._flush(pending, blocks)
+                blocks.append("---")
+            elif tag in CONTAINER_TAGS:
+                self._flush(pending, blocks)
+                self._render_blocks(child, blocks)
+            else:
+                pending.append(self._render_inline_element(child))
+            pending.append(child.tail or "")
+        self._flush(pending, blocks)
+
+    @staticmethod
+    def _flush(pending: list[str], blocks: list[str]) -> None:
+        text = _collapse("".join(pending))
+        if text:
+            blocks.append(text)
+        pending.clear()
+
+    def _render_list(self, element, blocks: list[str], ordered: bool) -> None:
+        lines = []
+        for index, item in enumerate(element.iterchildren("li"), 1):
+            if item in self.skip:
+                continue
+            text = _collapse(self._render_inline(item))
+            if text:
+                lines.append(f"{index}. {text}" if ordered else f"- {text}")
+        if lines:
+            blocks.append("\n".join(lines))
+
+    def _render_table(self, element, blocks: list[str]) -> None:
+        rows = []
+        for row in element.iter("tr"):
+            cells = [
+                _collapse(self._render_inline(cell)).replace("|", "\\|")
+                for cell in row
+                if cell.tag in ("td", "th")
+            ]
+            if cells:
+                rows.append(cells)
+        if not rows:
+            return
+        lines = ["| " + " | ".join(cells) + " |" for cells in rows]
+        lines.insert(1, "|" + " --- |" * len(rows[0]))
+        blocks.append("\n".join(lines))
+
+    def _render_inline(self, element) -> str:
+        parts = [element.text or ""]
+        for child in element:
+            parts.append(self._render_inline_element(child))
+            parts.append(child.tail or "")
+        return "".join(parts)
+
+    def _render_inline_element(self, element) -> str:
+        tag = element.tag
+        if not isinstance(tag, str) or tag in SKIP_TAGS or element in self.skip:
+            return ""
+        if tag == "br":
+            return " "
+        if tag == "img":
+            src = element.get("src") or element.get("data-src")
+            return f"![{_collapse(element.get('alt') or '')}]({src})" if src else ""
+        inner = self._render_inline(element)
+        if tag == "a":
+            href = element.get("href")
+            if href and not href.startswith(("#", "javascript:")):
+                return _wrap(inner, "[", f"]({href})")
+            return inner
+        if tag in ("strong", "b"):
+            return _wrap(inner, "**", "**")
+        if tag in ("em", "i"):
+            return _wrap(inner, "*", "*")
+        if tag == "code":
+            return _wrap(inner, "`", "`")
+        return inner
+
+
+class SiteExtractor(abc.ABC):
+    """Fast-path content extractor for one platform.
+
+    An extractor applies to pages on its domains (as grouped by domain_key)
+    and to pages whose HTML contains one of its fingerprints, which covers
+    publications hosted on custom domains. extract() returns markdown, or
+    None when the page does not have the expected structure.
+    """
+    name = "site"
+    domains: tuple[str, ...] = ()
+    fingerprints: tuple[str, ...] = ()
+
+    def matches_html(self, html: str) -> bool:
+        return any(fingerprint in html for fingerprint in self.fingerprints)
+
+    @abc.abstractmethod
+    def extract(self, document: ParsedDocument) -> Optional[str]:
+        raise NotImplementedError
+
+
+class ContainerExtractor(SiteExtractor):
+    """Renders the platform's article container, leaving out known non-article parts"""
+
+    def __init__(
+        self,
+        name: str,
+        container: str,
+        drop: tuple[str, ...] = (),
+        domains: tuple[str, ...] = (),
+        fingerprints: tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.domains = domains
+        self.fingerprints = fingerprints
+        self.container = etree.XPath(container)
+        # Evaluated relative to each container element
+        self.drop = [etree.XPath(path) for path in drop]
+
+    def extract(self, document: ParsedDocument) -> Optional[str]:
+        if document.tree is None:
+            return None
+        containers = self.container(document.tree)
+        if not containers:
+            return None
+        blocks = []
+        for container in containers:
+            skip = frozenset(element for path in self.drop for element in path(container))
+            markdown = MarkdownRenderer(skip).render(container)
+            if markdown:
+                blocks.append(markdown)
+        return "\n\n".join(blocks) or None
+
+
+class JsonLdArticleExtractor(SiteExtractor):
+    """Reads the article text from a JSON-LD articleBody.
+
+    articleBody is plain text, so it is only used when it keeps its paragraph
+    breaks; a single run-on paragraph is worse than what trafilatura produces.
+    """
+    name = "json_ld"
+    fingerprints = ('"articleBody"',)
+
+    LD_JSON = etree.XPath('//script[@type="application/ld+json"]/text()')
+
+    @staticmethod
+    def _find_article_body(data: Any) -> Optional[str]:
+        if isinstance(data, list):
+            for item in data:
+                body = JsonLdArticleExtractor._find_article_body(item)
+                if body:
+                    return body
+        elif isinstance(data, dict):
+            body = data.get("articleBody")
+            if isinstance(body, str) and body.strip():
+                return body
+            return JsonLdArticleExtractor._find_article_body(data.get("@graph"))
+        return None
+
+    def extract(self, document: ParsedDocument) -> Optional[str]:
+        if document.tree is None:
+            return None
+        for raw in self.LD_JSON(document.tree):
+            for escaped, original in PREPROCESS_ESCAPES:
+                raw = raw.replace(escaped, original)
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                continue
+            body = self._find_article_body(data)
+            if not body:
+                continue
+            paragraphs = [_collapse(line).translate(PLAIN_TEXT_ESCAPES) for line in body.splitlines() if line.strip()]
+            if len(paragraphs) >= 2:
+                return "\n\n".join(paragraphs)
+        return None
+
+
+class ExtractorRegistry:
+    """Site extractors keyed by domain, plus the ones detected by HTML fingerprint"""
+
+    def __init__(self):
+        self._extractors: list[SiteExtractor] = []
+        self._by_domain: dict[str, SiteExtractor] = {}
+        self._fingerprinted: list[SiteExtractor] = []
+
+    def register(self, extractor: SiteExtractor) -> SiteExtractor:
+        self._extractors.append(extractor)
+        for domain in extractor.domains:
+            self._by_domain[domain] = extractor
+        if extractor.fingerprints:
+            self._fingerprinted.append(extractor)
+        return extractor
+
+    def extractors(self) -> list[SiteExtractor]:
+        """All registered extractors in registration order"""
+        return list(self._extractors)
+
+    def candidates(self, url: Optional[str], html: str) -> list[SiteExtractor]:
+        """Extractors that apply to a page: the domain's own first, then fingerprint matches"""
+        found = []
+        by_domain = self._by_domain.get(domain_key(url)) if url else None
+        if by_domain is not None:
+            found.append(by_domain)
+        for extractor in self._fingerprinted:
+            if extractor is not by_domain and extractor.matches_html(html):
+                found.append(extractor)
+        return found
+
+    def extract(self, document: ParsedDocument, url: Optional[str]) -> Optional[tuple[str, str]]:
+        """Run the matching extractors in order.
+
+        Returns:
+            Tuple of (extractor name, markdown) from the first extractor that
+            produced enough content, or None if the page needs the generic path
+        """
+        for extractor in self.candidates(url, document.html):
+            try:
+                content = extractor.extract(document)
+            except Exception as e:
+                logger.warning(f"{extractor.name} extractor failed: {str(e)}")
+                continue
+            if content and len(content) >= MIN_CONTENT_CHARS:
+                return extractor.name, content
+            logger.info(f"{extractor.name} extractor found no article content")
+        return None
+
+
+# Create a global instance
+site_extractors = ExtractorRegistry()
+
+site_extractors.register(ContainerExtractor(
+    "substack",
+    container=f"//div[{has_class('available-content')}]",
+    drop=(
+        f".//*[{has_class('subscription-widget-wrap')}]",
+        f".//*[{has_class('subscribe-widget')}]",
+        f".//*[{has_class('button-wrapper')}]",
+    ),
+    domains=("substack.com",),
+    fingerprints=("substackcdn.com",)
+))
+site_extractors.register(ContainerExtractor(
+    "medium",
+    container="//article//section[not(ancestor::section)]",
+    drop=(
+        ".//*[@data-testid='storyTitle']",
+        ".//*[@data-testid='authorPhoto']",
+        f".//*[{has_class('speechify-ignore')}]",
+    ),
+    domains=("medium.com",),
+    fingerprints=("com.medium.reader",)
+))
+site_extractors.register(ContainerExtractor(
+    "telegraph",
+    container="//article[@id='_tl_editor']",
+    # The editor repeats the title and author at the top of the article body
+    drop=("./h1", "./address"),
+    domains=("telegra.ph", "graph.org")
+))
+site_extractors.register(ContainerExtractor(
+    "github",
+    container=f"//article[{has_class('markdown-body')}]",
+    domains=("github.com",)
+))
+site_extractors.register(ContainerExtractor(
+    "habr",
+    container="//div[@id='post-content-body']",
+    domains=("habr.com",)
+))
+site_extractors.register(JsonLdArticleExtractor())
@@ -0,0 +1,149 @@
+import abc
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import pathlib
+import tempfile
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstd support is optional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStorage(abc.ABC):
+    """Blob storage for compressed snapshots, addressed by file name"""
+
+    @abc.abstractmethod
+    async def exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def write(self, name: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def read(self, name: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+
+class LocalSnapshotStorage(SnapshotStorage):
+    """Snapshots in a local directory, sharded by the first hash characters.
+
+    File operations run in a thread so they never block the event loop, and
+    writes go through a temporary file so readers never see a partial blob.
+    """
+
+    def __init__(self, root: pathlib.Path):
+        self.root = pathlib.Path(root)
+
+    def _path(self, name: str) -> pathlib.Path:
+        return self.root / name[:2] / name[2:4] / name
+
+    def _write(self, name: str, data: bytes) -> None:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _read(self, name: str) -> Optional[bytes]:
+        try:
+            return self._path(name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    async def exists(self, name: str) -> bool:
+        return await asyncio.to_thread(self._path(name).exists)
+
+    async def write(self, name: str, data: bytes) -> None:
+        await asyncio.to_thread(self._write, name, data)
+
+    async def read(self, name: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, name)
+
+
+class SnapshotStore:
+    """Always-on archive of the raw HTML of every fetched page.
+
+    Snapshots are keyed by content hash, so a page fetched again unchanged (or
+    through another URL) is stored once, and articles reference their
+    snapshot so they can be re-extracted later. Pages are compressed with zstd
+    when it is installed and gzip otherwise; both formats stay readable.
+    """
+    STORAGE_DIR = pathlib.Path(os.getenv("SNAPSHOT_DIR", "./data/snapshots"))
+    ZSTD_LEVEL = int(os.getenv("SNAPSHOT_ZSTD_LEVEL", 9))
+    GZIP_LEVEL = 6
+
+    def __init__(self, storage: Optional[SnapshotStorage] = None):
+        self.storage = storage or LocalSnapshotStorage(self.STORAGE_DIR)
+
+    @staticmethod
+    def _names(content_hash: str) -> list[str]:
+        """Blob names a snapshot may be stored under, preferred format first"""
+        names = [f"{content_hash}.html.gz"]
+        if zstandard is not None:
+            names.insert(0, f"{content_hash}.html.zst")
+        return names
+
+    @staticmethod
+    def _hash(html: str) -> tuple[str, bytes]:
+        """Encode a page and return (hash, encoded bytes)"""
+        data = html.encode("utf-8", errors="surrogatepass")
+        return hashlib.sha256(data).hexdigest(), data
+
+    def _compress(self, content_hash: str, data: bytes) -> tuple[str, bytes]:
+        """Compress an encoded page, returning (blob name, compressed bytes)"""
+        if zstandard is not None:
+            return f"{content_hash}.html.zst", zstandard.ZstdCompressor(level=self.ZSTD_LEVEL).compress(data)
+        return f"{content_hash}.html.gz", gzip.compress(data, compresslevel=self.GZIP_LEVEL)
+
+    @staticmethod
+    def _decompress(name: str, data: bytes) -> str:
+        if name.endswith(".zst"):
+            data = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            data = gzip.decompress(data)
+        return data.decode("utf-8", errors="surrogatepass")
+
+    async def save(self, html: str) -> Optional[str]:
+        """Store a page unless an identical one is already stored.
+
+        Returns:
+            The snapshot hash, or None if the snapshot could not be written
+        """
+        try:
+            content_hash, encoded = await asyncio.to_thread(self._hash, html)
+            for existing in self._names(content_hash):
+                if await self.storage.exists(existing):
+                    return content_hash
+            # Only pages not stored yet pay for compression
+            name, data = await asyncio.to_thread(self._compress, content_hash, encoded)
+            await self.storage.write(name, data)
+            logger.info(f"Stored snapshot {content_hash} ({len(html)} chars, {len(data)} bytes compressed)")
+            return content_hash
+        except Exception as e:
+            logger.error(f"Failed to store snapshot: {str(e)}")
+            return None
+
+    async def load(self, content_hash: str) -> Optional[str]:
+        """Return the HTML of a stored snapshot, or None if it is missing"""
+        for name in self._names(content_hash):
+            data = await self.storage.read(name)
+            if data is not None:
+                return await asyncio.to_thread(self._decompress, name, data)
+        return None
+
+
+# Create a global instance
+snapshot_store = SnapshotStore()
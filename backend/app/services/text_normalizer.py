@@ -0,0 +1,203 @@
+import logging
+import re
+import string
+from bisect import bisect_left
+from functools import cached_property
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# A run of blank lines collapses to one paragraph break. A single newline becomes
+# a paragraph break unless the next line starts a list item, code, a heading, an
+# emphasised span or a link, which keep their single line break.
+PARAGRAPH_BREAK_RE = re.compile(
+    r"\n{2,}"
+    r"|\n(?!(?:[*\-+\d]+\. |```|    |#{1,6} |\*[^\n]+?\*|\[[^\]]+\]\([^)]+\)))"
+)
+
+# Characters outside the Basic Multilingual Plane, which take two UTF-16 code units
+ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+# Markdown constructs removed or unwrapped when producing plain text, in priority order
+MARKDOWN_TOKEN_RE = re.compile(
+    r"(?s:```.*?```)"
+    r"|!\[.*?\]\(.*?\)"
+    r"|\[(?P<link>.*?)\]\(.*?\)"
+    r"|`(?P<code>.*?)`"
+    r"|(?m:^(?:---|\*\*\*|___)$)"
+    r"|\*\*(?P<bold>.*?)\*\*"
+    r"|\*(?P<em>.*?)\*"
+    r"|(?m:^#+\s+)"
+    r"|(?m:^>\s+)"
+    r"|<[^>]*>"
+)
+
+# Characters that can start a markdown token, used to skip needless recursion
+MARKDOWN_TOKEN_CHARS = frozenset("`![*#><-_")
+
+# Block kinds of the paragraph/heading table, keyed by how a block starts
+# ("1"-"6" are heading levels, "p" a plain paragraph)
+BLOCK_KIND_RE = re.compile(
+    r"(?P<heading>#{1,6}) "
+    r"|(?P<code>```)"
+    r"|(?P<list>(?:[*\-+]|\d+\.) )"
+    r"|(?P<quote>>)"
+    r"|(?P<image>!\[)"
+    r"|(?P<table>\|)"
+    r"|(?P<rule>(?:---|\*\*\*|___)$)"
+)
+BLOCK_KIND_CODES = {"code": "c", "list": "l", "quote": "q", "image": "i", "table": "t", "rule": "r"}
+
+H1_RE = re.compile(r"^# (.+?)(?:\n\n|\n|\r\n|\r|$)")
+LEADING_SEPARATORS_RE = re.compile(r"^[:\-–—\s]+")
+
+PUNCTUATION = frozenset(string.punctuation)
+STRIP_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+
+def ensure_paragraph_separation(content: str) -> str:
+    """Ensure paragraphs are separated by exactly one blank line, in a single pass"""
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return PARAGRAPH_BREAK_RE.sub("\n\n", content)
+
+
+def _strip_token(match: re.Match) -> str:
+    inner = match.group("link")
+    if inner is None:
+        inner = match.group("code")
+    if inner is None:
+        inner = match.group("bold")
+    if inner is None:
+        inner = match.group("em")
+    if not inner:
+        return ""
+    if MARKDOWN_TOKEN_CHARS.isdisjoint(inner):
+        return inner
+    # Unwrapped text may itself contain formatting, e.g. a bold link label
+    return MARKDOWN_TOKEN_RE.sub(_strip_token, inner)
+
+
+def strip_markdown(text: str) -> str:
+    """Strip markdown formatting in one pass, keeping only plain text on a single line"""
+    if not text:
+        return ""
+    return " ".join(MARKDOWN_TOKEN_RE.sub(_strip_token, text).split())
+
+
+def normalize_for_comparison(text: str) -> str:
+    """Lowercase, drop ASCII punctuation and collapse whitespace"""
+    return " ".join(text.lower().translate(STRIP_PUNCTUATION).split())
+
+
+def remove_duplicate_title(text: str, title: str, is_content: bool = True) -> str:
+    """Remove a leading H1 (or, for descriptions, leading title text) that repeats the title"""
+    normalized_title = normalize_for_comparison(title)
+
+    match = H1_RE.match(text)
+    if match and normalize_for_comparison(match.group(1)) == normalized_title:
+        logger.info(f"Removed H1 heading from {'content' if is_content else 'description'}")
+        return text[match.end():].lstrip()
+
+    if is_content:
+        return text
+
+    # For descriptions only, also check if it starts with the title text
+    if text.startswith(title):
+        text = text[len(title):].lstrip()
+    elif normalize_for_comparison(text).startswith(normalized_title):
+        # Walk the original text until as many normalized characters as the title has were seen
+        title_end_pos = len(normalized_title)
+        char_count = 0
+        pos = 0
+        for i, char in enumerate(text):
+            if char_count >= title_end_pos:
+                pos = i
+                break
+            if char.lower() not in PUNCTUATION and not (char.isspace() and char_count > 0 and text[i - 1].isspace()):
+                char_count += 1
+        text = text[pos:].lstrip()
+    else:
+        return text
+
+    # If description starts with common separators, remove them
+    text = LEADING_SEPARATORS_RE.sub("", text)
+    logger.info("Removed title from beginning of description")
+    return text
+
+
+class TextBlock(NamedTuple):
+    """A paragraph, heading, list, code block, ... of article markdown"""
+    offset: int
+    kind: str
+    words: int
+    plain_text: str
+
+
+def block_kind(block: str) -> str:
+    match = BLOCK_KIND_RE.match(block)
+    if match is None:
+        return "p"
+    if match.group("heading"):
+        return str(len(match.group("heading")))
+    return BLOCK_KIND_CODES[match.lastgroup]
+
+
+def split_blocks(markdown: str) -> list[TextBlock]:
+    """Split markdown at blank lines into blocks, keeping fenced code blocks whole"""
+    blocks = []
+    offset = 0
+    pending_offset, pending = None, []
+    for chunk in markdown.split("\n\n"):
+        if pending_offset is None:
+            pending_offset = offset
+        pending.append(chunk)
+        offset += len(chunk) + 2
+        text = "\n\n".join(pending)
+        if text.count("```") % 2:
+            # Inside a code fence that continues past this blank line
+            continue
+        if text.strip():
+            blocks.append(TextBlock(pending_offset, block_kind(text), len(text.split()), strip_markdown(text)))
+        pending_offset, pending = None, []
+    if pending:
+        text = "\n\n".join(pending)
+        if text.strip():
+            # An unclosed fence runs to the end of the text
+            blocks.append(TextBlock(pending_offset, block_kind(text), len(text.split()), strip_markdown(text)))
+    return blocks
+
+
+def utf16_offsets(text: str, offsets: list[int]) -> list[int]:
+    """Convert str indexes (code points) into text to UTF-16 code unit indexes, as JavaScript counts them"""
+    astral = [match.start() for match in ASTRAL_RE.finditer(text)]
+    if not astral:
+        return list(offsets)
+    return [offset + bisect_left(astral, offset) for offset in offsets]
+
+
+class NormalizedText:
+    """Post-processed article markdown with its blocks and plain text computed on first use"""
+
+    def __init__(self, markdown: str):
+        self.markdown = markdown
+
+    @cached_property
+    def blocks(self) -> list[TextBlock]:
+        return split_blocks(self.markdown)
+
+    @cached_property
+    def plain_text(self) -> str:
+        return " ".join(block.plain_text for block in self.blocks if block.plain_text)
+
+
+def normalize_article(content: str, title: str, separate_paragraphs: bool = True) -> NormalizedText:
+    """Separate paragraphs and drop a heading that repeats the title.
+
+    Content rendered by a site extractor already has its paragraphs separated,
+    so it skips that step (which would also split its code blocks and tables).
+    """
+    if separate_paragraphs:
+        content = ensure_paragraph_separation(content)
+    content = remove_duplicate_title(content, title, is_content=True)
+    return NormalizedText(content)
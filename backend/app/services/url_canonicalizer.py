@@ -0,0 +1,81 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only carry tracking/referral data on any site
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "yclid", "msclkid", "igshid", "twclid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "ref_src", "ref_url",
+}
+
+# Site-specific tracking parameters, matched by host suffix
+SITE_TRACKING_PARAMS = {
+    "medium.com": {"source", "sk"},
+    "substack.com": {"r", "triedRedirect", "showWelcome", "isFreemail"},
+}
+
+# Host prefixes that serve the same content as the bare domain
+EQUIVALENT_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _canonical_host(hostname: str) -> str:
+    host = hostname.lower().rstrip(".")
+    for prefix in EQUIVALENT_HOST_PREFIXES:
+        # Keep the prefix when stripping it would leave a bare TLD (e.g. "m.me")
+        if host.startswith(prefix) and host.count(".") > 1:
+            return host[len(prefix):]
+    return host
+
+
+def _is_tracking_param(name: str, host: str) -> bool:
+    if name.lower().startswith("utm_") or name in TRACKING_PARAMS:
+        return True
+    for site, params in SITE_TRACKING_PARAMS.items():
+        if (host == site or host.endswith("." + site)) and name in params:
+            return True
+    return False
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so that trivially different links to one page compare equal.
+
+    Lowercases the scheme and host, drops www./m. style host prefixes, default
+    ports, fragments, tracking query parameters and trailing slashes, and sorts
+    the remaining query parameters. The scheme is normalized to https.
+
+    Args:
+        url: The URL as sent by the user
+
+    Returns:
+        The canonical form of the URL
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = _canonical_host(parts.hostname or "")
+    netloc = host
+    if parts.port and parts.port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        netloc = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    while "//" in path:
+        path = path.replace("//", "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    if path == "/":
+        path = ""
+
+    query_params = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name, host)
+    ]
+    query = urlencode(sorted(query_params))
+
+    return urlunsplit((scheme, netloc, path, query, ""))
@@ -0,0 +1,115 @@
+"""Benchmark article body compression: stored size and decode latency per codec.
+
+The corpus pages are run through the extraction pipeline and the resulting
+markdown bodies are encoded with every codec the content codec supports:
+plain text, zlib, zstd and zstd with a trained dictionary. For the
+dictionary, each body is encoded with a dictionary trained on the other
+bodies only, so the report never measures a body against a dictionary that
+has already seen it. The report shows the stored bytes, the ratio against
+plain text and the time to encode and to decode one body (the decode is
+what an article open pays).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_content_codec
+    python -m benchmarks.bench_content_codec --iterations 200 --include-huge
+"""
+import argparse
+import os
+import pathlib
+import sys
+import time
+from collections import defaultdict
+
+# The parser imports the database module, which needs a database name (no connection is made)
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import zstandard  # noqa: E402
+
+from app.services.content_codec import ContentCodec  # noqa: E402
+from benchmarks.bench_parser import load_corpus, page_url, run_pipeline  # noqa: E402
+
+CODECS = ("identity", "zlib", "zstd", "zstd+dict")
+
+# Small enough to train on the handful of corpus bodies
+DICTIONARY_SIZE = 16 * 1024
+
+
+def load_bodies(include_huge: bool) -> dict[str, str]:
+    """Markdown bodies of the corpus pages, as stored for saved articles"""
+    timings = defaultdict(float)
+    return {name: run_pipeline(raw, page_url(name), timings) for name, raw in load_corpus(include_huge).items()}
+
+
+def _codec_for(name: str, body_name: str, bodies: dict[str, str]) -> ContentCodec:
+    codec = ContentCodec()
+    codec.MODE = "false" if name == "identity" else name.split("+")[0]
+    if name == "zstd+dict":
+        codec.DICTIONARY_SIZE = DICTIONARY_SIZE
+        codec.use_dictionary(codec.train([body for other, body in bodies.items() if other != body_name]))
+    return codec
+
+
+def _stored_bytes(data) -> int:
+    return len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+
+
+def benchmark(iterations: int, include_huge: bool) -> dict:
+    bodies = load_bodies(include_huge)
+    results = {}
+    for name in CODECS:
+        stored = plain = 0
+        encode_total = decode_total = 0.0
+        for body_name, body in bodies.items():
+            codec = _codec_for(name, body_name, bodies)
+            data, encoding, dictionary_id = codec.encode(body)
+            assert codec.decode(data, encoding, dictionary_id) == body
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                codec.encode(body)
+            encode_total += time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                codec.decode(data, encoding, dictionary_id)
+            decode_total += time.perf_counter() - start
+
+            stored += _stored_bytes(data)
+            plain += len(body.encode("utf-8"))
+
+        runs = len(bodies) * iterations
+        results[name] = {
+            "bodies": len(bodies),
+            "plain_bytes": plain,
+            "stored_bytes": stored,
+            "ratio": round(stored / plain, 3),
+            "encode_us_per_body": round(encode_total * 1e6 / runs, 1),
+            "decode_us_per_body": round(decode_total * 1e6 / runs, 1),
+        }
+    return results
+
+
+def print_report(results: dict) -> None:
+    first = next(iter(results.values()))
+    print(f"{first['bodies']} bodies, {first['plain_bytes']} bytes of markdown, zstandard {zstandard.__version__}")
+    print("Codec        stored bytes   ratio   encode us   decode us")
+    for name, result in results.items():
+        print(
+            f"  {name:<10} {result['stored_bytes']:>12}  {result['ratio']:>6.3f}"
+            f"  {result['encode_us_per_body']:>10.1f}  {result['decode_us_per_body']:>10.1f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark article body compression codecs")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--include-huge", action="store_true", help="Also encode the generated multi-megabyte page")
+    args = parser.parse_args()
+
+    print_report(benchmark(args.iterations, args.include_huge))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Benchmark the library listing: two-query join against one $lookup aggregation.
+
+Seeds a throwaway MongoDB database with one user who has 100, 1,000 and
+10,000 saved articles (articles carry metadata and a derived stats block,
+bodies are stored separately as in production) and times
+get_user_articles_flat with LIBRARY_QUERY=find and LIBRARY_QUERY=aggregate,
+for the full unpaginated listing and for the first page. Needs a MongoDB
+server (5.0+ for the $lookup pipeline) at MONGODB_URL; the database is
+dropped afterwards unless --keep is given. Results can be saved as JSON
+together with the server version they were measured on.
+
+Usage (from the backend directory):
+    MONGODB_URL=mongodb://localhost:27017 python -m benchmarks.bench_library_query
+    python -m benchmarks.bench_library_query --sizes 100 1000 --iterations 50 --page-size 50
+    python -m benchmarks.bench_library_query --save benchmarks/library_query_results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Point the app at the benchmark database before anything imports it
+os.environ["DATABASE_NAME"] = os.getenv("BENCH_DATABASE_NAME", "longreader_bench_library")
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from bson import ObjectId  # noqa: E402
+
+from app import database  # noqa: E402
+from app.services import article_service  # noqa: E402
+
+MODES = ("find", "aggregate")
+
+
+def _article(number: int, created_at: datetime) -> dict:
+    blocks = 60
+    return {
+        "_id": ObjectId(),
+        "title": f"A long read number {number}",
+        "short_description": "A description of a long read, about ninety characters long, as extracted...",
+        "metadata": {
+            "source_url": f"https://example.com/posts/{number}",
+            "canonical_url": f"https://example.com/posts/{number}",
+            "author": "An Author",
+            "publish_date": created_at,
+            "reading_time": 9,
+            "stats": {
+                "word_count": 2700,
+                "char_count": 16000,
+                "plain_text_length": 15200,
+                "blocks": {
+                    "offsets": [index * 260 for index in range(blocks)],
+                    "words_before": [index * 45 for index in range(blocks)],
+                    "kinds": "p" * blocks
+                }
+            }
+        },
+        "created_at": created_at,
+        "type": "article",
+        "extractor_version": "benchmark"
+    }
+
+
+async def seed(user_id: ObjectId, size: int) -> None:
+    """Replace the user's library with size saved articles"""
+    await database.user_articles.delete_many({"user_id": user_id})
+    start = datetime(2024, 1, 1)
+    docs = [_article(number, start + timedelta(minutes=number)) for number in range(size)]
+    await database.articles.insert_many(docs)
+    await database.user_articles.insert_many([
+        {
+            "user_id": user_id,
+            "article_id": doc["_id"],
+            "progress": {"percentage": number % 100, "last_position": 0, "updated_at": doc["created_at"]},
+            "timestamps": {"saved_at": doc["created_at"], "archived_at": None, "deleted_at": None}
+        }
+        for number, doc in enumerate(docs)
+    ])
+
+
+async def time_listing(user_id: ObjectId, mode: str, limit, iterations: int) -> float:
+    """Median milliseconds per listing call"""
+    article_service.LIBRARY_QUERY = mode
+    await article_service.get_user_articles_flat(str(user_id), limit=limit)  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await article_service.get_user_articles_flat(str(user_id), limit=limit)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+async def benchmark(sizes: list[int], iterations: int, page_size: int, keep: bool) -> tuple[str, dict]:
+    """Server version and median milliseconds per (mode, listing) for each size"""
+    if "bench" not in database.DATABASE_NAME:
+        raise SystemExit(f"Refusing to seed {database.DATABASE_NAME}: the database name must contain 'bench'")
+    server_version = (await database.client.server_info())["version"]
+    await database.create_indexes()
+    user_id = ObjectId()
+    results = {}
+    try:
+        for size in sizes:
+            await seed(user_id, size)
+            results[size] = {
+                (mode, label): await time_listing(user_id, mode, limit, iterations)
+                for label, limit in (("all", None), ("page", page_size))
+                for mode in MODES
+            }
+    finally:
+        if not keep:
+            await database.client.drop_database(database.DATABASE_NAME)
+    return server_version, results
+
+
+def print_report(server_version: str, results: dict, page_size: int) -> None:
+    print(f"MongoDB {server_version}, median ms per call (page = first {page_size} saves)")
+    print("Saves     find all  aggregate all   find page  aggregate page")
+    for size, timings in results.items():
+        print(
+            f"{size:>6}  {timings[('find', 'all')]:>10.1f}  {timings[('aggregate', 'all')]:>13.1f}"
+            f"  {timings[('find', 'page')]:>10.1f}  {timings[('aggregate', 'page')]:>14.1f}"
+        )
+
+
+def to_json(results: dict, server_version: str, iterations: int, page_size: int) -> dict:
+    return {
+        "python": platform.python_version(),
+        "mongodb": server_version,
+        "iterations": iterations,
+        "page_size": page_size,
+        "median_ms": {
+            str(size): {f"{mode}_{label}": round(ms, 2) for (mode, label), ms in timings.items()}
+            for size, timings in results.items()
+        }
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the library listing query paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=article_service.DEFAULT_PAGE_SIZE)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database")
+    parser.add_argument("--save", type=pathlib.Path, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    server_version, results = asyncio.run(benchmark(args.sizes, args.iterations, args.page_size, args.keep))
+    print_report(server_version, results, args.page_size)
+    if args.save:
+        args.save.write_text(json.dumps(to_json(results, server_version, args.iterations, args.page_size), indent=2) + "\n")
+        print(f"\nSaved results to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
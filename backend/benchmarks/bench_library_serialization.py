@@ -0,0 +1,174 @@
+"""Benchmark library listing serialization: response models against the orjson fast path.
+
+Builds library rows shaped like the ones the listing queries return and
+renders them three ways:
+
+- hydrated: the original path, UserArticle and Article models per row, then
+  UserArticleFlat, then FastAPI's response_model validation and JSONResponse
+- models: flat rows into UserArticleFlat, then the same FastAPI validation
+  and JSONResponse (LIBRARY_FAST_JSON=false)
+- orjson: flat rows straight to JSON bytes with a precomputed status
+  (LIBRARY_FAST_JSON=true)
+
+No MongoDB is needed. The report shows rows/sec per path and listing size.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_library_serialization
+    python -m benchmarks.bench_library_serialization --sizes 100 1000 --iterations 20
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import sys
+import time
+from datetime import datetime, timedelta
+
+# The article service imports the database module, which needs a database name (no connection is made)
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import orjson  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.models.article import Article, UserArticle, UserArticleFlat, UserArticleFlatCollection  # noqa: E402
+from app.services.article_service import _flat_row_json  # noqa: E402
+
+PATHS = ("hydrated", "models", "orjson")
+
+RESPONSE_FIELD = create_response_field(name="Response_get_articles_for_user", type_=UserArticleFlatCollection)
+
+
+def make_documents(size: int) -> list[tuple[dict, dict]]:
+    """(user_articles document, articles document) pairs of one user's library"""
+    start = datetime(2024, 1, 1)
+    pairs = []
+    for number in range(size):
+        created_at = start + timedelta(minutes=number, milliseconds=number)
+        article = {
+            "_id": ObjectId(),
+            "title": f"A long read number {number}",
+            "short_description": "A description of a long read, about ninety characters long, as extracted...",
+            "metadata": {
+                "source_url": f"https://example.com/posts/{number}",
+                "canonical_url": f"https://example.com/posts/{number}",
+                "author": "An Author",
+                "publish_date": created_at,
+                "reading_time": 9,
+                "stats": {"word_count": 2700, "char_count": 16000, "plain_text_length": 15200}
+            },
+            "created_at": created_at,
+            "type": "article"
+        }
+        user_article = {
+            "_id": ObjectId(),
+            "user_id": ObjectId(),
+            "article_id": article["_id"],
+            "progress": {"percentage": number % 100, "last_position": 0, "updated_at": created_at},
+            "timestamps": {"saved_at": created_at, "archived_at": None, "deleted_at": None}
+        }
+        pairs.append((user_article, article))
+    return pairs
+
+
+def make_rows(pairs: list[tuple[dict, dict]]) -> list[dict]:
+    """The flat rows the listing queries produce for the same documents"""
+    return [
+        {
+            "_id": article["_id"],
+            "user_article_id": user_article["_id"],
+            "title": article["title"],
+            "short_description": article["short_description"],
+            "metadata": article["metadata"],
+            "type": article["type"],
+            "progress": user_article["progress"],
+            "timestamps": dict(user_article["timestamps"], created_at=article["created_at"])
+        }
+        for user_article, article in pairs
+    ]
+
+
+async def _fastapi_response(collection: UserArticleFlatCollection) -> bytes:
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=collection)
+    return JSONResponse(content).body
+
+
+async def render_hydrated(pairs: list[tuple[dict, dict]]) -> bytes:
+    flat = []
+    for user_article_doc, article_doc in pairs:
+        ua = UserArticle(**user_article_doc)
+        art = Article(**article_doc)
+        flat.append(UserArticleFlat(**{
+            "_id": art.id,
+            "title": art.title,
+            "short_description": art.short_description,
+            "metadata": art.metadata,
+            "progress": ua.progress,
+            "timestamps": {
+                "saved_at": ua.timestamps.saved_at,
+                "archived_at": ua.timestamps.archived_at,
+                "deleted_at": ua.timestamps.deleted_at,
+                "created_at": art.created_at
+            },
+            "type": art.type
+        }))
+    return await _fastapi_response(UserArticleFlatCollection(articles=flat))
+
+
+async def render_models(rows: list[dict]) -> bytes:
+    return await _fastapi_response(UserArticleFlatCollection(articles=[UserArticleFlat(**row) for row in rows]))
+
+
+async def render_orjson(rows: list[dict]) -> bytes:
+    return orjson.dumps({"articles": [_flat_row_json(row) for row in rows], "next_cursor": None}, default=str)
+
+
+async def benchmark(sizes: list[int], iterations: int) -> dict:
+    results = {}
+    for size in sizes:
+        pairs = make_documents(size)
+        rows = make_rows(pairs)
+        renders = {
+            "hydrated": lambda: render_hydrated(pairs),
+            "models": lambda: render_models(rows),
+            "orjson": lambda: render_orjson(rows)
+        }
+        # Every path must produce the same document
+        outputs = {path: orjson.loads(await render()) for path, render in renders.items()}
+        assert outputs["hydrated"] == outputs["models"] == outputs["orjson"]
+
+        results[size] = {}
+        for path, render in renders.items():
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await render()
+            elapsed = time.perf_counter() - start
+            results[size][path] = size * iterations / elapsed
+    return results
+
+
+def print_report(results: dict) -> None:
+    print("Rows/sec")
+    print("  Rows      hydrated        models        orjson   speedup")
+    for size, rates in results.items():
+        print(
+            f"{size:>6}  {rates['hydrated']:>12,.0f}  {rates['models']:>12,.0f}  {rates['orjson']:>12,.0f}"
+            f"  {rates['orjson'] / rates['hydrated']:>7.1f}x"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark library listing serialization paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    print_report(asyncio.run(benchmark(args.sizes, args.iterations)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Offline parser throughput benchmark over the HTML corpus in benchmarks/corpus.
+
+Runs every page through the same stages as ParserService._run_extraction_pipeline
+and reports pages/sec, time per stage and peak RSS. Results can be saved as a
+JSON baseline and compared against on later commits.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_parser
+    python -m benchmarks.bench_parser --iterations 10 --compare benchmarks/baseline.json
+    python -m benchmarks.bench_parser --save benchmarks/baseline.json
+"""
+import argparse
+import gc
+import json
+import os
+import pathlib
+import platform
+import resource
+import sys
+import time
+from collections import defaultdict
+
+# The parser imports the database module, which needs a database name (no connection is made)
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import trafilatura  # noqa: E402
+
+from app.services.content_decoding import decode_html  # noqa: E402
+from app.services.parsed_document import GENERIC_EXTRACTOR, ParsedDocument  # noqa: E402
+from app.services.parser_service import ParserService  # noqa: E402
+
+CORPUS_DIR = pathlib.Path(__file__).resolve().parent / "corpus"
+
+STAGES = ("decode", "preprocess", "parse_tree", "extract_content", "extract_title", "post_process", "extract_metadata")
+
+# URL each synthetic corpus page is parsed as. Only the domain matters: it
+# selects the site extractor and the source_url metadata. The pages are not
+# snapshots of these URLs.
+CORPUS_PAGE_URLS = {
+    "substack_post.html": "https://aznakai.substack.com/p/the-middle-passage",
+    "medium_story.html": "https://medium.com/@karpathy/software-2-0-a64152b37c35",
+    "telegraph_article.html": "https://telegra.ph/api",
+    "github_readme.html": "https://github.com/adbar/trafilatura",
+    "habr_article.html": "https://habr.com/ru/articles/",
+    "news_article.html": "https://www.nature.com/articles/d41586-025-00437-0",
+    "docs_page.html": "https://docs.python.org/3/library/html.parser.html",
+    "legacy_news_windows1251.html": "http://www.aif.ru/",
+    "blog_shift_jis.html": "https://www.itmedia.co.jp/",
+}
+
+# Size of the generated page used to exercise huge documents
+HUGE_PAGE_BYTES = 3 * 1024 * 1024
+
+
+def _huge_page() -> bytes:
+    """A multi-megabyte article built from the news page body, generated so it is not checked in"""
+    base = (CORPUS_DIR / "news_article.html").read_text(encoding="utf-8")
+    head, _, rest = base.partition('<section class="story-body">')
+    body, _, tail = rest.partition("</section>")
+    repeats = HUGE_PAGE_BYTES // max(len(body), 1) + 1
+    return (head + '<section class="story-body">' + body * repeats + "</section>" + tail).encode("utf-8")
+
+
+def load_corpus(include_huge: bool = True) -> dict[str, bytes]:
+    pages = {path.name: path.read_bytes() for path in sorted(CORPUS_DIR.glob("*.html"))}
+    if include_huge:
+        pages["generated_huge_page.html"] = _huge_page()
+    return pages
+
+
+def run_pipeline(raw: bytes, url: str, timings: dict) -> str:
+    """Run one page through the extraction stages, adding each stage's time to timings"""
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[stage] += time.perf_counter() - start
+        return result
+
+    html = timed("decode", decode_html, raw)
+    html = timed("preprocess", ParserService._preprocess_html_content, html)
+    document = timed("parse_tree", lambda: ParsedDocument(html, url=url))
+    content = timed("extract_content", ParserService._extract_content, document)
+    title = timed("extract_title", ParserService._extract_title, document)
+    normalized = timed(
+        "post_process", ParserService._normalize_content, content, title, document.extractor == GENERIC_EXTRACTOR
+    )
+    timed("extract_metadata", ParserService._extract_metadata, document, normalized, title, url)
+    return normalized.markdown
+
+
+def page_url(name: str) -> str:
+    """The URL a corpus page is parsed as, so site extractors apply as they would in production"""
+    return CORPUS_PAGE_URLS.get(name, f"https://corpus.local/{name}")
+
+
+def benchmark(pages: dict[str, bytes], iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        for name, raw in pages.items():
+            run_pipeline(raw, page_url(name), defaultdict(float))
+
+    stage_totals = defaultdict(float)
+    page_totals = defaultdict(float)
+    failures = {}
+    processed = 0
+
+    gc.collect()
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        for name, raw in pages.items():
+            start = time.perf_counter()
+            try:
+                run_pipeline(raw, page_url(name), stage_totals)
+            except Exception as e:
+                failures[name] = str(e)
+            page_totals[name] += time.perf_counter() - start
+            processed += 1
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "python": platform.python_version(),
+        "trafilatura": trafilatura.__version__,
+        "iterations": iterations,
+        "pages": len(pages),
+        "corpus_bytes": sum(len(raw) for raw in pages.values()),
+        "pages_per_sec": round(processed / wall, 2),
+        "stage_ms_per_page": {stage: round(stage_totals[stage] * 1000 / processed, 3) for stage in STAGES},
+        "page_ms": {name: round(total * 1000 / iterations, 3) for name, total in page_totals.items()},
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "failures": failures,
+    }
+
+
+def _delta(current: float, baseline: float) -> str:
+    if not baseline:
+        return ""
+    return f" ({(current - baseline) / baseline:+.1%})"
+
+
+def print_report(results: dict, baseline: dict = None) -> None:
+    baseline = baseline or {}
+    print(f"Python {results['python']}, trafilatura {results['trafilatura']}, "
+          f"{results['pages']} pages ({results['corpus_bytes'] / 1024:.0f} KB) x {results['iterations']} iterations")
+    print(f"Throughput: {results['pages_per_sec']} pages/sec{_delta(results['pages_per_sec'], baseline.get('pages_per_sec'))}")
+    print(f"Peak RSS:   {results['peak_rss_mb']} MB{_delta(results['peak_rss_mb'], baseline.get('peak_rss_mb'))}")
+    print("\nStage               ms/page")
+    for stage, ms in results["stage_ms_per_page"].items():
+        print(f"  {stage:<17} {ms:>8.3f}{_delta(ms, baseline.get('stage_ms_per_page', {}).get(stage))}")
+    print("\nPage                               ms")
+    for name, ms in results["page_ms"].items():
+        print(f"  {name:<32} {ms:>8.3f}{_delta(ms, baseline.get('page_ms', {}).get(name))}")
+    for name, error in results["failures"].items():
+        print(f"  FAILED {name}: {error}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the parser over the offline HTML corpus")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--no-huge", action="store_true", help="Skip the generated multi-megabyte page")
+    parser.add_argument("--compare", type=pathlib.Path, help="Baseline JSON to compare against")
+    parser.add_argument("--save", type=pathlib.Path, help="Write the results as a JSON baseline")
+    parser.add_argument(
+        "--max-regression", type=float, default=None,
+        help="Exit with status 1 if pages/sec dropped by more than this fraction of the baseline"
+    )
+    args = parser.parse_args()
+
+    results = benchmark(load_corpus(include_huge=not args.no_huge), args.iterations, args.warmup)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(results, baseline)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n")
+        print(f"\nSaved baseline to {args.save}")
+
+    if baseline and args.max_regression is not None:
+        floor = baseline["pages_per_sec"] * (1 - args.max_regression)
+        if results["pages_per_sec"] < floor:
+            print(f"\nThroughput regression: {results['pages_per_sec']} < {floor:.2f} pages/sec")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Benchmark each site extractor against the generic trafilatura path.
+
+For every registered extractor, the corpus pages it handles are extracted
+both ways: with the extractor (plus the metadata pass it needs) and with
+trafilatura's combined content and metadata extraction. The report shows
+milliseconds per page for each path and the word count of both outputs, so a
+speedup that comes from dropping article text stands out.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_site_extractors
+    python -m benchmarks.bench_site_extractors --iterations 20 --extractor substack
+"""
+import argparse
+import json
+import os
+import pathlib
+import sys
+import time
+
+# The parser imports the database module, which needs a database name (no connection is made)
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from app.services.content_decoding import decode_html  # noqa: E402
+from app.services.parsed_document import ParsedDocument  # noqa: E402
+from app.services.parser_service import ParserService  # noqa: E402
+from app.services.site_extractors import site_extractors  # noqa: E402
+from benchmarks.bench_parser import load_corpus, page_url  # noqa: E402
+
+CORPUS_DIR = pathlib.Path(__file__).resolve().parent / "corpus"
+
+
+def _json_ld_page() -> tuple[str, bytes]:
+    """The news page with its story body copied into a JSON-LD articleBody, generated so it is not checked in"""
+    raw = (CORPUS_DIR / "news_article.html").read_bytes()
+    document = ParsedDocument(decode_html(raw))
+    paragraphs = [" ".join(p.text_content().split()) for p in document.tree.xpath('//section[@class="story-body"]/p')]
+    script = json.dumps({"@context": "https://schema.org", "@type": "NewsArticle", "articleBody": "\n".join(paragraphs)})
+    html = raw.decode("utf-8").replace("</head>", f'<script type="application/ld+json">{script}</script></head>', 1)
+    return "https://corpus.local/generated_json_ld_article.html", html.encode("utf-8")
+
+
+def pages_by_extractor() -> dict[str, list[tuple[str, str]]]:
+    """Preprocessed pages grouped by the site extractor that handles them, as (url, html)"""
+    pages = [(page_url(name), raw) for name, raw in load_corpus(include_huge=False).items()]
+    pages.append(_json_ld_page())
+
+    grouped: dict[str, list[tuple[str, str]]] = {}
+    for url, raw in pages:
+        html = ParserService._preprocess_html_content(decode_html(raw))
+        match = site_extractors.extract(ParsedDocument(html, url=url), url)
+        if match is not None:
+            grouped.setdefault(match[0], []).append((url, html))
+    return grouped
+
+
+def _time_site(extractor, html: str, url: str) -> tuple[float, str]:
+    document = ParsedDocument(html, url=url)
+    start = time.perf_counter()
+    content = extractor.extract(document)
+    ParserService._extract_site_metadata(document)
+    return time.perf_counter() - start, content
+
+
+def _time_generic(html: str, url: str) -> tuple[float, str]:
+    # trafilatura cleans the tree in place, so every run gets a fresh document
+    document = ParsedDocument(html, url=url)
+    start = time.perf_counter()
+    content = ParserService._extract_generic_content(document)
+    return time.perf_counter() - start, content
+
+
+def benchmark(iterations: int, only: str = None) -> dict:
+    grouped = pages_by_extractor()
+    results = {}
+    for extractor in site_extractors.extractors():
+        name = extractor.name
+        if only and name != only:
+            continue
+        pages = grouped.get(name, [])
+        site_total = generic_total = 0.0
+        site_words = generic_words = 0
+        for url, html in pages:
+            # Warm up both paths once per page
+            _time_site(extractor, html, url)
+            _time_generic(html, url)
+            for _ in range(iterations):
+                elapsed, site_content = _time_site(extractor, html, url)
+                site_total += elapsed
+                elapsed, generic_content = _time_generic(html, url)
+                generic_total += elapsed
+            site_words += len(site_content.split())
+            generic_words += len(generic_content.split())
+
+        runs = len(pages) * iterations
+        results[name] = {
+            "pages": [url for url, _ in pages],
+            "site_ms_per_page": round(site_total * 1000 / runs, 3) if runs else None,
+            "generic_ms_per_page": round(generic_total * 1000 / runs, 3) if runs else None,
+            "speedup": round(generic_total / site_total, 1) if site_total else None,
+            "site_words": site_words,
+            "generic_words": generic_words,
+        }
+    return results
+
+
+def print_report(results: dict) -> None:
+    print("Extractor    site ms  generic ms  speedup  words (site/generic)")
+    for name, result in results.items():
+        if not result["pages"]:
+            print(f"  {name:<10} no corpus page")
+            continue
+        print(
+            f"  {name:<10} {result['site_ms_per_page']:>7.3f}  {result['generic_ms_per_page']:>10.3f}"
+            f"  {result['speedup']:>6.1f}x  {result['site_words']}/{result['generic_words']}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark site extractors against the generic trafilatura path")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--extractor", help="Only benchmark the extractor with this name")
+    args = parser.parse_args()
+
+    results = benchmark(args.iterations, args.extractor)
+    print_report(results)
+
+    # A site extractor exists to be faster; flag any that is not
+    slower = [name for name, result in results.items() if result["speedup"] is not None and result["speedup"] < 1]
+    if slower:
+        print(f"\nSlower than the generic path: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Benchmark the single-pass text normalizer against the multi-pass functions it replaced.
+
+The inputs are the markdown extracted from each corpus page plus long
+articles built by repeating it. For each input the script reports the time
+per call for the old and new versions of paragraph separation, markdown
+stripping and duplicate-title removal. It also reports any input on which the
+outputs differ.
+
+Parity is only checked on these corpus-derived inputs. On malformed or
+overlapping markup the two strippers can disagree: "*a `b* c`" strips to
+"a b c" with the legacy function and to "a `b c`" with the new one.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_text_normalizer [--iterations 20]
+"""
+import argparse
+import logging
+import os
+import pathlib
+import sys
+import time
+
+os.environ.setdefault("DATABASE_NAME", "benchmark")
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from app.services import text_normalizer  # noqa: E402
+from app.services.content_decoding import decode_html  # noqa: E402
+from app.services.parsed_document import ParsedDocument  # noqa: E402
+from app.services.parser_service import ParserService  # noqa: E402
+from benchmarks.bench_parser import load_corpus  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# How many times the corpus markdown is repeated to build the long-article inputs
+LONG_ARTICLE_REPEATS = (10, 100)
+
+
+# Multi-pass implementations as they were before the single-pass normalizer, kept for comparison
+
+def legacy_strip_markdown(text: str) -> str:
+    """Strip markdown formatting from text, keeping only plain text.
+    
+    Args:
+        text: The markdown text to strip
+        
+    Returns:
+        Plain text without markdown formatting, links, or images
+    """
+    import re
+    
+    if not text:
+        return ""
+        
+    # Remove images: ![alt text](url)
+    text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
+    
+    # Remove links but keep the text: [text](url) -> text
+    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
+    
+    # Remove headers: # Header -> Header
+    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
+    
+    # Remove bold and italic: **bold** -> bold, *italic* -> italic
+    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.*?)\*', r'\1', text)
+    
+    # Remove code blocks and inline code
+    text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)
+    text = re.sub(r'`(.*?)`', r'\1', text)
+    
+    # Remove blockquotes: > quote -> quote
+    text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
+    
+    # Remove horizontal rules: ---, ***, ___
+    text = re.sub(r'^(---|\*\*\*|___)$', '', text, flags=re.MULTILINE)
+    
+    # Remove HTML tags
+    text = re.sub(r'<[^>]*>', '', text)
+    
+    # Normalize whitespace
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    return text
+
+
+def legacy_remove_duplicate_title(text: str, title: str, is_content: bool = True) -> str:
+    """Remove duplicate title or H1 heading from text if it matches the title.
+    
+    This method handles both article content and description text.
+    
+    Args:
+        text: The text to process (either content or description)
+        title: The article title to check against
+        is_content: Whether the text is article content (True) or description (False)
+        
+    Returns:
+        Processed text with duplicate title/heading removed if present
+    """
+    import re
+    import string
+    
+    # Normalize the title for comparison
+    def normalize_text(t):
+        # Convert to lowercase and remove punctuation
+        t = t.lower()
+        t = ''.join(c for c in t if c not in string.punctuation)
+        # Remove extra whitespace
+        t = ' '.join(t.split())
+        return t
+    
+    normalized_title = normalize_text(title)
+    normalized_text = normalize_text(text)
+    
+    logger.debug(f"Original {'content' if is_content else 'description'}: '{text[:100]}...'")
+    logger.debug(f"Title: '{title}'")
+    
+    # First check if text starts with an H1 heading that matches the title
+    h1_pattern = r'^# (.+?)(?:\n\n|\n|\r\n|\r|$)'
+    match = re.match(h1_pattern, text)
+    if match:
+        h1_text = match.group(1)
+        normalized_h1 = normalize_text(h1_text)
+        
+        logger.debug(f"Found H1 heading: '{h1_text}'")
+        logger.debug(f"Normalized H1: '{normalized_h1}'")
+        logger.debug(f"Normalized title: '{normalized_title}'")
+        
+        # If the normalized H1 matches the normalized title, remove it
+        if normalized_h1 == normalized_title:
+            text = text[match.end():].lstrip()
+            logger.info(f"Removed H1 heading from {'content' if is_content else 'description'}")
+            logger.debug(f"After H1 removal: '{text[:100]}...'")
+            return text
+    
+    # For descriptions only, also check if it starts with the title text
+    if not is_content:
+        # Check if description starts with the title (case-insensitive)
+        if text.startswith(title) or normalized_text.startswith(normalized_title):
+            # For exact match, remove the exact title
+            if text.startswith(title):
+                text = text[len(title):].lstrip()
+            # For normalized match, find where the normalized title ends in the normalized text
+            else:
+                # Find the length of the title in the original text
+                title_end_pos = len(normalized_title)
+                # Find the corresponding position in the original text
+                char_count = 0
+                pos = 0
+                for i, char in enumerate(text):
+                    if char_count >= title_end_pos:
+                        pos = i
+                        break
+                    # Only count characters that would be in the normalized text
+                    if char.lower() not in string.punctuation and not (char.isspace() and char_count > 0 and text[i-1].isspace()):
+                        char_count += 1
+                
+                text = text[pos:].lstrip()
+            
+            # If description starts with common separators, remove them
+            text = re.sub(r'^[:\-–—\s]+', '', text)
+            logger.info(f"Removed title from beginning of description")
+            logger.debug(f"After title removal: '{text[:100]}...'")
+    
+    return text
+
+
+def legacy_ensure_paragraph_separation(content: str) -> str:
+    """Ensure paragraphs are properly separated with double newlines.
+    
+    Args:
+        content: The markdown content extracted from the article
+        
+    Returns:
+        Processed content with proper paragraph separation
+    """
+    import re
+    
+    # First, normalize all newlines to \n
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    
+    # Replace single newlines with double newlines, but preserve existing double newlines
+    # and don't affect list items, code blocks, or other markdown formatting
+    
+    # Step 1: Temporarily mark existing double newlines
+    content = content.replace('\n\n', '§DOUBLE_NEWLINE§')
+    
+    # Step 2: Mark newlines that should be preserved as is (lists, code blocks, etc.)
+    # Lists
+    content = re.sub(r'\n([\*\-\+\d]+\. )', '§PRESERVE_NEWLINE§\\1', content)
+    # Code blocks
+    content = re.sub(r'\n(```|    )', '§PRESERVE_NEWLINE§\\1', content)
+    # Headers
+    content = re.sub(r'\n(#{1,6} )', '§PRESERVE_NEWLINE§\\1', content)
+    # Inline formatting (emphasis, bold, etc.)
+    content = re.sub(r'\n(\*[^\n]+?\*)', '§PRESERVE_NEWLINE§\\1', content)
+    content = re.sub(r'\n(\*\*[^\n]+?\*\*)', '§PRESERVE_NEWLINE§\\1', content)
+    # Links
+    content = re.sub(r'\n(\[[^\]]+\]\([^)]+\))', '§PRESERVE_NEWLINE§\\1', content)
+    
+    # Step 3: Replace remaining single newlines with double newlines
+    content = content.replace('\n', '\n\n')
+    
+    # Step 4: Restore preserved newlines
+    content = content.replace('§PRESERVE_NEWLINE§', '\n')
+    
+    # Step 5: Restore original double newlines
+    content = content.replace('§DOUBLE_NEWLINE§', '\n\n')
+    
+    # Step 6: Clean up any excessive newlines (more than 2)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    
+    return content
+
+
+def build_inputs() -> dict[str, tuple[str, str]]:
+    """Map of input name -> (extracted markdown, title)"""
+    inputs = {}
+    for name, raw in load_corpus(include_huge=False).items():
+        document = ParsedDocument(ParserService._preprocess_html_content(decode_html(raw)))
+        try:
+            content = ParserService._extract_content(document)
+        except Exception as e:
+            logger.warning(f"Skipping {name}: {e}")
+            continue
+        inputs[name] = (content, ParserService._extract_title(document))
+
+    combined = "\n\n".join(content for content, _ in inputs.values())
+    for repeats in LONG_ARTICLE_REPEATS:
+        inputs[f"long_article_x{repeats}"] = ("\n\n".join([combined] * repeats), "Long article")
+    return inputs
+
+
+def _time(fn, *args, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the text normalizer against the legacy multi-pass functions")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    cases = (
+        ("paragraphs", legacy_ensure_paragraph_separation, text_normalizer.ensure_paragraph_separation, lambda c, t: (c,)),
+        ("strip", legacy_strip_markdown, text_normalizer.strip_markdown, lambda c, t: (c,)),
+        ("title", legacy_remove_duplicate_title, text_normalizer.remove_duplicate_title, lambda c, t: (f"# {t}\n\n{c}", t, True)),
+    )
+
+    mismatches = []
+    print(f"{'input':<32} {'KB':>7}  " + "  ".join(f"{name + ' old/new ms':>24}" for name, *_ in cases))
+    for input_name, (content, title) in build_inputs().items():
+        iterations = max(1, args.iterations * 1000 // max(len(content) // 1024, 1000))
+        row = []
+        for case_name, legacy_fn, new_fn, make_args in cases:
+            call_args = make_args(content, title)
+            if legacy_fn(*call_args) != new_fn(*call_args):
+                mismatches.append(f"{input_name}: {case_name}")
+            old_ms = _time(legacy_fn, *call_args, iterations=iterations)
+            new_ms = _time(new_fn, *call_args, iterations=iterations)
+            row.append(f"{old_ms:>9.3f}/{new_ms:<9.3f}x{old_ms / new_ms:>4.1f}")
+        print(f"{input_name:<32} {len(content) / 1024:>7.0f}  " + "  ".join(f"{cell:>24}" for cell in row))
+
+    if mismatches:
+        print("\nOutput differs from the legacy implementation for:")
+        for mismatch in mismatches:
+            print(f"  {mismatch}")
+        return 1
+    print("\nOutputs are identical to the legacy implementation on the corpus inputs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
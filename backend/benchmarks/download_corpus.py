@@ -0,0 +1,46 @@
+"""Replace benchmark corpus pages with live captures.
+
+The checked-in corpus is synthetic: each page mirrors the markup of a site
+type (and, for two pages, a legacy encoding) but is not a snapshot of any
+live URL. So there is no default mapping to refresh from. To swap in a real
+capture, pass the corpus file name and the URL of an article page from the
+same site, with the same encoding for the windows-1251 and Shift_JIS pages,
+not a homepage, listing or API page.
+
+Pages are stored as the raw response bytes so non-UTF-8 pages keep their
+original encoding. A replaced page makes results incomparable with the saved
+baseline, so re-save the baseline in the same commit.
+
+Usage (from the backend directory):
+    python -m benchmarks.download_corpus NAME URL [NAME URL ...]
+    python -m benchmarks.download_corpus habr_article.html https://habr.com/ru/articles/<id>/
+"""
+import asyncio
+import pathlib
+import sys
+
+import httpx
+
+CORPUS_DIR = pathlib.Path(__file__).resolve().parent / "corpus"
+
+USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_3_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3.1 Mobile/15E148 Safari/604.1"
+
+
+async def download(pages: list[tuple[str, str]]) -> None:
+    async with httpx.AsyncClient(follow_redirects=True, timeout=30, headers={"User-Agent": USER_AGENT}) as client:
+        for name, url in pages:
+            try:
+                response = await client.get(url)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                print(f"Failed to download {url}: {e}")
+                continue
+            (CORPUS_DIR / name).write_bytes(response.content)
+            print(f"Saved {name} ({len(response.content)} bytes) from {url}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or len(args) % 2:
+        sys.exit(__doc__)
+    asyncio.run(download(list(zip(args[::2], args[1::2]))))
@@ -0,0 +1,161 @@
+import pytest
+import sys
+import os
+from pymongo import DeleteOne
+from pymongo.errors import DuplicateKeyError
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import article_bodies, extraction_cache as extraction_cache_collection, parse_locks, user_articles, users
+from app.services.article_cache import article_cache
+from app.services.article_content_cache import article_content_cache
+from app.services.extraction_cache import extraction_cache
+from app.services.fetch_scheduler import fetch_scheduler
+from app.services.snapshot_store import LocalSnapshotStorage, snapshot_store
+
+
+@pytest.fixture
+def in_memory_parse_locks():
+    """Back the parse_locks collection with a dict so parse tests never need a Mongo server"""
+    leases = {}
+
+    async def insert_one(doc):
+        if doc["_id"] in leases:
+            raise DuplicateKeyError("Duplicate key error")
+        leases[doc["_id"]] = dict(doc)
+
+    async def find_one_and_update(query, update):
+        lease = leases.get(query["_id"])
+        if "owner" in query:
+            matches = lease is not None and lease["owner"] == query["owner"]
+        else:
+            matches = lease is not None and lease["expires_at"] < query["expires_at"]["$lt"]
+        if matches:
+            lease.update(update["$set"])
+            return lease
+        return None
+
+    async def delete_one(query):
+        lease = leases.get(query["_id"])
+        if lease and lease["owner"] == query["owner"]:
+            del leases[query["_id"]]
+
+    originals = (parse_locks.insert_one, parse_locks.find_one_and_update, parse_locks.delete_one)
+    parse_locks.insert_one = insert_one
+    parse_locks.find_one_and_update = find_one_and_update
+    parse_locks.delete_one = delete_one
+    yield leases
+    parse_locks.insert_one, parse_locks.find_one_and_update, parse_locks.delete_one = originals
+
+
+@pytest.fixture
+def fresh_fetch_scheduler():
+    """Start the test with no per-domain pacing or circuit breaker state"""
+    fetch_scheduler.reset()
+    yield fetch_scheduler
+    fetch_scheduler.reset()
+
+
+@pytest.fixture
+def in_memory_extraction_cache():
+    """Back the extraction_cache collection with a dict and start with an empty in-process tier"""
+    documents = {}
+
+    async def find_one(query):
+        return documents.get(query["_id"])
+
+    async def replace_one(query, doc, upsert=False):
+        documents[query["_id"]] = dict(doc, _id=query["_id"])
+
+    originals = (extraction_cache_collection.find_one, extraction_cache_collection.replace_one)
+    extraction_cache_collection.find_one = find_one
+    extraction_cache_collection.replace_one = replace_one
+    extraction_cache.clear()
+    yield documents
+    extraction_cache.clear()
+    extraction_cache_collection.find_one, extraction_cache_collection.replace_one = originals
+
+
+@pytest.fixture
+def tmp_snapshot_store(tmp_path):
+    """Write raw page snapshots to a per-test temporary directory"""
+    original = snapshot_store.storage
+    snapshot_store.storage = LocalSnapshotStorage(tmp_path / "snapshots")
+    yield snapshot_store
+    snapshot_store.storage = original
+
+
+@pytest.fixture
+def in_memory_article_bodies():
+    """Back the article_bodies collection with a dict"""
+    bodies = {}
+
+    def apply_upsert(query, update):
+        if query["_id"] in bodies and "$setOnInsert" in update:
+            return
+        bodies[query["_id"]] = dict(update.get("$set") or update["$setOnInsert"], _id=query["_id"])
+
+    async def find_one(query):
+        return bodies.get(query["_id"])
+
+    async def update_one(query, update, upsert=False):
+        apply_upsert(query, update)
+
+    async def delete_one(query):
+        bodies.pop(query["_id"], None)
+
+    async def bulk_write(operations, ordered=True):
+        for operation in operations:
+            if isinstance(operation, DeleteOne):
+                bodies.pop(operation._filter["_id"], None)
+            else:
+                apply_upsert(operation._filter, operation._doc)
+
+    names = ("find_one", "update_one", "delete_one", "bulk_write")
+    originals = {name: getattr(article_bodies, name) for name in names}
+    article_bodies.find_one = find_one
+    article_bodies.update_one = update_one
+    article_bodies.delete_one = delete_one
+    article_bodies.bulk_write = bulk_write
+    yield bodies
+    for name, original in originals.items():
+        setattr(article_bodies, name, original)
+
+
+@pytest.fixture
+def empty_article_caches():
+    """Start the test with no cached article documents or bodies"""
+    article_cache.clear()
+    article_content_cache.clear()
+    yield
+    article_cache.clear()
+    article_content_cache.clear()
+
+
+@pytest.fixture
+def in_memory_library_versions():
+    """Back library version bumps with a dict of user_id -> version
+
+    Readers of an article are looked up in readers (article_id -> user_ids),
+    which tests fill in when they need re-extraction bumps to reach someone.
+    """
+    versions = {}
+    readers = {}
+
+    async def update_one(query, update):
+        versions[query["_id"]] = versions.get(query["_id"], 0) + update["$inc"]["library_version"]
+
+    async def update_many(query, update):
+        for user_id in query.get("_id", {}).get("$in", list(versions)):
+            await update_one({"_id": user_id}, update)
+
+    async def distinct(key, query):
+        return sorted({user_id for article_id in query["article_id"]["$in"] for user_id in readers.get(article_id, ())})
+
+    originals = (users.update_one, users.update_many, user_articles.distinct)
+    users.update_one = update_one
+    users.update_many = update_many
+    user_articles.distinct = distinct
+    yield versions, readers
+    users.update_one, users.update_many, user_articles.distinct = originals
@@ -0,0 +1,144 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+from bson import ObjectId
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.article_body_store import article_body_store
+from app.services.content_codec import content_codec
+from app.services import article_service
+from app.migrations.article_bodies import move_article_bodies
+from app.database import articles, article_bodies, user_articles
+
+
+LONG_BODY = "## Heading\n\n" + "A paragraph of a long read that repeats itself. " * 200
+
+
+class FakeCursor:
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        self.documents = sorted(self.documents, key=lambda doc: doc[key])
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class TestArticleBodyStore:
+
+    @pytest.mark.asyncio
+    async def test_compressed_round_trip(self, in_memory_article_bodies):
+        """Test that bodies are stored compressed when enabled and read back unchanged"""
+        original_mode = content_codec.MODE
+        long_id, short_id = ObjectId(), ObjectId()
+        try:
+            content_codec.MODE = "zlib"
+            await article_body_store.save(long_id, LONG_BODY)
+            await article_body_store.save(short_id, "Short body")
+        finally:
+            content_codec.MODE = original_mode
+
+        assert in_memory_article_bodies[long_id]["content_encoding"] == "zlib"
+        assert len(in_memory_article_bodies[long_id]["content"]) < len(LONG_BODY) / 10
+        assert in_memory_article_bodies[short_id]["content_encoding"] is None
+        # Reading does not depend on the configured encoding
+        assert await article_body_store.load(long_id) == LONG_BODY
+        assert await article_body_store.load(short_id) == "Short body"
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("in_memory_article_bodies")
+    async def test_load_falls_back_to_inline_content(self):
+        """Test that an article stored before the split is read from its own document"""
+        original_find_one = articles.find_one
+        article_id = ObjectId()
+        try:
+            async def mock_find_one(query, projection=None):
+                assert projection == {"content": 1}
+                return {"_id": article_id, "content": "Inline body"}
+            articles.find_one = mock_find_one
+
+            assert await article_body_store.load(article_id) == "Inline body"
+        finally:
+            articles.find_one = original_find_one
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("empty_article_caches")
+    async def test_only_the_reader_loads_the_body(self, in_memory_article_bodies):
+        """Test that get_article never reads the body and get_user_article_flat does"""
+        original_find_one = articles.find_one
+        original_bodies_find_one = article_bodies.find_one
+        original_user_articles_find_one = user_articles.find_one
+        article_id, user_id = ObjectId(), ObjectId()
+        await article_body_store.save(article_id, LONG_BODY)
+        try:
+            async def mock_find_one(query, projection=None):
+                assert projection == {"content": 0}
+                return {
+                    "_id": article_id,
+                    "title": "Stored separately",
+                    "metadata": {"source_url": "https://example.com/a"},
+                    "created_at": datetime.utcnow()
+                }
+            async def failing_bodies_find_one(query):
+                raise AssertionError("The body must not be read")
+            async def mock_user_articles_find_one(query):
+                return {"_id": ObjectId(), "user_id": user_id, "article_id": article_id, "timestamps": {}}
+            articles.find_one = mock_find_one
+            article_bodies.find_one = failing_bodies_find_one
+            user_articles.find_one = mock_user_articles_find_one
+
+            article = await article_service.get_article(str(article_id))
+            assert article.title == "Stored separately"
+            assert article.content is None
+
+            article_bodies.find_one = original_bodies_find_one
+            flat = await article_service.get_user_article_flat(str(user_id), str(article_id))
+            assert flat.content == LONG_BODY
+        finally:
+            articles.find_one = original_find_one
+            article_bodies.find_one = original_bodies_find_one
+            user_articles.find_one = original_user_articles_find_one
+
+    @pytest.mark.asyncio
+    async def test_migration_moves_inline_content(self, in_memory_article_bodies):
+        """Test that the migration moves inline bodies without overwriting newer ones"""
+        original_find = articles.find
+        original_bulk_write = articles.bulk_write
+        stored = {
+            article_id: {"_id": article_id, "content": f"Inline body {number}"}
+            for number, article_id in enumerate([ObjectId(), ObjectId(), ObjectId()])
+        }
+        reextracted_id = list(stored)[1]
+        await article_body_store.save(reextracted_id, "Re-extracted body")
+        try:
+            def mock_find(query, projection=None):
+                return FakeCursor([
+                    dict(doc) for doc in stored.values()
+                    if "content" in doc and ("_id" not in query or doc["_id"] > query["_id"]["$gt"])
+                ])
+            async def mock_bulk_write(operations, ordered=True):
+                for operation in operations:
+                    stored[operation._filter["_id"]].pop("content", None)
+            articles.find = mock_find
+            articles.bulk_write = mock_bulk_write
+
+            stats = await move_article_bodies(batch_size=2)
+
+            assert stats["moved"] == 3
+            assert all("content" not in doc for doc in stored.values())
+            first_id = list(stored)[0]
+            assert await article_body_store.load(first_id) == "Inline body 0"
+            assert await article_body_store.load(reextracted_id) == "Re-extracted body"
+        finally:
+            articles.find = original_find
+            articles.bulk_write = original_bulk_write
@@ -0,0 +1,68 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+from bson import ObjectId
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import lru_cache
+from app.services.lru_cache import LRUCache
+from app.services.article_cache import article_cache
+from app.services import article_service
+from app.database import articles
+
+
+class TestArticleCache:
+
+    def test_lru_evicts_by_bytes_and_expires(self, monkeypatch):
+        """Test that the LRU keeps within its byte budget and treats expired entries as misses"""
+        now = [1000.0]
+        monkeypatch.setattr(lru_cache.time, "monotonic", lambda: now[0])
+        cache = LRUCache(10, max_bytes=10, ttl=60, sizeof=len)
+
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        assert cache.get("a") == "aaaa"
+        # "b" is now the least recently used and is evicted to make room
+        cache.put("c", "cccc")
+        assert "b" not in cache and cache.bytes == 8
+        # Larger than the whole budget: not cached
+        cache.put("huge", "x" * 11)
+        assert "huge" not in cache and cache.bytes == 8
+
+        now[0] += 61
+        assert cache.get("a") is None
+        assert cache.stats() == {"entries": 1, "bytes": 4, "hits": 1, "misses": 1, "evictions": 1}
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("empty_article_caches")
+    async def test_shared_reads_hit_the_cache(self):
+        """Test that repeated opens read the article once and re-read it after invalidation"""
+        original_find_one = articles.find_one
+        article_id = ObjectId()
+        lookups = []
+        hits = article_cache.stats()["hits"]
+        try:
+            async def mock_find_one(query, projection=None):
+                lookups.append(query["_id"])
+                return {
+                    "_id": article_id,
+                    "title": f"Title {len(lookups)}",
+                    "metadata": {"source_url": "https://example.com/a"},
+                    "created_at": datetime.utcnow()
+                }
+            articles.find_one = mock_find_one
+
+            for _ in range(3):
+                article = await article_service.get_article(str(article_id))
+            assert article.title == "Title 1"
+            assert lookups == [article_id]
+
+            # Re-extraction rewrote the document
+            article_cache.invalidate(article_id)
+            assert (await article_service.get_article(str(article_id))).title == "Title 2"
+            assert article_cache.stats()["hits"] - hits == 2
+        finally:
+            articles.find_one = original_find_one
@@ -0,0 +1,120 @@
+import gzip
+import pytest
+import sys
+import os
+import brotli
+from bson import ObjectId
+from fastapi import HTTPException
+from starlette.requests import Request
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import articles
+from app.main import get_article_content
+from app.services import lru_cache
+from app.services.article_body_store import article_body_store
+from app.services.article_content_cache import ArticleContentCache, negotiate_encoding
+
+
+BODY = "## Heading\n\n" + "A paragraph of a long read, with some ünïcode. " * 100
+
+
+class TestArticleContentCache:
+
+    def test_negotiate_encoding(self):
+        """Test that the smallest accepted encoding wins and q=0 refuses a coding"""
+        assert negotiate_encoding("gzip, deflate, br") == "br"
+        assert negotiate_encoding("gzip, br;q=0") == "gzip"
+        assert negotiate_encoding("br;q=0.5, gzip;q=1.0") == "br"
+        assert negotiate_encoding("*") == "br"
+        assert negotiate_encoding("deflate") == "identity"
+        assert negotiate_encoding(None) == "identity"
+        assert negotiate_encoding("br;q=0, gzip;q=0") == "identity"
+
+    @pytest.mark.asyncio
+    async def test_variants_are_compressed_once(self, in_memory_article_bodies, monkeypatch):
+        """Test that each encoding is compressed on first use and served from the cache after"""
+        cache = ArticleContentCache()
+        article_id = ObjectId()
+        await article_body_store.save(article_id, BODY)
+
+        compressed = []
+        original_compress = cache._compress
+        def counting_compress(body, encoding):
+            compressed.append(encoding)
+            return original_compress(body, encoding)
+        monkeypatch.setattr(cache, "_compress", counting_compress)
+
+        entry = await cache.get(article_id)
+        assert brotli.decompress(await cache.variant(entry, "br")).decode() == BODY
+        assert gzip.decompress(await cache.variant(entry, "gzip")).decode() == BODY
+        assert (await cache.variant(entry, "identity")).decode() == BODY
+
+        # A later open, even after the stored body is gone, is served from memory
+        in_memory_article_bodies.clear()
+        again = await cache.get(article_id)
+        assert again is entry
+        await cache.variant(again, "br")
+        assert compressed == ["br", "gzip"]
+        assert again.matches(f"\"other\", {entry.etag.removeprefix('W/')}")
+        assert not again.matches(None)
+
+    @pytest.mark.asyncio
+    async def test_invalidate_reloads_the_body(self, in_memory_article_bodies, monkeypatch):
+        """Test that a rewritten body is reloaded after invalidation with a new ETag"""
+        cache = ArticleContentCache()
+        article_id = ObjectId()
+        await article_body_store.save(article_id, BODY)
+        entry = await cache.get(article_id)
+
+        await article_body_store.save(article_id, "Re-extracted body")
+        cache.invalidate(article_id)
+        updated = await cache.get(article_id)
+        assert updated.variants["identity"] == b"Re-extracted body"
+        assert updated.etag != entry.etag
+
+        async def no_article(query, projection=None):
+            return None
+        monkeypatch.setattr(articles, "find_one", no_article)
+        in_memory_article_bodies.clear()
+        cache.invalidate(article_id)
+        with pytest.raises(HTTPException) as error:
+            await cache.get(article_id)
+        assert error.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded_by_bytes_and_ttl(self, in_memory_article_bodies, monkeypatch):
+        """Test that compressed variants count against the byte budget and entries expire"""
+        now = [1000.0]
+        monkeypatch.setattr(lru_cache.time, "monotonic", lambda: now[0])
+        monkeypatch.setattr(ArticleContentCache, "MAX_BYTES", 2 * len(BODY.encode()) + 16)
+        cache = ArticleContentCache()
+        first, second = ObjectId(), ObjectId()
+        await article_body_store.save(first, BODY)
+        await article_body_store.save(second, BODY)
+
+        entry = await cache.get(first)
+        await cache.get(second)
+        assert cache.stats()["entries"] == 2
+        # first is the most recently used; its gzip variant pushes second out
+        await cache.get(first)
+        gzipped = await cache.variant(entry, "gzip")
+        assert cache.stats() == {
+            "entries": 1,
+            "bytes": len(BODY.encode()) + len(gzipped),
+            "hits": 1,
+            "misses": 2,
+            "evictions": 1
+        }
+
+        now[0] += ArticleContentCache.TTL + 1
+        assert await cache.get(first) is not entry
+
+    @pytest.mark.asyncio
+    async def test_malformed_id_is_not_found(self):
+        """Test that the content route answers a malformed article ID with 404"""
+        request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+        with pytest.raises(HTTPException) as error:
+            await get_article_content("not-an-id", request)
+        assert error.value.status_code == 404
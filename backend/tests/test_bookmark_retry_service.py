@@ -0,0 +1,176 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from bson import ObjectId
+from fastapi import HTTPException
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.bookmark_retry_service import BookmarkRetryService
+from app.services.parser_service import ParserService
+from app.database import articles
+
+
+ARTICLE_HTML = f"""
+<html>
+<head><meta property="og:title" content="Recovered Article"></head>
+<body><article>{''.join(
+    f'<p>Paragraph {i} of the recovered article has enough words in it to be kept as real content.</p>'
+    for i in range(6)
+)}</article></body>
+</html>
+"""
+
+
+class FakeCursor:
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class FakeArticles:
+    """In-memory articles collection supporting the queries of a parse and a bookmark retry"""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def find_one(self, query, projection=None):
+        for doc in self.documents.values():
+            if "_id" in query and doc["_id"] == query["_id"]:
+                return dict(doc)
+            if doc["metadata"].get("canonical_url") == query.get("metadata.canonical_url"):
+                return dict(doc)
+        return None
+
+    async def insert_one(self, doc):
+        doc = dict(doc, _id=ObjectId())
+        self.documents[doc["_id"]] = doc
+        return MagicMock(inserted_id=doc["_id"])
+
+    async def update_one(self, query, update):
+        doc = self.documents[query["_id"]]
+        doc.update(update["$set"])
+        for key in update.get("$unset", {}):
+            doc.pop(key, None)
+
+    def find(self, query, projection=None):
+        now = query["retry.next_attempt_at"]["$lte"]
+        return FakeCursor([
+            dict(doc) for doc in self.documents.values()
+            if doc.get("type") == "bookmark" and (doc.get("retry") or {}).get("next_attempt_at")
+            and doc["retry"]["next_attempt_at"] <= now
+        ])
+
+    def install(self):
+        originals = (articles.find_one, articles.insert_one, articles.update_one, articles.find)
+        articles.find_one, articles.insert_one = self.find_one, self.insert_one
+        articles.update_one, articles.find = self.update_one, self.find
+        return originals
+
+    @staticmethod
+    def restore(originals):
+        articles.find_one, articles.insert_one, articles.update_one, articles.find = originals
+
+
+class TestBookmarkRetryService:
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures(
+        "in_memory_parse_locks",
+        "fresh_fetch_scheduler",
+        "in_memory_extraction_cache",
+        "tmp_snapshot_store",
+        "empty_article_caches",
+        "in_memory_library_versions",
+    )
+    async def test_transient_failure_backs_off_then_upgrades_in_place(self, in_memory_article_bodies):
+        """Test that a 502 bookmark is not refetched during its backoff and is upgraded once due"""
+        original_fetch = ParserService._fetch_html_content
+        fake = FakeArticles()
+        originals = fake.install()
+        fetches = []
+        try:
+            async def failing_fetch(url):
+                fetches.append(url)
+                raise HTTPException(status_code=502, detail="The website server returned an error (502).")
+            ParserService._fetch_html_content = failing_fetch
+
+            article_id, article_type = await ParserService._get_or_create_article("https://example.com/story")
+            assert article_type == "bookmark"
+            retry = fake.documents[article_id]["retry"]
+            assert retry["attempts"] == 1 and retry["status_code"] == 502
+            assert retry["next_attempt_at"] >= datetime.utcnow() + timedelta(seconds=ParserService.BOOKMARK_RETRY_BASE_DELAY - 1)
+
+            # Within the backoff the bookmark is returned without fetching again
+            assert await ParserService._get_or_create_article("https://example.com/story") == (article_id, "bookmark")
+            assert len(fetches) == 1
+
+            async def working_fetch(url):
+                fetches.append(url)
+                return ARTICLE_HTML
+            ParserService._fetch_html_content = working_fetch
+            fake.documents[article_id]["retry"]["next_attempt_at"] = datetime.utcnow() - timedelta(seconds=1)
+
+            assert await BookmarkRetryService().run_once() == {"upgraded": 1}
+            upgraded = fake.documents[article_id]
+            assert upgraded["type"] == "article"
+            assert upgraded["title"] == "Recovered Article"
+            assert "retry" not in upgraded
+            assert "content" not in upgraded
+            assert "Paragraph 0" in in_memory_article_bodies[article_id]["content"]
+            assert len(fetches) == 2
+        finally:
+            ParserService._fetch_html_content = original_fetch
+            FakeArticles.restore(originals)
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("in_memory_parse_locks")
+    async def test_permanent_failure_is_not_retried(self):
+        """Test that a blocked page gets no next attempt and that retries stop after the last attempt"""
+        original_fetch = ParserService._fetch_html_content
+        fake = FakeArticles()
+        originals = fake.install()
+        try:
+            async def blocked_fetch(url):
+                raise HTTPException(status_code=403, detail="Website is blocking content downloading.")
+            ParserService._fetch_html_content = blocked_fetch
+
+            article_id, _ = await ParserService._get_or_create_article("https://example.com/blocked")
+            assert fake.documents[article_id]["retry"]["next_attempt_at"] is None
+
+            state = ParserService._retry_state(
+                "https://example.com/busy",
+                HTTPException(status_code=503, detail="Busy"),
+                ParserService.BOOKMARK_RETRY_MAX_ATTEMPTS
+            )
+            assert state["next_attempt_at"] is None
+            assert await BookmarkRetryService().run_once() == {}
+        finally:
+            ParserService._fetch_html_content = original_fetch
+            FakeArticles.restore(originals)
+
+    @pytest.mark.asyncio
+    async def test_domain_backoff_defers_retry(self, fresh_fetch_scheduler):
+        """Test that a due bookmark on a domain that is backing off is left for later"""
+        url = "https://example.com/later"
+        fresh_fetch_scheduler.record_status(url, 429, "120")
+        bookmark = {
+            "_id": ObjectId(),
+            "type": "bookmark",
+            "metadata": {"source_url": url, "canonical_url": url},
+            "retry": {"attempts": 1, "next_attempt_at": datetime.utcnow() - timedelta(seconds=1)}
+        }
+        assert await BookmarkRetryService().retry(bookmark) == "deferred"
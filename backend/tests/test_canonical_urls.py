@@ -0,0 +1,111 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import DeleteOne, UpdateOne
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.migrations.canonical_urls import backfill_canonical_urls
+from app.database import articles, user_articles
+
+
+class FakeCursor:
+
+    def __init__(self, documents):
+        self._iterator = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class TestCanonicalUrlMigration:
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("in_memory_article_bodies", "in_memory_library_versions")
+    async def test_links_are_moved_before_duplicates_are_deleted(self):
+        """Test that with small batches no flush leaves a link pointing at a deleted article"""
+        start = datetime(2024, 1, 1)
+        article_docs, link_docs = {}, {}
+        for number in range(5):
+            # Three copies of each post, differing only in tracking parameters
+            for copy, suffix in enumerate(("", "?utm_source=a", "?utm_source=b")):
+                article_id = ObjectId()
+                article_docs[article_id] = {
+                    "_id": article_id,
+                    "metadata": {"source_url": f"https://example.com/posts/{number}{suffix}"},
+                    "created_at": start + timedelta(minutes=copy),
+                    "type": "article"
+                }
+                if copy != 2:
+                    continue
+                # One save per post, of a duplicate: each merge queues one link and three article ops
+                link_id = ObjectId()
+                link_docs[link_id] = {
+                    "_id": link_id,
+                    "user_id": ObjectId(),
+                    "article_id": article_id,
+                    "timestamps": {"saved_at": start}
+                }
+
+        flushes = []
+        names = ("find", "bulk_write")
+        originals = {
+            collection: {name: getattr(collection, name) for name in names}
+            for collection in (articles, user_articles)
+        }
+
+        def assert_links_resolve():
+            assert all(link["article_id"] in article_docs for link in link_docs.values())
+
+        def find_articles(query, projection=None):
+            return FakeCursor(list(article_docs.values()))
+
+        def find_links(query, projection=None):
+            wanted = set(query["article_id"]["$in"])
+            return FakeCursor([dict(link) for link in link_docs.values() if link["article_id"] in wanted])
+
+        async def write_articles(operations, ordered=True):
+            for operation in operations:
+                if isinstance(operation, DeleteOne):
+                    del article_docs[operation._filter["_id"]]
+                else:
+                    article_docs[operation._filter["_id"]]["metadata"].update(
+                        {"canonical_url": operation._doc["$set"]["metadata.canonical_url"]}
+                    )
+            flushes.append("articles")
+            assert_links_resolve()
+
+        async def write_links(operations, ordered=True):
+            for operation in operations:
+                if isinstance(operation, UpdateOne):
+                    link_docs[operation._filter["_id"]]["article_id"] = operation._doc["$set"]["article_id"]
+                else:
+                    del link_docs[operation._filter["_id"]]
+            flushes.append("user_articles")
+            assert_links_resolve()
+
+        try:
+            articles.find = find_articles
+            articles.bulk_write = write_articles
+            user_articles.find = find_links
+            user_articles.bulk_write = write_links
+
+            stats = await backfill_canonical_urls(batch_size=3)
+
+            assert stats["merged"] == 10
+            assert len(article_docs) == 5
+            assert flushes.count("articles") > 1
+            assert_links_resolve()
+        finally:
+            for collection, methods in originals.items():
+                for name, original in methods.items():
+                    setattr(collection, name, original)
@@ -0,0 +1,76 @@
+import pytest
+import sys
+import os
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.content_codec import ContentCodec
+from app.database import content_dictionaries
+
+
+def _body(topic: int) -> str:
+    paragraphs = []
+    for number in range(12):
+        paragraphs += [
+            f"## Section {number} on topic {topic}",
+            f"The reader opens a long article about topic {topic} and scrolls through paragraph {number}.",
+            f"- A list item about [a link](https://example.com/{topic}/{number}) with **bold** text",
+        ]
+    return "\n\n".join(paragraphs)
+
+
+class TestContentCodec:
+
+    def test_zlib_round_trip_and_short_bodies(self):
+        """Test that zlib bodies round-trip and short bodies stay text"""
+        codec = ContentCodec()
+        codec.MODE = "zlib"
+        body = _body(1)
+
+        data, encoding, dictionary_id = codec.encode(body)
+        assert (encoding, dictionary_id) == ("zlib", None)
+        assert codec.decode(data, encoding) == body
+        assert codec.encode("Short") == ("Short", None, None)
+
+        codec.MODE = "false"
+        assert codec.encode(body) == (body, None, None)
+
+    @pytest.mark.asyncio
+    async def test_trained_dictionary(self):
+        """Test that a trained dictionary shrinks bodies and is loaded by id to decode them"""
+        stored = {}
+        originals = (content_dictionaries.update_many, content_dictionaries.update_one, content_dictionaries.find_one)
+        try:
+            async def update_many(query, update):
+                for doc in stored.values():
+                    doc.update(update["$set"])
+            async def update_one(query, update, upsert=False):
+                stored.setdefault(query["_id"], dict(update["$setOnInsert"], _id=query["_id"])).update(update["$set"])
+            async def find_one(query, sort=None):
+                # Lookups by id only
+                return stored[query["_id"]]
+            content_dictionaries.update_many = update_many
+            content_dictionaries.update_one = update_one
+            content_dictionaries.find_one = find_one
+
+            codec = ContentCodec()
+            codec.MODE = "zstd"
+            codec.DICTIONARY_SIZE = 4096
+            body = _body(0)
+            plain_size = len(codec.encode(body)[0])
+
+            dictionary_id = await codec.activate(codec.train([_body(topic) for topic in range(1, 40)]), 39)
+            data, encoding, stored_id = codec.encode(body)
+            assert (encoding, stored_id) == ("zstd", dictionary_id)
+            assert len(data) < plain_size
+
+            # Another process that does not write zstd skips the active dictionary
+            # at startup and loads the one a body names on first use
+            reader = ContentCodec()
+            reader.MODE = "false"
+            assert await reader.load_active_dictionary() is None
+            await reader.ensure_dictionary(stored_id)
+            assert reader.decode(data, encoding, stored_id) == body
+        finally:
+            content_dictionaries.update_many, content_dictionaries.update_one, content_dictionaries.find_one = originals
@@ -0,0 +1,88 @@
+import pytest
+import sys
+import os
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.extraction_cache import extraction_cache
+from app.services.extraction_executor import ExtractionResult
+from app.services.lru_cache import LRUCache
+from app.services.parser_service import ParserService
+from app.models.article import ArticleMetadata
+
+
+SAMPLE_HTML = """
+<html>
+<head>
+    <meta property="og:title" content="Mirrored Article">
+</head>
+<body>
+    <article>
+        <h1>Mirrored Article</h1>
+        <p>The first paragraph of the article has enough words in it to be considered real content by the extractor.</p>
+        <p>The second paragraph continues the story with a few more sentences so that trafilatura keeps the text.</p>
+        <p>A third paragraph makes sure the extracted body is comfortably above the minimum extracted size.</p>
+    </article>
+</body>
+</html>
+"""
+
+
+class TestExtractionCache:
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        """Test that the LRU keeps recently read entries and drops the oldest"""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("in_memory_extraction_cache")
+    async def test_identical_pages_are_extracted_once(self):
+        """Test that the same HTML reached through two URLs skips the second extraction"""
+        original_extract_content = ParserService._extract_content
+        calls = []
+        try:
+            def counting_extract_content(document):
+                calls.append(document)
+                return original_extract_content(document)
+            ParserService._extract_content = counting_extract_content
+
+            first = await ParserService._extract_article(SAMPLE_HTML, "https://example.com/post")
+            second = await ParserService._extract_article(SAMPLE_HTML, "https://amp.example.com/post?utm_source=x")
+
+            assert len(calls) == 1
+            assert second.content == first.content
+            assert second.title == "Mirrored Article"
+            assert first.metadata.source_url == "https://example.com/post"
+            assert second.metadata.source_url == "https://amp.example.com/post?utm_source=x"
+        finally:
+            ParserService._extract_content = original_extract_content
+
+    @pytest.mark.asyncio
+    async def test_mongo_tier_serves_other_processes(self, in_memory_extraction_cache):
+        """Test that a result stored by one process is found after the in-process tier is empty"""
+        result = ExtractionResult(
+            title="Stored",
+            content="Stored content",
+            description="Stored description",
+            metadata=ArticleMetadata(source_url="https://a.example.com", canonical_url="https://a.example.com", reading_time=3)
+        )
+        await extraction_cache.put("key", result)
+        stored = in_memory_extraction_cache["key"]
+        assert "source_url" not in stored["metadata"]
+        assert "canonical_url" not in stored["metadata"]
+
+        extraction_cache.clear()
+        cached = await extraction_cache.get("key", "https://b.example.com")
+        assert cached.content == "Stored content"
+        assert cached.metadata.reading_time == 3
+        assert cached.metadata.source_url == "https://b.example.com"
+        assert cached.metadata.canonical_url is None
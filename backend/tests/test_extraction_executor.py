@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+import sys
+import os
+import time
+from fastapi import HTTPException
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.extraction_executor import ExtractionExecutor, ExtractionResult
+from app.services.parser_service import ParserService
+
+
+SAMPLE_HTML = """
+<html>
+<head>
+    <meta property="og:title" content="Process Pool Article">
+    <title>HTML Title</title>
+</head>
+<body>
+    <article>
+        <h1>Process Pool Article</h1>
+        <p>The first paragraph of the article has enough words in it to be considered real content by the extractor.</p>
+        <p>The second paragraph continues the story with a few more sentences so that trafilatura keeps the text.</p>
+        <p>A third paragraph makes sure the extracted body is comfortably above the minimum extracted size.</p>
+    </article>
+</body>
+</html>
+"""
+
+
+class TestExtractionExecutor:
+
+    @pytest.mark.asyncio
+    async def test_run_without_pool_uses_thread(self):
+        """Test that the executor runs work in a thread when the pool is not started"""
+        executor = ExtractionExecutor()
+        result = await executor.run(sum, [1, 2, 3])
+        assert result == 6
+        assert executor.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_task_timeout(self):
+        """Test that a slow task is reported as a 504 and counted in flight until it finishes"""
+        executor = ExtractionExecutor()
+        executor.TASK_TIMEOUT = 0.05
+
+        with pytest.raises(HTTPException) as exc_info:
+            await executor.run(time.sleep, 0.2)
+        assert exc_info.value.status_code == 504
+
+        # The abandoned task still occupies a worker until it finishes
+        assert executor.in_flight == 1
+        executor.MAX_QUEUE_DEPTH = 1
+        with pytest.raises(HTTPException) as exc_info:
+            await executor.run(sum, [1])
+        assert exc_info.value.status_code == 503
+
+        await asyncio.sleep(0.3)
+        assert executor.in_flight == 0
+        assert await executor.run(sum, [1]) == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_depth_limit(self):
+        """Test that new work is rejected with a 503 when the queue is full"""
+        executor = ExtractionExecutor()
+        executor.MAX_QUEUE_DEPTH = 0
+
+        with pytest.raises(HTTPException) as exc_info:
+            await executor.run(sum, [1])
+        assert exc_info.value.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_pipeline_runs_in_process_pool(self):
+        """Test that the full extraction pipeline runs in a warm worker process"""
+        executor = ExtractionExecutor()
+        executor.WORKERS = 1
+        executor.TASK_TIMEOUT = 60
+        executor.start()
+        try:
+            result = await executor.run(
+                ParserService._run_extraction_pipeline, SAMPLE_HTML, "https://example.com/pool"
+            )
+        finally:
+            executor.shutdown()
+
+        assert isinstance(result, ExtractionResult)
+        assert result.title == "Process Pool Article"
+        assert "first paragraph" in result.content
+        assert result.metadata.source_url == "https://example.com/pool"
+        assert result.metadata.reading_time > 0
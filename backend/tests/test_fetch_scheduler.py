@@ -0,0 +1,157 @@
+import pytest
+import sys
+import os
+import time
+import httpx
+from fastapi import HTTPException
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.fetch_scheduler import FetchScheduler, domain_key, parse_retry_after
+from app.services.parser_service import ParserService
+from app.services.http_client import http_client
+
+
+class TestFetchScheduler:
+
+    def test_domain_key_groups_platform_subdomains(self):
+        """Test that subdomains of shared platforms share one politeness budget"""
+        assert domain_key("https://alice.substack.com/p/post") == "substack.com"
+        assert domain_key("https://medium.com/@bob/story") == "medium.com"
+        assert domain_key("https://www.example.com/a") == "example.com"
+        assert domain_key("https://blog.example.com/a") == "blog.example.com"
+
+    def test_parse_retry_after(self):
+        """Test parsing Retry-After as delta-seconds and as an HTTP date"""
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_bursts(self):
+        """Test that requests beyond the burst wait for a token"""
+        scheduler = FetchScheduler()
+        scheduler.DOMAIN_BURST = 2
+        scheduler.DOMAIN_RATE = 20.0
+
+        start = time.monotonic()
+        for _ in range(3):
+            async with scheduler.slot("https://example.com/a"):
+                pass
+        # The third request waited roughly 1/20s for a token
+        assert time.monotonic() - start >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_wait_beyond_max_fails_fast(self):
+        """Test that a fetch is refused instead of queueing past MAX_WAIT"""
+        scheduler = FetchScheduler()
+        scheduler.record_status("https://example.com/a", 429, "120")
+
+        with pytest.raises(HTTPException) as exc_info:
+            async with scheduler.slot("https://example.com/b"):
+                pass
+        assert exc_info.value.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_and_recovers(self):
+        """Test that repeated failures open the circuit and a successful trial closes it"""
+        scheduler = FetchScheduler()
+        scheduler.FAILURE_THRESHOLD = 2
+        scheduler.COOLDOWN = 0.05
+        url = "https://flaky.example.com/post"
+
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                async with scheduler.slot(url):
+                    raise httpx.ConnectError("Connection refused")
+
+        with pytest.raises(HTTPException) as exc_info:
+            async with scheduler.slot(url):
+                pass
+        assert exc_info.value.status_code == 503
+        assert scheduler.snapshot()[0]["circuit"] == "open"
+
+        # After the cooling-off window one trial goes through and closes the circuit
+        time.sleep(0.06)
+        async with scheduler.slot(url):
+            scheduler.record_status(url, 200)
+        assert scheduler.snapshot()[0]["circuit"] == "closed"
+        assert scheduler.snapshot()[0]["consecutive_failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_trial_doubles_cooldown(self):
+        """Test that each failed half-open trial keeps the circuit open twice as long"""
+        scheduler = FetchScheduler()
+        scheduler.FAILURE_THRESHOLD = 1
+        scheduler.COOLDOWN = 0.05
+        url = "https://down.example.com/post"
+
+        with pytest.raises(httpx.ConnectError):
+            async with scheduler.slot(url):
+                raise httpx.ConnectError("Connection refused")
+        assert 0 < scheduler.backoff_remaining(url) <= 0.05
+
+        time.sleep(0.06)
+        with pytest.raises(httpx.ConnectError):
+            async with scheduler.slot(url):
+                raise httpx.ConnectError("Connection refused")
+        assert 0.05 < scheduler.backoff_remaining(url) <= 0.1
+        assert scheduler.backoff_remaining("https://other.example.com/") == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_domains_are_pruned(self):
+        """Test that only domains with nothing pending, full tokens and a closed circuit are forgotten"""
+        scheduler = FetchScheduler()
+        scheduler.DOMAIN_RATE = 1000.0
+        scheduler.FAILURE_THRESHOLD = 1
+
+        async with scheduler.slot("https://idle.example.com/a"):
+            pass
+        with pytest.raises(httpx.ConnectError):
+            async with scheduler.slot("https://down.example.com/a"):
+                raise httpx.ConnectError("Connection refused")
+        scheduler.record_status("https://limited.example.com/a", 429, "60")
+
+        async with scheduler.slot("https://busy.example.com/a"):
+            time.sleep(0.01)
+            assert scheduler.prune() == 1
+            domains = {domain["domain"] for domain in scheduler.snapshot()}
+            assert domains == {"down.example.com", "limited.example.com", "busy.example.com"}
+
+        # Pruning runs on its own once PRUNE_INTERVAL has passed and a new domain is seen
+        scheduler.PRUNE_INTERVAL = 0
+        time.sleep(0.01)
+        async with scheduler.slot("https://new.example.com/a"):
+            pass
+        domains = {domain["domain"] for domain in scheduler.snapshot()}
+        assert domains == {"down.example.com", "limited.example.com", "new.example.com"}
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("fresh_fetch_scheduler")
+    async def test_fetch_retries_after_short_retry_after(self, httpx_mock):
+        """Test that a 429 with a short Retry-After is retried once before failing"""
+        httpx_mock.add_response(url="https://example.com/busy", status_code=429, headers={"Retry-After": "0"})
+        httpx_mock.add_response(url="https://example.com/busy", html="<html><body><p>Finally</p></body></html>")
+
+        try:
+            html_content = await ParserService._fetch_html_content("https://example.com/busy")
+            assert "Finally" in html_content
+            assert len(httpx_mock.get_requests()) == 2
+        finally:
+            await http_client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("fresh_fetch_scheduler")
+    async def test_fetch_rate_limited_surfaces_429(self, httpx_mock):
+        """Test that a persistent 429 is reported as rate limiting"""
+        httpx_mock.add_response(url="https://example.com/busy", status_code=429, headers={"Retry-After": "0"})
+        httpx_mock.add_response(url="https://example.com/busy", status_code=429)
+
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                await ParserService._fetch_html_content("https://example.com/busy")
+            assert exc_info.value.status_code == 429
+        finally:
+            await http_client.close()
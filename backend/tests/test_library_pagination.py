@@ -0,0 +1,249 @@
+import json
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi import HTTPException
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import article_service
+from app.database import articles, user_articles
+
+
+class FakeCursor:
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.documents = sorted(self.documents, key=lambda doc: _get(doc, key), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+    def __aiter__(self):
+        self._iterator = iter(self.documents)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _get(doc, path):
+    for part in path.split("."):
+        doc = doc.get(part) if doc else None
+    return doc
+
+
+def _matches(doc, condition):
+    for path, expected in condition.items():
+        if path == "$or":
+            if not any(_matches(doc, option) for option in expected):
+                return False
+            continue
+        value = _get(doc, path)
+        if isinstance(expected, dict):
+            if "$ne" in expected and value == expected["$ne"]:
+                return False
+            if "$lt" in expected and not (value is not None and value < expected["$lt"]):
+                return False
+            if "$in" in expected and value not in expected["$in"]:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class TestLibraryPagination:
+
+    @pytest.mark.asyncio
+    async def test_pages_follow_the_cursor(self):
+        """Test that pages come newest first, tie on saved_at by _id, and cover every save once"""
+        user_id = ObjectId()
+        start = datetime(2024, 1, 1)
+        saved = []
+        stored_articles = []
+        for number in range(7):
+            article_id = ObjectId()
+            stored_articles.append({
+                "_id": article_id,
+                "title": f"Article {number}",
+                "metadata": {"source_url": f"https://example.com/{number}"},
+                "created_at": start
+            })
+            saved.append({
+                "_id": ObjectId(),
+                "user_id": user_id,
+                "article_id": article_id,
+                # Two saves share a timestamp
+                "timestamps": {"saved_at": start + timedelta(minutes=min(number, 5)), "deleted_at": None}
+            })
+        # Neither deleted nor unsaved rows are listed
+        saved.append({"_id": ObjectId(), "user_id": user_id, "article_id": ObjectId(),
+                      "timestamps": {"saved_at": start, "deleted_at": start}})
+        saved.append({"_id": ObjectId(), "user_id": user_id, "article_id": ObjectId(),
+                      "timestamps": {"saved_at": None, "deleted_at": None}})
+
+        original_user_articles_find = user_articles.find
+        original_articles_find = articles.find
+        try:
+            user_articles.find = lambda query: FakeCursor([doc for doc in saved if _matches(doc, query)])
+            articles.find = lambda query, projection=None: FakeCursor(
+                [doc for doc in stored_articles if _matches(doc, query)]
+            )
+
+            titles = []
+            after = None
+            pages = 0
+            while True:
+                page = await article_service.get_user_articles_flat(str(user_id), limit=3, after=after)
+                pages += 1
+                titles += [article.title for article in page.articles]
+                after = page.next_cursor
+                if after is None:
+                    break
+
+            everything = await article_service.get_user_articles_flat(str(user_id))
+        finally:
+            user_articles.find = original_user_articles_find
+            articles.find = original_articles_find
+
+        assert pages == 3
+        assert titles == ["Article 6", "Article 5", "Article 4", "Article 3", "Article 2", "Article 1", "Article 0"]
+        assert [article.title for article in everything.articles] == titles
+        assert everything.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected with 400"""
+        with pytest.raises(HTTPException) as error:
+            await article_service.get_user_articles_flat(str(ObjectId()), limit=3, after="not-a-cursor")
+        assert error.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_aggregate_path(self):
+        """Test that the aggregate path sends one $lookup pipeline and pages its flat rows"""
+        user_id = ObjectId()
+        start = datetime(2024, 1, 1)
+        rows = [
+            {
+                "_id": ObjectId(),
+                "user_article_id": ObjectId(),
+                "title": f"Article {number}",
+                "metadata": {"source_url": f"https://example.com/{number}"},
+                "type": "article",
+                "progress": {},
+                "timestamps": {"saved_at": start - timedelta(minutes=number), "created_at": start}
+            }
+            for number in range(4)
+        ]
+        # A save whose article was deleted comes back without _id
+        del rows[1]["_id"]
+        pipelines = []
+
+        class FakeAggregation:
+            def __init__(self, documents):
+                self.documents = documents
+            async def to_list(self, length):
+                return self.documents
+
+        original_aggregate = user_articles.aggregate
+        original_mode = article_service.LIBRARY_QUERY
+        try:
+            def mock_aggregate(pipeline):
+                pipelines.append(pipeline)
+                limit = next(stage["$limit"] for stage in pipeline if "$limit" in stage)
+                return FakeAggregation(rows[:limit])
+            user_articles.aggregate = mock_aggregate
+            article_service.LIBRARY_QUERY = "aggregate"
+
+            page = await article_service.get_user_articles_flat(str(user_id), limit=3)
+        finally:
+            user_articles.aggregate = original_aggregate
+            article_service.LIBRARY_QUERY = original_mode
+
+        assert [list(stage)[0] for stage in pipelines[0]] == ["$match", "$sort", "$limit", "$lookup", "$unwind", "$project"]
+        assert pipelines[0][2] == {"$limit": 4}
+        assert pipelines[0][3]["$lookup"]["pipeline"] == [{"$project": {"content": 0, "metadata.stats.blocks": 0}}]
+        assert [article.title for article in page.articles] == ["Article 0", "Article 2"]
+        assert article_service._decode_cursor(page.next_cursor) == (rows[2]["timestamps"]["saved_at"], rows[2]["user_article_id"])
+
+    @pytest.mark.asyncio
+    async def test_fast_json_matches_the_response_models(self):
+        """Test that the orjson listing is identical to the validated response model output"""
+        user_id = ObjectId()
+        saved_at = datetime(2024, 3, 1, 12, 30, 15, 123000)
+        saved = [
+            {
+                "_id": ObjectId(),
+                "user_id": user_id,
+                "article_id": ObjectId(),
+                "progress": {"percentage": 40, "last_position": 7, "updated_at": saved_at},
+                "timestamps": {"saved_at": saved_at, "archived_at": saved_at, "deleted_at": None}
+            },
+            {
+                "_id": ObjectId(),
+                "user_id": user_id,
+                "article_id": ObjectId(),
+                "timestamps": {"saved_at": saved_at - timedelta(days=1), "deleted_at": None}
+            }
+        ]
+        stored_articles = [
+            {
+                "_id": saved[0]["article_id"],
+                "title": "Article",
+                "short_description": "Description",
+                "metadata": {
+                    "source_url": "https://example.com/a",
+                    "canonical_url": "https://example.com/a",
+                    "author": "Author",
+                    "publish_date": datetime(2023, 5, 1),
+                    "reading_time": 4,
+                    "stats": {"word_count": 1000, "char_count": 6000, "plain_text_length": 5500}
+                },
+                "created_at": datetime(2024, 2, 1, 8, 0, 0, 5000),
+                "type": "article"
+            },
+            {
+                "_id": saved[1]["article_id"],
+                "metadata": {"source_url": "https://example.com/b"},
+                "created_at": datetime(2024, 2, 2),
+                "type": "bookmark"
+            }
+        ]
+
+        original_user_articles_find = user_articles.find
+        original_articles_find = articles.find
+        try:
+            user_articles.find = lambda query: FakeCursor([doc for doc in saved if _matches(doc, query)])
+            articles.find = lambda query, projection=None: FakeCursor(
+                [doc for doc in stored_articles if _matches(doc, query)]
+            )
+            pages = []
+            after = None
+            for _ in range(2):
+                body, count = await article_service.get_user_articles_json(str(user_id), limit=1, after=after)
+                collection = await article_service.get_user_articles_flat(str(user_id), limit=1, after=after)
+                pages.append((json.loads(body), count, collection.model_dump(mode="json", by_alias=True)))
+                after = collection.next_cursor
+        finally:
+            user_articles.find = original_user_articles_find
+            articles.find = original_articles_find
+
+        # The second page holds the bookmark with default progress and no stats
+        for fast, count, validated in pages:
+            assert count == 1
+            assert fast == validated
+        assert pages[1][0]["articles"][0]["type"] == "bookmark"
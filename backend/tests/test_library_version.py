@@ -0,0 +1,83 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+from bson import ObjectId
+from fastapi import BackgroundTasks, Response
+from starlette.requests import Request
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import main
+from app.services import article_service
+from app.database import user_articles, users
+from app.services.library_version import library_versions
+
+
+def _request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class TestLibraryVersion:
+
+    @pytest.mark.asyncio
+    async def test_writes_bump_the_version(self, in_memory_library_versions):
+        """Test that archiving bumps the owner's version and re-extraction bumps every reader's"""
+        versions, readers = in_memory_library_versions
+        original_find_one_and_update = user_articles.find_one_and_update
+        user_id, reader_id = ObjectId(), ObjectId()
+        try:
+            async def mock_find_one_and_update(query, update, return_document=None):
+                return {
+                    "_id": ObjectId(),
+                    "user_id": user_id,
+                    "article_id": query["article_id"],
+                    "timestamps": {"saved_at": datetime.utcnow(), "archived_at": datetime.utcnow()}
+                }
+            user_articles.find_one_and_update = mock_find_one_and_update
+
+            await article_service.archive_user_article(str(user_id), str(ObjectId()))
+            await article_service.archive_user_article(str(user_id), str(ObjectId()))
+            assert versions == {user_id: 2}
+
+            article_id = ObjectId()
+            readers[article_id] = [user_id, reader_id]
+            await library_versions.bump_readers([article_id, ObjectId()])
+            assert versions == {user_id: 3, reader_id: 1}
+        finally:
+            user_articles.find_one_and_update = original_find_one_and_update
+
+    @pytest.mark.asyncio
+    async def test_unchanged_library_is_not_modified(self, monkeypatch):
+        """Test that a matching If-None-Match is answered with 304 without reading the library"""
+        original_find_one = users.find_one
+        user_id = ObjectId()
+        listed = []
+        try:
+            async def mock_find_one(query):
+                return {"_id": user_id, "telegram_id": "1", "library_version": 7}
+            async def mock_list(user_id, limit=None, after=None):
+                listed.append(user_id)
+                return b'{"articles":[],"next_cursor":null}', 0
+            users.find_one = mock_find_one
+            monkeypatch.setattr(main, "LIBRARY_FAST_JSON", True)
+            monkeypatch.setattr(main, "get_user_articles_json", mock_list)
+
+            response = await main.get_articles_for_user(
+                str(user_id), _request('W/"library-7"'), Response(), BackgroundTasks()
+            )
+            assert response.status_code == 304
+            assert response.headers["etag"] == 'W/"library-7"'
+            assert listed == []
+
+            # A stale version gets the listing and the current ETag
+            response = await main.get_articles_for_user(
+                str(user_id), _request('W/"library-6"'), Response(), BackgroundTasks()
+            )
+            assert response.status_code == 200
+            assert response.headers["etag"] == 'W/"library-7"'
+            assert listed == [str(user_id)]
+        finally:
+            users.find_one = original_find_one
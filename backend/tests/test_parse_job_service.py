@@ -0,0 +1,162 @@
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.parse_job_service import ParseJobService
+from app.services.parser_service import ParserService
+from app.services.parse_metrics import span
+from app.database import parse_jobs
+
+
+class TestParseJobService:
+
+    @pytest.mark.asyncio
+    async def test_enqueue_creates_queued_job(self):
+        """Test that enqueueing resolves the user and stores a queued job"""
+        original_prepare = ParserService.prepare_parse_request
+        original_insert_one = parse_jobs.insert_one
+        test_user_id = str(ObjectId())
+        inserted = {}
+        try:
+            async def mock_prepare(user_id):
+                return test_user_id
+            async def mock_insert_one(doc):
+                inserted.update(doc)
+                return MagicMock(inserted_id=ObjectId())
+            ParserService.prepare_parse_request = mock_prepare
+            parse_jobs.insert_one = mock_insert_one
+
+            job = await ParseJobService().enqueue("https://example.com", "12345")
+
+            assert job.status == "queued"
+            assert job.attempts == 0
+            assert job.user_id == test_user_id
+            assert inserted["user_id"] == ObjectId(test_user_id)
+            assert inserted["lease_expires_at"] is None
+        finally:
+            ParserService.prepare_parse_request = original_prepare
+            parse_jobs.insert_one = original_insert_one
+
+    @pytest.mark.asyncio
+    async def test_enqueue_respects_daily_limit(self):
+        """Test that the daily limit error is raised immediately instead of queueing"""
+        original_prepare = ParserService.prepare_parse_request
+        original_insert_one = parse_jobs.insert_one
+        try:
+            async def mock_prepare(user_id):
+                raise HTTPException(status_code=429, detail="Daily article limit exceeded.")
+            async def mock_insert_one(doc):
+                raise Exception("Should not enqueue when limit is exceeded")
+            ParserService.prepare_parse_request = mock_prepare
+            parse_jobs.insert_one = mock_insert_one
+
+            with pytest.raises(HTTPException) as exc_info:
+                await ParseJobService().enqueue("https://example.com", "12345")
+            assert exc_info.value.status_code == 429
+        finally:
+            ParserService.prepare_parse_request = original_prepare
+            parse_jobs.insert_one = original_insert_one
+
+    @pytest.mark.asyncio
+    async def test_process_records_result(self):
+        """Test that a successful job is marked done with the parse result"""
+        original_parse_for_user = ParserService.parse_for_user
+        original_update_one = parse_jobs.update_one
+        updates = []
+        try:
+            async def mock_parse_for_user(url, user_id):
+                with span("fetch") as fetch_span:
+                    fetch_span.bytes_out = 1024
+                return {"article_id": "aid", "user_article_id": "uaid", "url": url, "type": "article"}
+            async def mock_update_one(query, update):
+                updates.append(update)
+                return MagicMock(matched_count=1)
+            ParserService.parse_for_user = mock_parse_for_user
+            parse_jobs.update_one = mock_update_one
+
+            job = {"_id": ObjectId(), "url": "https://example.com", "user_id": ObjectId(),
+                   "attempts": 1, "max_attempts": 3, "created_at": datetime.utcnow()}
+            await ParseJobService().process(job)
+
+            assert updates[0]["$set"]["status"] == "done"
+            assert updates[0]["$set"]["result"]["article_id"] == "aid"
+            assert updates[0]["$set"]["finished_at"] is not None
+            assert updates[0]["$set"]["timings"]["fetch"]["bytes_out"] == 1024
+        finally:
+            ParserService.parse_for_user = original_parse_for_user
+            parse_jobs.update_one = original_update_one
+
+    @pytest.mark.asyncio
+    async def test_process_requeues_until_attempts_exhausted(self):
+        """Test that failed jobs are retried and only fail after the last attempt"""
+        original_parse_for_user = ParserService.parse_for_user
+        original_update_one = parse_jobs.update_one
+        updates = []
+        try:
+            async def mock_parse_for_user(url, user_id):
+                raise Exception("Database connection error")
+            async def mock_update_one(query, update):
+                updates.append(update)
+                return MagicMock(matched_count=1)
+            ParserService.parse_for_user = mock_parse_for_user
+            parse_jobs.update_one = mock_update_one
+
+            service = ParseJobService()
+            job = {"_id": ObjectId(), "url": "https://example.com", "user_id": ObjectId(),
+                   "attempts": 1, "max_attempts": 2}
+            await service.process(job)
+            assert updates[-1]["$set"]["status"] == "queued"
+            assert updates[-1]["$set"]["finished_at"] is None
+
+            job["attempts"] = 2
+            await service.process(job)
+            assert updates[-1]["$set"]["status"] == "failed"
+            assert "database connection error" in updates[-1]["$set"]["error"].lower()
+        finally:
+            ParserService.parse_for_user = original_parse_for_user
+            parse_jobs.update_one = original_update_one
+
+    @pytest.mark.asyncio
+    async def test_lease_is_renewed_and_stale_attempts_are_discarded(self, monkeypatch):
+        """Test that a slow job keeps its lease and a worker that lost it cannot record an outcome"""
+        original_parse_for_user = ParserService.parse_for_user
+        original_update_one = parse_jobs.update_one
+        job_id = ObjectId()
+        stored = {"_id": job_id, "status": "running", "attempts": 1}
+        renewals = []
+        try:
+            async def slow_parse_for_user(url, user_id):
+                await asyncio.sleep(0.05)
+                # Another worker took the job over in the meantime
+                stored["attempts"] = 2
+                await asyncio.sleep(0.05)
+                return {"article_id": "aid", "user_article_id": "uaid", "url": url, "type": "article"}
+            async def mock_update_one(query, update):
+                matched = all(stored.get(key) == value for key, value in query.items())
+                if matched:
+                    if "lease_expires_at" in update["$set"] and len(update["$set"]) == 2:
+                        renewals.append(update["$set"]["lease_expires_at"])
+                    stored.update(update["$set"])
+                return MagicMock(matched_count=int(matched))
+            ParserService.parse_for_user = slow_parse_for_user
+            parse_jobs.update_one = mock_update_one
+            monkeypatch.setattr(ParseJobService, "LEASE_SECONDS", 0.03)
+
+            job = {"_id": job_id, "url": "https://example.com", "user_id": ObjectId(),
+                   "attempts": 1, "max_attempts": 3}
+            await ParseJobService().process(job)
+
+            assert renewals
+            assert stored["status"] == "running"
+            assert "result" not in stored
+        finally:
+            ParserService.parse_for_user = original_parse_for_user
+            parse_jobs.update_one = original_update_one
@@ -0,0 +1,64 @@
+import pytest
+import sys
+import os
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.parse_metrics import Histogram, parse_metrics, parse_trace, span
+from app.services.parser_service import ParserService
+
+
+SAMPLE_HTML = """
+<html>
+<head><meta property="og:title" content="Timed Article"></head>
+<body>
+    <article>
+        <h1>Timed Article</h1>
+        <p>The first paragraph of the article has enough words in it to be considered real content by the extractor.</p>
+        <p>The second paragraph continues the story with a few more sentences so that trafilatura keeps the text.</p>
+        <p>A third paragraph makes sure the extracted body is comfortably above the minimum extracted size.</p>
+    </article>
+</body>
+</html>
+"""
+
+
+class TestParseMetrics:
+
+    def setup_method(self):
+        parse_metrics.reset()
+
+    def test_histogram_buckets(self):
+        """Test that observations land in the first bucket whose bound covers them"""
+        histogram = Histogram(bounds=(10, 100))
+        for value in (5, 10, 50, 500):
+            histogram.observe(value)
+        result = histogram.to_dict()
+        assert result["buckets"] == {"le_10": 2, "le_100": 1, "le_inf": 1}
+        assert result["count"] == 4
+        assert result["sum"] == 565
+
+    def test_spans_feed_trace_and_histograms(self):
+        """Test that spans are added to the current trace and to the process-wide histograms"""
+        with parse_trace("https://example.com") as trace:
+            with span("fetch") as fetch_span:
+                fetch_span.bytes_out = 2048
+            with span("fetch") as fetch_span:
+                fetch_span.bytes_out = 1024
+            # A nested trace joins the outer one
+            with parse_trace("https://example.com") as nested:
+                assert nested is trace
+
+        breakdown = trace.breakdown()
+        assert breakdown["fetch"]["bytes_out"] == 3072
+        assert breakdown["fetch"]["wall_ms"] >= 0
+        assert parse_metrics.snapshot()["fetch"]["wall_ms"]["count"] == 2
+
+    def test_extraction_pipeline_reports_stage_spans(self):
+        """Test that the extraction pipeline returns its own stage timings"""
+        result = ParserService._run_extraction_pipeline(SAMPLE_HTML, "https://example.com/timed")
+        stages = [worker_span.stage for worker_span in result.spans]
+        assert stages == ["preprocess", "parse_tree", "extract_content", "extract_title", "post_process", "extract_metadata"]
+        # Worker spans are only reported once they reach the requesting process
+        assert parse_metrics.snapshot() == {}
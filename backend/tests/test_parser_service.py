@@ -11,74 +11,95 @@ from fastapi import HTTPException
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.services.parser_service import ParserService
+from app.services.parsed_document import ParsedDocument
+from app.services.extraction_executor import ExtractionResult
+from app.services.snapshot_store import snapshot_store
 from app.models.article import Article, ArticleMetadata
 from app.database import articles, user_articles
 
 class TestParserService:
     
     def test_extract_title(self):
-        """Test that title is correctly extracted from downloaded content"""
-        # Create a mock downloaded object with metadata
+        """Test that title is correctly extracted from the parsed document"""
+        # Create a mock trafilatura metadata result
         mock_metadata = MagicMock()
         mock_metadata.title = "Test Article Title"
         
-        # Mock the trafilatura.metadata.extract_metadata function
-        def mock_extract_metadata(downloaded):
-            return mock_metadata
-            
-        # Save the original function
-        original_extract_metadata = trafilatura.metadata.extract_metadata
+        # Test 1: Extraction with HTML containing Open Graph title
+        html_content = """
+        <html>
+        <head>
+            <meta property="og:title" content="Open Graph Title">
+            <title>HTML Title</title>
+        </head>
+        <body>Content</body>
+        </html>
+        """
+        document = ParsedDocument(html_content)
+        document.metadata = mock_metadata
+        title = ParserService._extract_title(document)
+        assert title == "Open Graph Title"
         
-        try:
-            # Replace with our mock
-            trafilatura.metadata.extract_metadata = mock_extract_metadata
-            
-            # Test 1: Extraction with raw HTML containing Open Graph title
-            html_content = """
-            <html>
-            <head>
-                <meta property="og:title" content="Open Graph Title">
-                <title>HTML Title</title>
-            </head>
-            <body>Content</body>
-            </html>
-            """
-            title = ParserService._extract_title(None, html_content)
-            assert title == "Open Graph Title"
-            
-            # Test 2: Extraction with downloaded tree containing Open Graph title
-            html_content = """
-            <html>
-            <head>
-                <meta property="og:title" content="Open Graph Title from Tree">
-                <title>HTML Title</title>
-            </head>
-            <body>Content</body>
-            </html>
-            """
-            title = ParserService._extract_title(html_content)
-            assert title == "Open Graph Title from Tree"
-            
-            # Test 3: Extraction with no Open Graph title, falling back to trafilatura
-            html_content = """
-            <html>
-            <head>
-                <title>HTML Title</title>
-            </head>
-            <body>Content</body>
-            </html>
-            """
-            title = ParserService._extract_title(html_content)
-            assert title == "Test Article Title"
-            
-            # Test 4: With no title at all
-            mock_metadata.title = None
-            title = ParserService._extract_title(html_content)
-            assert title == "Untitled Article"
-            
-        finally:
-            # Restore the original function
-            trafilatura.metadata.extract_metadata = original_extract_metadata
+        # Test 2: Open Graph title with attributes in a different order
+        html_content = """
+        <html>
+        <head>
+            <meta content="Open Graph Title from Tree" property="og:title">
+            <title>HTML Title</title>
+        </head>
+        <body>Content</body>
+        </html>
+        """
+        document = ParsedDocument(html_content)
+        title = ParserService._extract_title(document)
+        assert title == "Open Graph Title from Tree"
+        
+        # Test 3: Extraction with no Open Graph title, falling back to trafilatura
+        html_content = """
+        <html>
+        <head>
+            <title>HTML Title</title>
+        </head>
+        <body>Content</body>
+        </html>
+        """
+        document = ParsedDocument(html_content)
+        document.metadata = mock_metadata
+        title = ParserService._extract_title(document)
+        assert title == "Test Article Title"
+        
+        # Test 4: With no title at all
+        mock_metadata.title = None
+        title = ParserService._extract_title(document)
+        assert title == "Untitled Article"
+    
+    def test_parsed_document_builds_tree_once(self):
+        """Test that one parse builds the lxml tree and extracts metadata only once"""
+        html_content = """
+        <html>
+        <head>
+            <meta property="og:title" content="Single Parse Title">
+            <meta name="description" content="A page parsed exactly once">
+            <title>HTML Title</title>
+        </head>
+        <body>
+            <article>
+                <p>The first paragraph of the article has enough words in it to be considered real content.</p>
+                <p>The second paragraph continues the story with a few more sentences for the extractor.</p>
+                <p>A third paragraph makes sure the extracted body is above the minimum extracted size.</p>
+            </article>
+        </body>
+        </html>
+        """
+        with patch("trafilatura.load_html", wraps=trafilatura.load_html) as load_html, \
+             patch("trafilatura.core.extract_metadata", wraps=trafilatura.core.extract_metadata) as extract_metadata:
+            result = ParserService._run_extraction_pipeline(html_content, "https://example.com/once")
+        
+        assert load_html.call_count == 1
+        assert extract_metadata.call_count == 1
+        assert result.title == "Single Parse Title"
+        assert result.description == "A page parsed exactly once"
+        assert "first paragraph" in result.content
     
     def test_strip_markdown(self):
         """Test that markdown is properly stripped from text"""
@@ -116,26 +137,32 @@ class TestParserService:
         assert ParserService._strip_markdown("") == ""
         assert ParserService._strip_markdown(None) == ""
     
+    def test_ensure_paragraph_separation(self):
+        """Test that single newlines become paragraph breaks except before markdown blocks"""
+        content = "First line\nSecond line\n\n\n\nThird\r\n1. item\n# Heading\n[link](https://example.com)"
+        expected = "First line\n\nSecond line\n\nThird\n1. item\n# Heading\n[link](https://example.com)"
+        assert ParserService._ensure_paragraph_separation(content) == expected
+    
+    def test_normalize_content_returns_markdown_and_plain_text(self):
+        """Test that post-processing yields the cleaned markdown and its plain text"""
+        normalized = ParserService._normalize_content("# My Title\n\nSome **bold** text\nand a [link](https://example.com)", "My Title")
+        assert normalized.markdown == "Some **bold** text\n\nand a [link](https://example.com)"
+        assert normalized.plain_text == "Some bold text and a link"
+    
     def test_extract_metadata(self):
         """Test that metadata is correctly extracted"""
-        # Create a mock downloaded object with metadata
+        # Create a parsed document carrying mock trafilatura metadata
         mock_metadata = MagicMock()
         mock_metadata.description = "This is a **test** description with [link](https://example.com)"
         mock_metadata.author = "Test Author"
         mock_metadata.date = "2023-01-01"
-        
-        # Mock the trafilatura.metadata.extract_metadata function
-        def mock_extract_metadata(downloaded):
-            return mock_metadata
+        document = ParsedDocument("<html><body>Content</body></html>")
+        document.metadata = mock_metadata
             
-        # Save the original function and parse_date method
-        original_extract_metadata = trafilatura.metadata.extract_metadata
+        # Save the original parse_date method
         original_parse_date = ParserService._parse_date
-        original_strip_markdown = ParserService._strip_markdown
         
         try:
-            # Replace with our mocks
-            trafilatura.metadata.extract_metadata = mock_extract_metadata
             # Use a proper datetime object instead of a string
             ParserService._parse_date = lambda date_str: datetime(2023, 1, 1) if date_str else None
             
@@ -144,7 +171,7 @@ class TestParserService:
             content = "This is the article content with some **markdown** and [links](https://example.com)."
             source_url = "https://example.com"
             
-            description, article_metadata = ParserService._extract_metadata(None, content, title, source_url)
+            description, article_metadata = ParserService._extract_metadata(document, content, title, source_url)
             
             # Verify markdown was stripped from description
             assert description == "This is a test description with link"
@@ -155,15 +182,44 @@ class TestParserService:
             
             # Test with no description
             mock_metadata.description = None
-            description, article_metadata = ParserService._extract_metadata(None, content, title, source_url)
+            description, article_metadata = ParserService._extract_metadata(document, content, title, source_url)
             # Verify markdown was stripped from content used as description
             assert description.startswith("This is the article content with some markdown and links")
             
         finally:
-            # Restore the original functions
-            trafilatura.metadata.extract_metadata = original_extract_metadata
+            # Restore the original function
             ParserService._parse_date = original_parse_date
     
+    def test_content_stats(self):
+        """Test that the block table maps each block to its offset, kind and the words before it"""
+        content = (
+            "Intro with **two** words\n\n"
+            "## A heading\n\n"
+            "```\ncode\n\nstill code\n```\n\n"
+            "- item one\n- item two"
+        )
+        document = ParsedDocument("<html><body>Content</body></html>")
+        _, metadata = ParserService._extract_metadata(document, content, "Title", "https://example.com")
+        
+        stats = metadata.stats
+        assert stats.word_count == len(content.split())
+        assert stats.char_count == len(content)
+        assert stats.plain_text_length == len("Intro with two words A heading - item one - item two")
+        assert stats.blocks.kinds == "p2cl"
+        assert stats.blocks.words_before == [0, 4, 7, 12]
+        assert [content[offset:offset + 3] for offset in stats.blocks.offsets] == ["Int", "## ", "```", "- i"]
+    
+    def test_content_stats_offsets_are_utf16(self):
+        """Test that block offsets count astral-plane characters as two units, as JavaScript does"""
+        content = "Reactions 🎉🚀 to the launch\n\n## What 𝔉ancy means\n\nLast paragraph"
+        document = ParsedDocument("<html><body>Content</body></html>")
+        _, metadata = ParserService._extract_metadata(document, content, "Title", "https://example.com")
+        
+        utf16 = content.encode("utf-16-le")
+        starts = [utf16[offset * 2:offset * 2 + 6].decode("utf-16-le") for offset in metadata.stats.blocks.offsets]
+        assert starts == ["Rea", "## ", "Las"]
+        assert metadata.stats.blocks.offsets[1] == content.index("## ") + 2
+    
     def test_remove_duplicate_title_from_content(self):
         """Test that duplicate H1 headings are removed from content when they match the title"""
         # Test case 1: H1 heading matches title exactly
@@ -235,16 +291,19 @@ class TestParserService:
         assert result == "This is the article description."
     
     @pytest.mark.asyncio
+    @pytest.mark.usefixtures(
+        "in_memory_parse_locks",
+        "in_memory_extraction_cache",
+        "tmp_snapshot_store",
+        "in_memory_article_bodies",
+        "in_memory_library_versions",
+    )
     async def test_parse_url_with_og_title(self):
         """Test that parse_url correctly extracts Open Graph title and creates article and user article"""
         # Mock the _fetch_html_content method
         original_fetch_html_content = ParserService._fetch_html_content
         original_extract_title = ParserService._extract_title
-        
-        # Mock trafilatura functions
-        original_load_html = trafilatura.load_html
-        original_extract = trafilatura.extract
-        original_extract_metadata = trafilatura.metadata.extract_metadata
+        original_extract_content = ParserService._extract_content
         
         # Mock database functions
         original_find_one = articles.find_one
@@ -281,15 +340,19 @@ class TestParserService:
                 return MagicMock(inserted_id=ObjectId())
             
             # Set up mocks
-            ParserService._fetch_html_content = lambda url: html_content
-            ParserService._extract_title = lambda downloaded, html=None: "Open Graph Title"
-            trafilatura.load_html = lambda html: html
-            trafilatura.extract = lambda *args, **kwargs: "Extracted content"
-            trafilatura.metadata.extract_metadata = lambda downloaded: MagicMock(
-                description="Test description",
-                author="Test Author",
-                date="2023-01-01"
-            )
+            async def mock_fetch_html_content(url):
+                return html_content
+            ParserService._fetch_html_content = mock_fetch_html_content
+            ParserService._extract_title = lambda document: "Open Graph Title"
+            def mock_extract_content(document):
+                # Content extraction also fills in the trafilatura metadata
+                document.metadata = MagicMock(
+                    description="Test description",
+                    author="Test Author",
+                    date="2023-01-01"
+                )
+                return "Extracted content"
+            ParserService._extract_content = mock_extract_content
             articles.find_one = mock_articles_find_one
             articles.insert_one = mock_articles_insert_one
             user_articles.find_one = mock_user_articles_find_one
@@ -309,15 +372,19 @@ class TestParserService:
             # Restore original functions
             ParserService._fetch_html_content = original_fetch_html_content
             ParserService._extract_title = original_extract_title
-            trafilatura.load_html = original_load_html
-            trafilatura.extract = original_extract
-            trafilatura.metadata.extract_metadata = original_extract_metadata
+            ParserService._extract_content = original_extract_content
             articles.find_one = original_find_one
             articles.insert_one = original_insert_one
             user_articles.find_one = original_user_articles_find_one
             user_articles.insert_one = original_user_articles_insert_one
 
     @pytest.mark.asyncio
+    @pytest.mark.usefixtures(
+        "in_memory_parse_locks",
+        "in_memory_extraction_cache",
+        "tmp_snapshot_store",
+        "in_memory_library_versions",
+    )
     async def test_parse_url_minimal_bookmark_on_failure(self):
         """Test that parse_url returns type 'bookmark' when parsing fails and minimal article is stored"""
         original_fetch_html_content = ParserService._fetch_html_content
@@ -335,10 +402,14 @@ class TestParserService:
                 return None
             articles.find_one = mock_articles_find_one
             # Simulate content extraction failure
-            ParserService._fetch_html_content = lambda url: "<html></html>"
+            async def mock_fetch_html_content(url):
+                return "<html></html>"
+            ParserService._fetch_html_content = mock_fetch_html_content
             ParserService._extract_content = lambda html: (_ for _ in ()).throw(Exception("parse fail"))
             # Mock insert_one to return an ObjectId (async)
+            inserted = []
             async def mock_articles_insert_one(doc):
+                inserted.append(doc)
                 return MagicMock(inserted_id=ObjectId())
             articles.insert_one = mock_articles_insert_one
             async def mock_user_articles_find_one(*a, **k):
@@ -350,6 +421,8 @@ class TestParserService:
             # Test parse_url
             result = await ParserService.parse_url("https://fail.com", test_user_id)
             assert result["type"] == "bookmark"
+            # The fetched page is archived so the bookmark can be re-extracted later
+            assert await snapshot_store.load(inserted[0]["snapshot_hash"]) == "<html></html>"
         finally:
             ParserService._fetch_html_content = original_fetch_html_content
             ParserService._extract_content = original_extract_content
@@ -361,6 +434,7 @@ class TestParserService:
             user_articles.insert_one = original_user_articles_insert_one
 
     @pytest.mark.asyncio
+    @pytest.mark.usefixtures("in_memory_library_versions")
     async def test_existing_url_in_database(self):
         """Test that parse_url correctly handles existing articles and creates user article relationship"""
         # Mock database functions
@@ -406,7 +480,7 @@ class TestParserService:
             user_articles.insert_one = mock_user_articles_insert_one
             
             # Mock fetch_html_content to ensure it's not called
-            def mock_fetch_html_content(url: str) -> str:
+            async def mock_fetch_html_content(url: str) -> str:
                 raise Exception("Should not fetch HTML for existing article")
             ParserService._fetch_html_content = mock_fetch_html_content
             
@@ -478,7 +552,7 @@ class TestParserService:
             user_articles.insert_one = mock_user_articles_insert_one
             
             # Mock fetch_html_content to ensure it's not called
-            def mock_fetch_html_content(url: str) -> str:
+            async def mock_fetch_html_content(url: str) -> str:
                 raise Exception("Should not fetch HTML for existing article")
             ParserService._fetch_html_content = mock_fetch_html_content
             
@@ -568,6 +642,12 @@ class TestParserService:
                 user_articles.insert_one = original_user_articles_insert_one
 
     @pytest.mark.asyncio
+    @pytest.mark.usefixtures(
+        "in_memory_parse_locks",
+        "in_memory_extraction_cache",
+        "tmp_snapshot_store",
+        "in_memory_library_versions",
+    )
     async def test_error_handling_content_extraction(self):
         """Test error handling during content extraction"""
         test_user_id = str(ObjectId())
@@ -595,7 +675,7 @@ class TestParserService:
             user_articles.find_one = mock_user_articles_find_one
             user_articles.insert_one = mock_user_articles_insert_one
             # Test case 1: Empty content after extraction
-            def mock_fetch_html(url):
+            async def mock_fetch_html(url):
                 return "<html><body>Some content</body></html>"
             def mock_extract_content(html_content):
                 # Simulate trafilatura failing to extract content
@@ -609,7 +689,7 @@ class TestParserService:
             result = await ParserService.parse_url(test_url, test_user_id)
             assert result["type"] == "bookmark"
             # Test case 2: Invalid HTML content
-            def mock_fetch_html_invalid(url):
+            async def mock_fetch_html_invalid(url):
                 return "Not valid HTML content"
             def mock_extract_content_invalid(html_content):
                 # Simulate trafilatura failing to parse HTML
@@ -630,6 +710,12 @@ class TestParserService:
             user_articles.insert_one = original_user_articles_insert_one
 
     @pytest.mark.asyncio
+    @pytest.mark.usefixtures(
+        "in_memory_parse_locks",
+        "in_memory_extraction_cache",
+        "tmp_snapshot_store",
+        "in_memory_article_bodies",
+    )
     async def test_error_handling_database_operations(self):
         """Test error handling during database operations"""
         test_user_id = str(ObjectId())
@@ -646,7 +732,7 @@ class TestParserService:
         
         try:
             # Mock successful HTML fetch
-            def mock_fetch_html(url):
+            async def mock_fetch_html(url):
                 return "<html><head><title>Test</title></head><body>Content</body></html>"
             ParserService._fetch_html_content = mock_fetch_html
             
@@ -725,4 +811,285 @@ class TestParserService:
             result = await ParserService.handle_parse_request("https://fail.com", test_user_id)
             assert result["type"] == "bookmark"
         ParserService.parse_url = original_parse_url
-        ParserService._check_daily_article_limit = original_check_daily_article_limit 
\ No newline at end of file
+        ParserService._check_daily_article_limit = original_check_daily_article_limit
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("fresh_fetch_scheduler")
+    async def test_fetch_html_content_uses_shared_client(self, httpx_mock):
+        """Test that pages are fetched through the shared pooled async client"""
+        from app.services.http_client import http_client
+        
+        httpx_mock.add_response(
+            url="https://example.com/post",
+            html="<html><body><p>Pooled content</p></body></html>"
+        )
+        
+        try:
+            html_content = await ParserService._fetch_html_content("https://example.com/post")
+            assert "Pooled content" in html_content
+            
+            # The same client instance is reused across fetches
+            first_client = http_client.client
+            httpx_mock.add_response(url="https://example.com/other", html="<html></html>")
+            await ParserService._fetch_html_content("https://example.com/other")
+            assert http_client.client is first_client
+        finally:
+            await http_client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("fresh_fetch_scheduler")
+    async def test_fetch_html_content_timeout(self, httpx_mock):
+        """Test that upstream timeouts surface as a 504 error"""
+        import httpx
+        from app.services.http_client import http_client
+        
+        httpx_mock.add_exception(httpx.ReadTimeout("Read timed out"))
+        
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                await ParserService._fetch_html_content("https://slow.example.com")
+            assert exc_info.value.status_code == 504
+        finally:
+            await http_client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("fresh_fetch_scheduler")
+    async def test_fetch_html_content_decodes_compressed_meta_charset(self, httpx_mock):
+        """Test that gzip bodies are decompressed and decoded using the <meta charset>"""
+        import gzip
+        from app.services.http_client import http_client
+        
+        html = '<html><head><meta charset="windows-1251"></head><body><p>Привет, мир</p></body></html>'
+        httpx_mock.add_response(
+            url="https://example.ru/post",
+            content=gzip.compress(html.encode("windows-1251")),
+            headers={"Content-Type": "text/html", "Content-Encoding": "gzip"}
+        )
+        
+        try:
+            html_content = await ParserService._fetch_html_content("https://example.ru/post")
+            assert "Привет, мир" in html_content
+        finally:
+            await http_client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("fresh_fetch_scheduler")
+    async def test_fetch_html_content_rejects_non_html(self, httpx_mock):
+        """Test that non-HTML responses are refused before the body is read"""
+        from app.services.http_client import http_client
+        
+        httpx_mock.add_response(
+            url="https://example.com/file.pdf",
+            content=b"%PDF-1.7",
+            headers={"Content-Type": "application/pdf"}
+        )
+        
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                await ParserService._fetch_html_content("https://example.com/file.pdf")
+            assert exc_info.value.status_code == 415
+        finally:
+            await http_client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("fresh_fetch_scheduler")
+    async def test_fetch_html_content_enforces_size_limit(self, httpx_mock):
+        """Test that downloads stop once the decompressed body exceeds the byte budget"""
+        import gzip
+        from app.services.http_client import http_client
+        
+        original_max_bytes = ParserService.FETCH_MAX_BYTES
+        ParserService.FETCH_MAX_BYTES = 1024
+        # Compresses to a few bytes, so only the decompressed size can trip the limit
+        httpx_mock.add_response(
+            url="https://example.com/bomb",
+            content=gzip.compress(b"<html>" + b" " * 100_000),
+            headers={"Content-Type": "text/html", "Content-Encoding": "gzip"}
+        )
+        
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                await ParserService._fetch_html_content("https://example.com/bomb")
+            assert exc_info.value.status_code == 413
+        finally:
+            ParserService.FETCH_MAX_BYTES = original_max_bytes
+            await http_client.close()
+
+    def test_stream_decoder_stops_compression_bombs_early(self):
+        """Test that a small gzip, br or zstd bomb is refused without decoding far past the budget"""
+        import brotli
+        import gzip
+        import tracemalloc
+        import zlib
+        import zstandard
+        from app.services.content_decoding import DecodedSizeExceeded, StreamDecoder
+
+        inflated = b"<html>" + b"\0" * (64 * 1024 * 1024)
+        bombs = {
+            "gzip": gzip.compress(inflated, compresslevel=9),
+            "br": brotli.compress(inflated, quality=5),
+            "zstd": zstandard.ZstdCompressor(level=3).compress(inflated),
+        }
+        del inflated
+        max_bytes = 1024 * 1024
+
+        for encoding, bomb in bombs.items():
+            # A few KB to a few hundred KB on the wire
+            assert len(bomb) < 128 * 1024
+            decoder = StreamDecoder(encoding, max_bytes)
+            tracemalloc.start()
+            try:
+                with pytest.raises(DecodedSizeExceeded):
+                    for offset in range(0, len(bomb), 16 * 1024):
+                        decoder.decompress(bomb[offset:offset + 16 * 1024])
+                    decoder.flush()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert peak < 4 * max_bytes, encoding
+
+        # Bodies within the budget still decode in full
+        page = b"<html><body>" + b"<p>Paragraph</p>" * 1000 + b"</body></html>"
+        for encoding, compressed in (
+            ("gzip", gzip.compress(page)),
+            ("br", brotli.compress(page)),
+            ("zstd", zstandard.ZstdCompressor().compress(page)),
+            ("deflate", zlib.compress(page)),
+        ):
+            decoder = StreamDecoder(encoding, len(page))
+            decoded = b"".join(decoder.decompress(compressed[offset:offset + 100]) for offset in range(0, len(compressed), 100))
+            assert decoded + decoder.flush() == page, encoding
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures(
+        "in_memory_parse_locks",
+        "in_memory_extraction_cache",
+        "tmp_snapshot_store",
+        "in_memory_article_bodies",
+        "in_memory_library_versions",
+    )
+    async def test_concurrent_parses_of_same_url_share_one_fetch(self):
+        """Test that concurrent parse_url calls for one URL fetch once and return the same article"""
+        import asyncio
+        original_fetch_html_content = ParserService._fetch_html_content
+        original_run_extraction_pipeline = ParserService._run_extraction_pipeline
+        original_articles_find_one = articles.find_one
+        original_articles_insert_one = articles.insert_one
+        original_user_articles_find_one = user_articles.find_one
+        original_user_articles_insert_one = user_articles.insert_one
+        fetch_calls = []
+        inserted_articles = []
+        try:
+            async def mock_fetch_html_content(url):
+                fetch_calls.append(url)
+                await asyncio.sleep(0.05)
+                return "<html><body>Viral content</body></html>"
+            def mock_run_extraction_pipeline(html_content, url, preprocessed=False):
+                return ExtractionResult(
+                    title="Viral",
+                    content="Viral content",
+                    description="Viral description",
+                    metadata=ArticleMetadata(source_url=url, reading_time=1)
+                )
+            async def mock_articles_find_one(*args, **kwargs):
+                return None
+            async def mock_articles_insert_one(doc):
+                inserted_articles.append(doc)
+                return MagicMock(inserted_id=ObjectId())
+            async def mock_user_articles_find_one(*args, **kwargs):
+                return None
+            async def mock_user_articles_insert_one(*args, **kwargs):
+                return MagicMock(inserted_id=ObjectId())
+            ParserService._fetch_html_content = mock_fetch_html_content
+            ParserService._run_extraction_pipeline = mock_run_extraction_pipeline
+            articles.find_one = mock_articles_find_one
+            articles.insert_one = mock_articles_insert_one
+            user_articles.find_one = mock_user_articles_find_one
+            user_articles.insert_one = mock_user_articles_insert_one
+            
+            results = await asyncio.gather(*[
+                ParserService.parse_url("https://viral.example.com", str(ObjectId()))
+                for _ in range(10)
+            ])
+            
+            assert len(fetch_calls) == 1
+            assert len(inserted_articles) == 1
+            assert len({result["article_id"] for result in results}) == 1
+            assert len({result["user_article_id"] for result in results}) == 10
+        finally:
+            ParserService._fetch_html_content = original_fetch_html_content
+            ParserService._run_extraction_pipeline = original_run_extraction_pipeline
+            articles.find_one = original_articles_find_one
+            articles.insert_one = original_articles_insert_one
+            user_articles.find_one = original_user_articles_find_one
+            user_articles.insert_one = original_user_articles_insert_one
+
+    @pytest.mark.asyncio
+    async def test_parse_lease_is_renewed_while_held(self, in_memory_parse_locks):
+        """Test that a lease kept alive outlasts its TTL and cannot be taken over meanwhile"""
+        import asyncio
+        from app.services.single_flight import MongoLease
+        from app.database import parse_locks
+
+        lease = MongoLease(parse_locks, 0.05)
+        token = await lease.try_acquire("https://slow.example.com")
+        async with lease.keep_alive("https://slow.example.com", token):
+            await asyncio.sleep(0.2)
+            assert await lease.try_acquire("https://slow.example.com") is None
+        assert in_memory_parse_locks["https://slow.example.com"]["owner"] == token
+
+        # Without renewals the lease expires and can be taken over
+        await asyncio.sleep(0.1)
+        assert await lease.try_acquire("https://slow.example.com") not in (None, token)
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("in_memory_library_versions")
+    async def test_waits_for_url_leased_by_another_worker(self, in_memory_parse_locks):
+        """Test that a URL leased by another process is awaited instead of parsed again"""
+        import asyncio
+        original_fetch_html_content = ParserService._fetch_html_content
+        original_poll_interval = ParserService.PARSE_LEASE_POLL_INTERVAL
+        original_articles_find_one = articles.find_one
+        original_user_articles_find_one = user_articles.find_one
+        original_user_articles_insert_one = user_articles.insert_one
+        article_id = ObjectId()
+        stored = {}
+        try:
+            url = "https://leased.example.com"
+            # Another worker holds the lease for this URL
+            in_memory_parse_locks[url] = {
+                "_id": url,
+                "owner": "other-worker",
+                "expires_at": datetime.utcnow() + timedelta(minutes=1)
+            }
+            
+            async def mock_fetch_html_content(url):
+                raise Exception("Should not fetch a URL leased by another worker")
+            async def mock_articles_find_one(*args, **kwargs):
+                return stored.get("article")
+            async def mock_user_articles_find_one(*args, **kwargs):
+                return None
+            async def mock_user_articles_insert_one(*args, **kwargs):
+                return MagicMock(inserted_id=ObjectId())
+            ParserService._fetch_html_content = mock_fetch_html_content
+            ParserService.PARSE_LEASE_POLL_INTERVAL = 0.01
+            articles.find_one = mock_articles_find_one
+            user_articles.find_one = mock_user_articles_find_one
+            user_articles.insert_one = mock_user_articles_insert_one
+            
+            async def other_worker_finishes():
+                await asyncio.sleep(0.05)
+                stored["article"] = {"_id": article_id, "type": "article", "metadata": {"source_url": url}}
+            
+            result, _ = await asyncio.gather(
+                ParserService.parse_url(url, str(ObjectId())),
+                other_worker_finishes()
+            )
+            
+            assert result["article_id"] == str(article_id)
+        finally:
+            ParserService._fetch_html_content = original_fetch_html_content
+            ParserService.PARSE_LEASE_POLL_INTERVAL = original_poll_interval
+            articles.find_one = original_articles_find_one
+            user_articles.find_one = original_user_articles_find_one
+            user_articles.insert_one = original_user_articles_insert_one
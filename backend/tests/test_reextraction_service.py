@@ -0,0 +1,193 @@
+import pytest
+import sys
+import os
+from bson import ObjectId
+from fastapi import HTTPException
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.reextraction_service import ReextractionService
+from app.services.parser_service import EXTRACTOR_VERSION
+from app.services.snapshot_store import snapshot_store
+from app.database import articles, reextraction_runs
+
+
+ARTICLE_HTML = f"""
+<html>
+<head><meta property="og:title" content="Archived Article"></head>
+<body><article>{''.join(
+    f'<p>Paragraph {i} of the archived article has enough words in it to be kept as real content.</p>'
+    for i in range(6)
+)}</article></body>
+</html>
+"""
+
+
+class FakeCursor:
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        self.documents = sorted(self.documents, key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class FakeCollections:
+    """In-memory articles and reextraction_runs supporting the queries a run makes"""
+
+    def __init__(self, stored):
+        self.stored = {doc["_id"]: doc for doc in stored}
+        self.runs = {}
+        self.bulk_writes = []
+
+    def find(self, query, projection=None):
+        def matches(doc):
+            if doc.get("extractor_version") == query["extractor_version"]["$ne"]:
+                return False
+            if "type" in query and doc.get("type") != query["type"]:
+                return False
+            if "snapshot_hash" in query and not isinstance(doc.get("snapshot_hash"), str):
+                return False
+            return "_id" not in query or doc["_id"] > query["_id"]["$gt"]
+        return FakeCursor([dict(doc) for doc in self.stored.values() if matches(doc)])
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_writes.append(operations)
+        for operation in operations:
+            doc = self.stored[operation._filter["_id"]]
+            doc.update(operation._doc["$set"])
+            for key in operation._doc.get("$unset", {}):
+                doc.pop(key, None)
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        run = self.runs.setdefault(query["_id"], {"_id": query["_id"], **update["$setOnInsert"]})
+        run.update(update["$set"])
+        return dict(run)
+
+    async def update_one(self, query, update):
+        run = self.runs[query["_id"]]
+        run.update(update["$set"])
+        for key, value in update.get("$inc", {}).items():
+            run[key] = run.get(key, 0) + value
+
+    async def find_one(self, query):
+        return self.runs.get(query["_id"])
+
+    def install(self):
+        originals = (
+            articles.find, articles.bulk_write,
+            reextraction_runs.find_one_and_update, reextraction_runs.update_one, reextraction_runs.find_one
+        )
+        articles.find, articles.bulk_write = self.find, self.bulk_write
+        reextraction_runs.find_one_and_update = self.find_one_and_update
+        reextraction_runs.update_one = self.update_one
+        reextraction_runs.find_one = self.find_one
+        return originals
+
+    @staticmethod
+    def restore(originals):
+        (
+            articles.find, articles.bulk_write,
+            reextraction_runs.find_one_and_update, reextraction_runs.update_one, reextraction_runs.find_one
+        ) = originals
+
+
+def _article(snapshot_hash, article_type="article", url="https://example.com/archived"):
+    return {
+        "_id": ObjectId(),
+        "type": article_type,
+        "snapshot_hash": snapshot_hash,
+        "extractor_version": None,
+        "metadata": {"source_url": url, "canonical_url": url}
+    }
+
+
+def _service():
+    service = ReextractionService()
+    service.BATCH_PAUSE = 0
+    return service
+
+
+class TestReextractionService:
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures(
+        "in_memory_parse_locks",
+        "tmp_snapshot_store",
+        "empty_article_caches",
+        "in_memory_library_versions",
+    )
+    async def test_run_upgrades_bookmarks_and_checkpoints(self, in_memory_article_bodies):
+        """Test that archived pages are re-extracted, bookmarks upgraded and the position checkpointed"""
+        snapshot_hash = await snapshot_store.save(ARTICLE_HTML)
+        bookmark = _article(snapshot_hash, article_type="bookmark")
+        article = _article(snapshot_hash)
+        missing = _article("0" * 64)
+        fake = FakeCollections([bookmark, article, missing])
+        originals = fake.install()
+        try:
+            run = await _service().run(batch_size=2)
+
+            assert run.status == "done"
+            assert (run.processed, run.updated, run.upgraded, run.skipped) == (3, 1, 1, 1)
+            assert run.last_id == str(missing["_id"])
+            assert len(fake.bulk_writes) == 1
+
+            upgraded = fake.stored[bookmark["_id"]]
+            assert upgraded["type"] == "article"
+            assert upgraded["title"] == "Archived Article"
+            assert "Paragraph 0" in in_memory_article_bodies[bookmark["_id"]]["content"]
+            assert upgraded["extractor_version"] == EXTRACTOR_VERSION
+            assert upgraded["metadata"]["canonical_url"] == "https://example.com/archived"
+            assert fake.stored[missing["_id"]]["extractor_version"] is None
+        finally:
+            FakeCollections.restore(originals)
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures(
+        "in_memory_parse_locks",
+        "tmp_snapshot_store",
+        "in_memory_article_bodies",
+        "empty_article_caches",
+        "in_memory_library_versions",
+    )
+    async def test_run_resumes_from_checkpoint(self):
+        """Test that a run stopped by its limit continues after the last visited article"""
+        snapshot_hash = await snapshot_store.save(ARTICLE_HTML)
+        stored = [_article(snapshot_hash) for _ in range(3)]
+        fake = FakeCollections(stored)
+        originals = fake.install()
+        try:
+            service = _service()
+            run = await service.run(limit=2, batch_size=2)
+            assert run.status == "paused"
+            assert run.last_id == str(stored[1]["_id"])
+            assert fake.stored[stored[2]["_id"]]["extractor_version"] is None
+
+            run = await service.run(batch_size=2)
+            assert run.status == "done"
+            assert run.processed == 3
+            assert all(doc["extractor_version"] == EXTRACTOR_VERSION for doc in fake.stored.values())
+            assert [len(operations) for operations in fake.bulk_writes] == [2, 1]
+        finally:
+            FakeCollections.restore(originals)
+
+    @pytest.mark.asyncio
+    async def test_run_is_exclusive(self, in_memory_parse_locks):
+        """Test that a run already holding the lease elsewhere is refused"""
+        service = _service()
+        token = await service._lease.try_acquire(f"reextract:{service.run_id()}")
+        assert token
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.run()
+        assert exc_info.value.status_code == 409
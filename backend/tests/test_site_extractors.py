@@ -0,0 +1,118 @@
+import json
+import pytest
+import sys
+import os
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.parsed_document import GENERIC_EXTRACTOR, ParsedDocument
+from app.services.parser_service import ParserService
+from app.services.site_extractors import MarkdownRenderer, site_extractors
+
+
+PARAGRAPHS = [
+    "The first paragraph of the article has enough words in it to be considered real content by the extractor.",
+    "The second paragraph continues the story with a few more sentences so that the extractor keeps the text.",
+    "A third paragraph makes sure the extracted body is comfortably above the minimum extracted size.",
+]
+
+SUBSTACK_HTML = f"""
+<html>
+<head>
+    <meta property="og:title" content="Substack Post">
+    <meta name="author" content="Jane Writer">
+    <link rel="stylesheet" href="https://substackcdn.com/bundle/main.css">
+</head>
+<body>
+    <h1 class="post-title">Substack Post</h1>
+    <div class="available-content"><div class="body markup">
+        <p>{PARAGRAPHS[0]}</p>
+        <h2>A <em>section</em></h2>
+        <p>{PARAGRAPHS[1]} See <a href="https://example.com/more">the <strong>details</strong></a>.</p>
+        <ul><li>One</li><li>Two</li></ul>
+        <pre>def parse(html):
+    return html</pre>
+        <p>{PARAGRAPHS[2]}</p>
+        <div class="subscription-widget-wrap"><p>Subscribe for free to receive new posts.</p></div>
+    </div></div>
+    <div class="comments-section"><p>A comment that is not part of the article.</p></div>
+</body>
+</html>
+"""
+
+
+def _document(html: str, url: str) -> ParsedDocument:
+    return ParsedDocument(ParserService._preprocess_html_content(html), url=url)
+
+
+class TestSiteExtractors:
+
+    def test_renderer_output(self):
+        """Test that the renderer produces separated markdown blocks"""
+        document = _document(SUBSTACK_HTML, "https://writer.substack.com/p/post")
+        container = document.tree.xpath('//div[@class="body markup"]')[0]
+        markdown = MarkdownRenderer().render(container)
+
+        assert markdown.startswith(PARAGRAPHS[0] + "\n\n## A *section*\n\n")
+        assert "See [the **details**](https://example.com/more)." in markdown
+        assert "- One\n- Two" in markdown
+        assert "```\ndef parse(html):\n    return html\n```" in markdown
+
+    def test_renderer_table(self):
+        """Test that tables become pipe tables with a header separator"""
+        document = _document(
+            "<html><body><table><tr><th>Name</th><th>Value</th></tr><tr><td>a|b</td><td>1</td></tr></table></body></html>",
+            None
+        )
+        markdown = MarkdownRenderer().render(document.tree.xpath("//body")[0])
+        assert markdown == "| Name | Value |\n| --- | --- |\n| a\\|b | 1 |"
+
+    def test_domain_match(self):
+        """Test that a platform page is read from its container without the widgets around it"""
+        document = _document(SUBSTACK_HTML, "https://writer.substack.com/p/post")
+        name, content = site_extractors.extract(document, document.url)
+
+        assert name == "substack"
+        assert "Subscribe for free" not in content
+        assert "A comment" not in content
+        assert "Substack Post" not in content
+
+    def test_fingerprint_match_on_custom_domain(self):
+        """Test that a publication on its own domain is recognised by its HTML"""
+        document = _document(SUBSTACK_HTML, "https://newsletter.example.com/p/post")
+        assert site_extractors.extract(document, document.url)[0] == "substack"
+
+    def test_missing_container_falls_back(self):
+        """Test that a platform page without the expected markup goes to trafilatura"""
+        html = f"<html><body><article>{''.join(f'<p>{p}</p>' for p in PARAGRAPHS)}</article></body></html>"
+        document = _document(html, "https://github.com/example/project")
+
+        assert site_extractors.extract(document, document.url) is None
+        content = ParserService._extract_content(document)
+        assert document.extractor == GENERIC_EXTRACTOR
+        assert PARAGRAPHS[0] in content
+
+    def test_json_ld_article_body(self):
+        """Test that a JSON-LD articleBody with paragraph breaks is used as content"""
+        data = {"@context": "https://schema.org", "@graph": [
+            {"@type": "WebPage", "name": "Page"},
+            {"@type": "NewsArticle", "articleBody": "\n".join(PARAGRAPHS + ["Prices {rose} & fell."])}
+        ]}
+        html = f'<html><head><script type="application/ld+json">{json.dumps(data)}</script></head><body><p>Teaser</p></body></html>'
+        document = _document(html, "https://news.example.com/story")
+        name, content = site_extractors.extract(document, document.url)
+
+        assert name == "json_ld"
+        assert content.split("\n\n") == PARAGRAPHS + ["Prices \\{rose\\} \\& fell."]
+
+    def test_pipeline_uses_site_extractor(self):
+        """Test that the extraction pipeline keeps site extractor output and still reads metadata"""
+        result = ParserService._run_extraction_pipeline(SUBSTACK_HTML, "https://writer.substack.com/p/post")
+
+        assert result.title == "Substack Post"
+        assert result.metadata.author == "Jane Writer"
+        # Paragraph separation is skipped, so the list and code block keep their single line breaks
+        assert "- One\n- Two" in result.content
+        assert "    return html\n```" in result.content
+        assert result.description.startswith(PARAGRAPHS[0][:40])
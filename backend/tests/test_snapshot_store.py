@@ -0,0 +1,82 @@
+import pytest
+import sys
+import os
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import snapshot_store as snapshot_store_module
+from app.services.snapshot_store import LocalSnapshotStorage, SnapshotStore
+
+
+PAGE = "<html><head><title>Snapshot</title></head><body><p>Привет, {мир} &amp; world</p></body></html>"
+
+
+class TestSnapshotStore:
+
+    @pytest.mark.asyncio
+    async def test_save_and_load(self, tmp_path):
+        """Test that a saved page is compressed on disk and loads back unchanged"""
+        store = SnapshotStore(LocalSnapshotStorage(tmp_path))
+        content_hash = await store.save(PAGE)
+
+        files = [path for path in tmp_path.rglob("*") if path.is_file()]
+        assert len(files) == 1
+        assert files[0].name.startswith(content_hash)
+        assert files[0].parent.parent.name == content_hash[:2]
+        assert PAGE.encode("utf-8") not in files[0].read_bytes()
+        assert await store.load(content_hash) == PAGE
+
+    @pytest.mark.asyncio
+    async def test_identical_pages_are_stored_once(self, tmp_path):
+        """Test that saving the same content twice compresses and writes a single blob"""
+        store = SnapshotStore(LocalSnapshotStorage(tmp_path))
+        writes = []
+        compressions = []
+        original_write = store.storage.write
+        original_compress = store._compress
+
+        async def counting_write(name, data):
+            writes.append(name)
+            await original_write(name, data)
+        def counting_compress(content_hash, data):
+            compressions.append(content_hash)
+            return original_compress(content_hash, data)
+        store.storage.write = counting_write
+        store._compress = counting_compress
+
+        first = await store.save(PAGE)
+        second = await store.save(PAGE)
+        other = await store.save(PAGE.replace("world", "everyone"))
+
+        assert first == second
+        assert other != first
+        assert len(writes) == 2
+        assert compressions == [first, other]
+        assert await store.load("0" * 64) is None
+
+    @pytest.mark.asyncio
+    async def test_gzip_fallback_stays_readable(self, tmp_path, monkeypatch):
+        """Test that snapshots written without zstd are read back once zstd is available"""
+        store = SnapshotStore(LocalSnapshotStorage(tmp_path))
+        zstandard = snapshot_store_module.zstandard
+        monkeypatch.setattr(snapshot_store_module, "zstandard", None)
+        content_hash = await store.save(PAGE)
+        assert any(path.name.endswith(".html.gz") for path in tmp_path.rglob("*"))
+
+        monkeypatch.setattr(snapshot_store_module, "zstandard", zstandard)
+        assert await store.load(content_hash) == PAGE
+        # Still deduplicated against the gzip blob
+        assert await store.save(PAGE) == content_hash
+        assert not any(path.name.endswith(".html.zst") for path in tmp_path.rglob("*"))
+
+    @pytest.mark.asyncio
+    async def test_write_failure_does_not_raise(self, tmp_path):
+        """Test that a storage failure is logged and reported as no snapshot"""
+        store = SnapshotStore(LocalSnapshotStorage(tmp_path))
+
+        async def failing_write(name, data):
+            raise OSError("disk full")
+        store.storage.write = failing_write
+
+        assert await store.save(PAGE) is None
@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.url_canonicalizer import canonicalize_url
+
+
+class TestUrlCanonicalizer:
+
+    def test_equivalent_urls_share_canonical_form(self):
+        """Test that tracking params, fragments, trailing slashes and host variants are normalized"""
+        variants = [
+            "https://example.com/posts/article",
+            "https://example.com/posts/article/",
+            "http://example.com/posts/article",
+            "https://www.example.com/posts/article",
+            "https://m.example.com/posts/article",
+            "https://EXAMPLE.com:443/posts/article#comments",
+            "https://example.com/posts/article?utm_source=telegram&utm_medium=share",
+            "https://example.com/posts/article?fbclid=abc123",
+            "example.com/posts/article",
+        ]
+        canonical = {canonicalize_url(url) for url in variants}
+        assert canonical == {"https://example.com/posts/article"}
+
+    def test_meaningful_query_params_are_kept_and_sorted(self):
+        """Test that non-tracking query parameters are kept in a stable order"""
+        assert canonicalize_url("https://example.com/view?id=2&page=1&utm_campaign=x") == \
+            "https://example.com/view?id=2&page=1"
+        assert canonicalize_url("https://example.com/view?page=1&id=2") == \
+            "https://example.com/view?id=2&page=1"
+
+    def test_site_specific_tracking_params(self):
+        """Test that site-specific referral params are dropped only on their sites"""
+        assert canonicalize_url("https://writer.substack.com/p/post?r=abc&triedRedirect=true") == \
+            "https://writer.substack.com/p/post"
+        assert canonicalize_url("https://medium.com/@author/post-123?source=rss----1") == \
+            "https://medium.com/@author/post-123"
+        assert canonicalize_url("https://example.com/search?source=rss") == \
+            "https://example.com/search?source=rss"
+
+    def test_paths_and_ports(self):
+        """Test root paths, duplicate slashes and non-default ports"""
+        assert canonicalize_url("https://example.com/") == "https://example.com"
+        assert canonicalize_url("https://example.com//a//b/") == "https://example.com/a/b"
+        assert canonicalize_url("http://example.com:8080/a") == "https://example.com:8080/a"
+        assert canonicalize_url("https://m.me/page") == "https://m.me/page"
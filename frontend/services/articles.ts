@@ -15,16 +15,32 @@ export async function getUserArticles(): Promise<Article[]> {
   return response.data.articles
 }
 
+// One page of the library, newest first; pass nextCursor back as after for the next page
+export async function getUserArticlesPage(limit: number, after?: string): Promise<{ articles: Article[]; nextCursor: string | null }> {
+  const userId = getUserId()
+  const response = await api.get<{ articles: Article[]; next_cursor: string | null }>(`/users/${userId}/articles`, {
+    params: { limit, after },
+  })
+  return { articles: response.data.articles, nextCursor: response.data.next_cursor }
+}
+
 export async function getUserArticle(articleId: string): Promise<ArticleContent> {
   const userId = getUserId()
-  return (await api.get<ArticleContent>(`/users/${userId}/articles/${articleId}`)).data
+  // Progress and timestamps are per user; the body is shared and served precompressed
+  const [article, content] = await Promise.all([
+    api.get<Article>(`/users/${userId}/articles/${articleId}?content=false`),
+    api.get<string>(`/articles/${articleId}/content`, { responseType: 'text', transformResponse: (data) => data }),
+  ])
+  return { ...article.data, content: content.data }
 }
 
-export async function updateArticleProgress(articleId: string, progress: number): Promise<void> {
+export async function updateArticleProgress(articleId: string, progress: number, position?: number): Promise<void> {
   const userId = getUserId()
   // Ensure progress is a finite number between 0 and 100
   const validProgress = Math.min(Math.max(Number.isFinite(progress) ? progress : 0, 0), 100)
-  await api.put(`/users/${userId}/articles/${articleId}/progress?progress_percentage=${validProgress}`)
+  // position is the index of the block being read in metadata.stats.blocks
+  const positionParam = position !== undefined && position >= 0 ? `&position=${Math.floor(position)}` : ''
+  await api.put(`/users/${userId}/articles/${articleId}/progress?progress_percentage=${validProgress}${positionParam}`)
 }
 
 export async function archiveArticle(articleId: string): Promise<void> {
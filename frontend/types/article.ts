@@ -1,8 +1,25 @@
+// Paragraph/heading table of the content: parallel arrays, one entry per block
+export interface ContentBlocks {
+  // Start of each block in the content, in UTF-16 code units: use with content.slice()
+  offsets: number[];
+  words_before: number[];
+  kinds: string;
+}
+
+export interface ContentStats {
+  word_count: number;
+  char_count: number;
+  plain_text_length: number;
+  // Omitted from the article list
+  blocks?: ContentBlocks | null;
+}
+
 export interface ArticleMetadata {
   source_url: string;
   author?: string | null;
   publish_date?: string | null;
   reading_time?: number | null;
+  stats?: ContentStats | null;
 }
 
 export interface ArticleProgress {